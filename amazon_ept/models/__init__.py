@@ -15,6 +15,7 @@ from . import product_bullet_description
 from . import sale_order
 from . import sale_order_line
 from . import amazon_report
+from . import amazon_report_lifecycle
 from . import fbm_sale_order_report_ept
 from . import common_log_book_ept
 from . import common_log_lines_ept
@@ -31,6 +32,7 @@ from . import settlement_report
 from . import stock_picking
 from . import delivery_carrier
 from . import feed_submission_history
+from . import amazon_stock_export_ledger
 from . import shipped_order_data_queue
 from . import shipped_order_data_queue_line
 from . import shipping_report
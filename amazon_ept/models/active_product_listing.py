@@ -23,6 +23,7 @@ from .. reportTypes import ReportType
 COMMON_LOG_LINES_EPT = 'common.log.lines.ept'
 COMMON_LOG_BOOK_EPT = 'common.log.book.ept'
 PRODUCT_PRODUCT = 'product.product'
+AMAZON_PRODUCT_EPT = 'amazon.product.ept'
 IR_MODEL = 'ir.model'
 IR_CONFIG_PARAMETER = 'ir.config_parameter'
 IAP_ACCOUNT = 'iap.account'
@@ -283,7 +284,7 @@ class ActiveProductListingReportEpt(models.Model):
         self.ensure_one()
         # check instance and attachment configured
         self.check_instance_and_attachment_configured()
-        amazon_product_ept_obj = self.env['amazon.product.ept']
+        amazon_product_ept_obj = self.env[AMAZON_PRODUCT_EPT]
         product_obj = self.env[PRODUCT_PRODUCT]
         log_book_obj = self.env[COMMON_LOG_BOOK_EPT]
         comman_log_line_obj = self.env[COMMON_LOG_LINES_EPT]
@@ -298,22 +299,27 @@ class ActiveProductListingReportEpt(models.Model):
         if skip_header:
             raise UserError(_("The Header of this report must be in English Language,"
                               " Please contact Emipro Support for further Assistance."))
-        for row in reader:
+        rows = list(reader)
+        listing_index = self.prepare_listing_product_index_ept([row.get('seller-sku', '').strip() for row in rows])
+        for row in rows:
             fulfillment_type = self.get_fulfillment_type(row)
             seller_sku = row.get('seller-sku', '').strip()
-            odoo_product = product_obj.search(
-                ['|', ('default_code', '=ilike', seller_sku), ('barcode', '=ilike', seller_sku)])
-            amazon_product_id = amazon_product_ept_obj.search_amazon_product(
-                self.instance_id.id, seller_sku, fulfillment_by=fulfillment_type)
+            pending_vals = listing_index['amazon_product_vals'].get((seller_sku, fulfillment_type))
+            if pending_vals:
+                # Amazon product of an earlier row of this report, not created yet.
+                pending_vals.update(self.prepare_amazon_product_update_vals_ept(fulfillment_type, row))
+                self.amz_update_price_in_pricelist(row, product_obj.browse(pending_vals.get('product_id')),
+                                                   listing_index)
+                continue
+            odoo_product = listing_index['odoo_products'].get(seller_sku.lower(), product_obj) if seller_sku \
+                else product_obj
+            amazon_product_id = listing_index['instance_products'].get((seller_sku, fulfillment_type))
             if not amazon_product_id and not odoo_product:
-                amazon_product = amazon_product_ept_obj.search(
-                    ['|', ('active', '=', False), ('active', '=', True), ('seller_sku', '=', seller_sku)],
-                    limit=1)
-                odoo_product = amazon_product.product_id
+                odoo_product = listing_index['sku_products'].get(seller_sku, amazon_product_ept_obj).product_id
             if amazon_product_id:
                 self.create_or_update_amazon_product_ept(amazon_product_id, amazon_product_id.product_id.id,
                                                          fulfillment_type, row)
-                self.amz_update_price_in_pricelist(row, amazon_product_id.product_id)
+                self.amz_update_price_in_pricelist(row, amazon_product_id.product_id, listing_index)
             else:
                 if len(odoo_product.ids) > 1:
                     seller_sku = row.get('seller-sku', '').strip()
@@ -321,12 +327,66 @@ class ActiveProductListingReportEpt(models.Model):
                     comman_log_line_obj.amazon_create_product_log_line(
                         message, model_id, False, seller_sku, fulfillment_type, log_rec, mismatch=True)
                     continue
-                self.create_odoo_or_amazon_product_ept(odoo_product, fulfillment_type, row, log_rec)
+                self.create_odoo_or_amazon_product_ept(odoo_product, fulfillment_type, row, log_rec, listing_index)
+        self.amz_flush_listing_index_ept(listing_index)
         if not log_rec.log_lines:
             log_rec.unlink()
         self.write({'state': 'processed'})
         return True
 
+    def prepare_listing_product_index_ept(self, seller_skus):
+        """
+        This method prepare the maps used to match the seller skus of the report with the odoo
+        and amazon products, with one query per model instead of one search per row.
+        Odoo products are matched case insensitively on internal reference or barcode, the query
+        uses the lower() indexes of product.product.
+        :param seller_skus: list of seller sku
+        :return: dict {}
+        """
+        product_obj = self.env[PRODUCT_PRODUCT]
+        amazon_product_ept_obj = self.env[AMAZON_PRODUCT_EPT]
+        lower_skus = list({seller_sku.lower() for seller_sku in seller_skus if seller_sku})
+        odoo_products = {}
+        if lower_skus:
+            self._cr.execute("""SELECT id FROM product_product WHERE lower(default_code) = ANY(%s)
+                                UNION
+                                SELECT id FROM product_product WHERE lower(barcode) = ANY(%s)""",
+                             (lower_skus, lower_skus))
+            products = product_obj.search([('id', 'in', [product_id for product_id, in self._cr.fetchall()])])
+            for product in products:
+                for value in {(product.default_code or '').lower(), (product.barcode or '').lower()}:
+                    if value:
+                        odoo_products[value] = odoo_products.get(value, product_obj) | product
+        instance_products = {}
+        sku_products = {}
+        amazon_products = amazon_product_ept_obj.with_context(active_test=False).search(
+            [('seller_sku', 'in', list(set(seller_skus)))], order='id')
+        for amazon_product in amazon_products:
+            sku_products.setdefault(amazon_product.seller_sku, amazon_product)
+            if amazon_product.instance_id.id == self.instance_id.id:
+                instance_products.setdefault((amazon_product.seller_sku, amazon_product.fulfillment_by),
+                                             amazon_product)
+        archived_products = product_obj.browse(
+            [amazon_product.product_id.id for amazon_product in instance_products.values()
+             if amazon_product.product_id and not amazon_product.product_id.active])
+        if archived_products:
+            archived_products.write({'active': True})
+        return {'odoo_products': odoo_products, 'instance_products': instance_products,
+                'sku_products': sku_products, 'amazon_product_vals': {}, 'product_prices': {}}
+
+    def amz_flush_listing_index_ept(self, listing_index):
+        """
+        This method create the amazon products and update the pricelist prices collected while
+        processing the report.
+        :param listing_index: dict {}
+        :return: True
+        """
+        if listing_index['amazon_product_vals']:
+            self.env[AMAZON_PRODUCT_EPT].create(list(listing_index['amazon_product_vals'].values()))
+        if listing_index['product_prices']:
+            self.instance_id.pricelist_id.set_product_prices_ept(listing_index['product_prices'])
+        return True
+
     def check_instance_and_attachment_configured(self):
         """
         This method check Amazon Instance and Attachment file and Pricelist configured.
@@ -370,7 +430,7 @@ class ActiveProductListingReportEpt(models.Model):
         return skip_header
 
     def create_or_update_amazon_product_ept(self, amazon_product_id, odoo_product,
-                                            fulfillment_type, row):
+                                            fulfillment_type, row, listing_index=None):
         """
         This method will create tha amazon product if it is exist and if amazon
         product exist that it will update that
@@ -378,41 +438,49 @@ class ActiveProductListingReportEpt(models.Model):
         param odoo_product : odoo product
         param fulfillment_type : selling on
         param row : report data
+        param listing_index : when given, the amazon product is created later with the other
+        products of the report.
         """
 
-        amazon_product_ept_obj = self.env['amazon.product.ept']
-        description = row.get('item-description', '') and row.get('item-description', '')
-        name = row.get('item-name', '') and row.get('item-name', '')
-        seller_sku = row.get('seller-sku', '').strip()
-
+        amazon_product_ept_obj = self.env[AMAZON_PRODUCT_EPT]
+        vals = self.prepare_amazon_product_update_vals_ept(fulfillment_type, row)
         if not amazon_product_id:
-            amazon_product_ept_obj.create({
-                'product_id': odoo_product.id,
-                'instance_id': self.instance_id.id,
-                'name': name,
-                'long_description': description,
-                'product_asin': row.get('asin1', ''),
-                'seller_sku': seller_sku,
-                'fulfillment_by': fulfillment_type,
-                'exported_to_amazon': True
-            })
+            vals.update({'product_id': odoo_product.id, 'instance_id': self.instance_id.id})
+            if listing_index is not None:
+                listing_index['amazon_product_vals'][(vals.get('seller_sku'), fulfillment_type)] = vals
+            else:
+                amazon_product_ept_obj.create(vals)
         else:
-            amazon_product_id.write({
-                'name': name,
-                'long_description': description,
-                'seller_sku': seller_sku,
-                'fulfillment_by': fulfillment_type,
-                'product_asin': row.get('asin1', ''),
-                'exported_to_amazon': True,
-            })
+            vals = {field_name: value for field_name, value in vals.items()
+                    if (amazon_product_id[field_name] or '') != (value or '')}
+            if vals:
+                amazon_product_id.write(vals)
+
+    @staticmethod
+    def prepare_amazon_product_update_vals_ept(fulfillment_type, row):
+        """
+        This method prepare the amazon product values from the report data.
+        :param fulfillment_type : selling on
+        :param row : report data
+        :return: dict {}
+        """
+        return {
+            'name': row.get('item-name', '') and row.get('item-name', ''),
+            'long_description': row.get('item-description', '') and row.get('item-description', ''),
+            'seller_sku': row.get('seller-sku', '').strip(),
+            'fulfillment_by': fulfillment_type,
+            'product_asin': row.get('asin1', ''),
+            'exported_to_amazon': True,
+        }
 
-    def create_odoo_or_amazon_product_ept(self, odoo_product, fulfillment_type, row, log_rec):
+    def create_odoo_or_amazon_product_ept(self, odoo_product, fulfillment_type, row, log_rec, listing_index=None):
         """
         This method is used to create odoo or amazon product.
         :param odoo_product : odoo product id
         :param fulfillment_type : selling on
         :param row : report line data
         :param log_rec : log record.
+        :param listing_index : dict {} of the report prepared by prepare_listing_product_index_ept
         """
         product_obj = self.env[PRODUCT_PRODUCT]
         comman_log_line_obj = self.env[COMMON_LOG_LINES_EPT]
@@ -420,8 +488,8 @@ class ActiveProductListingReportEpt(models.Model):
         created_product = False
         seller_sku = row.get('seller-sku', '').strip()
         if odoo_product:
-            self.create_or_update_amazon_product_ept(False, odoo_product, fulfillment_type, row)
-            self.amz_update_price_in_pricelist(row, odoo_product)
+            self.create_or_update_amazon_product_ept(False, odoo_product, fulfillment_type, row, listing_index)
+            self.amz_update_price_in_pricelist(row, odoo_product, listing_index)
         else:
             if self.auto_create_product:
                 if not row.get('item-name', ''):
@@ -433,11 +501,14 @@ class ActiveProductListingReportEpt(models.Model):
                         {'default_code': seller_sku,
                          'name': row.get('item-name', ''),
                          'type': 'product'})
-                    self.create_or_update_amazon_product_ept(False, created_product, fulfillment_type, row)
+                    if listing_index is not None:
+                        listing_index['odoo_products'][seller_sku.lower()] = created_product
+                    self.create_or_update_amazon_product_ept(False, created_product, fulfillment_type, row,
+                                                             listing_index)
                     message = """ Product created for seller sku %s || Instance %s """ % (seller_sku,
                                                                                           self.instance_id.name)
                     is_mismatch = False
-                    self.amz_update_price_in_pricelist(row, created_product)
+                    self.amz_update_price_in_pricelist(row, created_product, listing_index)
             else:
                 message = """ Line Skipped due to product not found seller sku %s || Instance %s
                 """ % (seller_sku, self.instance_id.name)
@@ -447,13 +518,17 @@ class ActiveProductListingReportEpt(models.Model):
                                                                mismatch=is_mismatch)
         return True
 
-    def amz_update_price_in_pricelist(self, row, odoo_product):
+    def amz_update_price_in_pricelist(self, row, odoo_product, listing_index=None):
         """
         Update or set Price in pricelist for configured product
         :param row: dict{}
         :param odoo_product: product.product()
+        :param listing_index: when given, the price is collected and set with the other prices of the report.
         :return:
         """
         price_list_id = self.instance_id.pricelist_id
         if self.update_price_in_pricelist and row.get('price', False):
-            price_list_id.set_product_price_ept(odoo_product.id, float(row.get('price')))
+            if listing_index is not None:
+                listing_index['product_prices'][odoo_product.id] = float(row.get('price'))
+            else:
+                price_list_id.set_product_price_ept(odoo_product.id, float(row.get('price')))
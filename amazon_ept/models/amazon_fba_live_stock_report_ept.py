@@ -39,7 +39,8 @@ class AmazonLiveStockReportEpt(models.Model):
     """
     _name = "amazon.fba.live.stock.report.ept"
     _description = "Amazon Live Stock Report"
-    _inherit = ['mail.thread', 'amazon.reports']
+    _inherit = ['mail.thread', 'amazon.reports', 'amazon.report.lifecycle.ept']
+    _amz_lifecycle_cron = 'amazon_ept.ir_cron_process_fba_live_stock_report_seller_%d'
     _order = 'id desc'
 
     @api.depends('seller_id')
@@ -268,6 +269,7 @@ class AmazonLiveStockReportEpt(models.Model):
         """
         live_stock_report = self.create(vals)
         live_stock_report.request_report()
+        live_stock_report.amz_schedule_status_check_ept()
         return live_stock_report
 
     def get_start_end_date_for_inv_reprts(self, vals):
@@ -380,7 +382,7 @@ class AmazonLiveStockReportEpt(models.Model):
         response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
         if response.get('reason', False):
             if self._context.get('is_auto_process', False):
-                job.write({'log_lines': [(0, 0, {'message': response.get('reason', {})})]})
+                job.add_log_line_ept({'message': response.get('reason', {})})
             else:
                 raise UserError(_(response.get('reason', {})))
         else:
@@ -497,19 +499,16 @@ class AmazonLiveStockReportEpt(models.Model):
         seller_id = args.get('seller_id', False)
         seller = self.env[AMAZON_SELLER_EPT].browse(seller_id)
         if seller:
-            fba_live_stock_report = self.search([('seller_id', '=', seller.id),
-                                                 ('state', 'in', ['_SUBMITTED_', '_IN_PROGRESS_'])])
-            fba_live_stock_report.get_report_request_list_via_cron(seller)
-            reports = self.search([('seller_id', '=', seller.id), ('report_id', '!=', False),
-                                   ('state', 'in', ['_DONE_', '_SUBMITTED_', '_IN_PROGRESS_'])])
-            for report in reports:
-                if not report.attachment_id:
-                    report.get_report()
-                report.with_context(is_auto_process=True).process_fba_live_stock_report()
-                report.set_fulfillment_channel_sku()
-                self._cr.commit()
+            self.amz_run_report_lifecycle_ept(seller)
         return True
 
+    def amz_process_report_file_ept(self):
+        """
+        Process the downloaded live stock report and set the fulfillment channel sku.
+        """
+        self.process_fba_live_stock_report()
+        return self.set_fulfillment_channel_sku()
+
     def get_report_request_list_via_cron(self, seller):
         """
         This method will request for get inventory report and process response
@@ -608,7 +607,7 @@ class AmazonLiveStockReportEpt(models.Model):
         if not job:
             message = 'Live Stock Inventory Report Process.'
             job = amazon_process_job_log_obj.amazon_create_transaction_log('import', model_id, self.id)
-            common_log_line_obj.create_log_lines(message, model_id, self, job)
+            common_log_line_obj.buffer_log_line_ept(message, model_id, self, job)
         sellable_line_dict, unsellable_line_dict = self.fill_dictionary_from_file_by_instance(reader, job)
         if self.amz_instance_id:
             amz_warehouse = self.amz_instance_id.fba_warehouse_id or False
@@ -644,7 +643,7 @@ class AmazonLiveStockReportEpt(models.Model):
                 odoo_product = product_obj.search([('default_code', '=', seller_sku)], limit=1)
                 if not odoo_product:
                     message = "Product not found for seller sku %s" % (seller_sku)
-                    job.write({'log_lines': [(0, 0, {'message': message})]})
+                    job.add_log_line_ept({'message': message})
                     continue
             odoo_product_id = odoo_product.id
             sellable_qty = sellable_line_dict.get(odoo_product_id, 0.0)
@@ -710,7 +709,7 @@ class AmazonLiveStockReportEpt(models.Model):
                 sellable_line_dict, amazon_warehouse_location, auto_apply=auto_validate, name=self.name)
         if not amz_warehouse.unsellable_location_id:
             message = 'unsellable location not found for warehouse %s.' % (amz_warehouse.name)
-            job.write({'log_lines': [(0, 0, {'message': message})]})
+            job.add_log_line_ept({'message': message})
         else:
             if unsellable_line_dict:
                 amazon_warehouse_location = amz_warehouse.unsellable_location_id
@@ -721,7 +720,7 @@ class AmazonLiveStockReportEpt(models.Model):
         else:
             message = 'Inventory adjustment process has been completed open log to view products' \
                       'which are not processed due to any reason.'
-            job.write({'log_lines': [(0, 0, {'message': message})]})
+            job.add_log_line_ept({'message': message})
         return True
 
     def set_fulfillment_channel_sku(self):
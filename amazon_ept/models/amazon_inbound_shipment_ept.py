@@ -1149,7 +1149,7 @@ class InboundShipmentEpt(models.Model):
             if not shipment.partnered_small_parcel_ids:
                 message = 'Inbound Shipment %s is not update in amazon because Parcel not found ' \
                           'for update in amazon' % shipment.name
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 continue
             data, skip_process = self.amz_prepare_partnered_small_parcel_data(shipment, data, model_id, job)
             if not skip_process:
@@ -1160,7 +1160,7 @@ class InboundShipmentEpt(models.Model):
             if response.get('reason', False):
                 error_value = response.get('reason', {})
                 message = '%s %s' % (error_value, shipment.name)
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 shipment.write({'state': 'ERROR'})
             else:
                 result = response.get('result', {})
@@ -1188,14 +1188,14 @@ class InboundShipmentEpt(models.Model):
             if not package.ul_id:
                 message = 'Inbound Shipment %s is not update in amazon because dimension ' \
                           'package not found for update' % (shipment.name)
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 skip_process = False
                 break
             if package.ul_id.height <= 0.0 or package.ul_id.width <= 0.0 or package.ul_id.length <= 0.0:
                 message = 'Inbound Shipment %s is not update in amazon because Dimension ' \
                           'Length, Width and Height value must be greater than zero.' % (
                               shipment.name)
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 skip_process = False
                 break
             dimension_unit = package.ul_id.dimension_unit or 'centimeters'
@@ -1234,7 +1234,7 @@ class InboundShipmentEpt(models.Model):
             if not pickings:
                 message = 'Inbound Shipment %s is not update in amazon because of system is' \
                           'not found any transferred picking' % shipment.name
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 continue
             pickings = shipment.picking_ids.filtered(lambda pick: pick.state == 'done' and not pick.is_fba_wh_picking)
             data = {'ShipmentId': shipment.shipment_id,
@@ -1278,7 +1278,7 @@ class InboundShipmentEpt(models.Model):
         elif response.get('reason', False):
             error_value = response.get('reason', {})
             message = '%s %s' % (error_value, shipment.name)
-            log_line_obj.create_log_lines(message, model_id, shipment, job)
+            log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
             shipment.write({'state': 'ERROR'})
 
     def prepare_non_partnered_small_parcel_data(self, pickings, shipment, job, model_id):
@@ -1306,7 +1306,7 @@ class InboundShipmentEpt(models.Model):
             if not traking_dict:
                 message = 'Inbound Shipment %s is not update in amazon because Tracking ' \
                           'number not found in the system' % shipment.name
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
         while True:
             if count_box >= shipment.box_count:
                 break
@@ -1432,7 +1432,7 @@ class InboundShipmentEpt(models.Model):
         if response.get('reason', False):
             error_value = response.get('reason', {})
             if job:
-                log_line_obj.create_log_lines(error_value, model_id, fba_shipment, job)
+                log_line_obj.buffer_log_line_ept(error_value, model_id, fba_shipment, job)
             else:
                 if not auto_called:
                     raise UserError(_(error_value))
@@ -1459,7 +1459,7 @@ class InboundShipmentEpt(models.Model):
             if not pickings:
                 message = 'Inbound Shipment %s is not update in amazon because of system is ' \
                           'not found any transfered picking' % (shipment.name)
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 continue
             data, back_orders = self.amz_prepare_non_partnered_ltl_tracking_data(shipment)
             kwargs = self.amz_prepare_inbound_shipment_kwargs_vals(instance)
@@ -1468,7 +1468,7 @@ class InboundShipmentEpt(models.Model):
             if response.get('reason', False):
                 error_value = response.get('reason', {})
                 message = '%s %s' % (error_value, shipment.name)
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 shipment.write({'state': 'ERROR'})
             if shipment.state != 'ERROR':
                 result = response.get('result', {})
@@ -1817,7 +1817,7 @@ class InboundShipmentEpt(models.Model):
                         self.amz_process_remaining_qty(pickings, shipment, shipmentid, amazon_shipment, model_id, job_id)
                 else:
                     message = "Shipment %s is not found in ERP" % (shipmentid)
-                    log_line_obj.create_log_lines(message, model_id, '', job_id)
+                    log_line_obj.buffer_log_line_ept(message, model_id, '', job_id)
         return True
 
     def amz_process_remaining_qty(self, pickings, shipment, shipmentid, amazon_shipment, model_id, job_id):
@@ -1837,7 +1837,7 @@ class InboundShipmentEpt(models.Model):
         else:
             message = "Shipment Status %s is not update due to picking not found for processing " \
                       "||| ERP status  : %s " % (shipmentid, shipment.state)
-            log_line_obj.create_log_lines(message, model_id, shipment, job_id)
+            log_line_obj.buffer_log_line_ept(message, model_id, shipment, job_id)
 
     def amz_create_back_orders_and_check_return_picking(self, shipment, shipmentid, amazon_shipment):
         """
@@ -1891,7 +1891,7 @@ class InboundShipmentEpt(models.Model):
                 if not amazon_product:
                     message = "Product not found in ERP ||| FulfillmentNetworkSKU : %s  SellerSKU : %s  Shipped Qty : %s" \
                               "Received Qty : %s" % (asin, sku, shipped_qty, received_qty)
-                    log_line_obj.create_log_lines(message, model_id, odoo_shipment_rec, job_id)
+                    log_line_obj.buffer_log_line_ept(message, model_id, odoo_shipment_rec, job_id)
                     continue
                 inbound_shipment_plan_line = odoo_shipment_rec.odoo_shipment_line_ids.filtered(
                     lambda line, amazon_product=amazon_product: line.amazon_product_id.id == amazon_product.id)
@@ -1987,11 +1987,11 @@ class InboundShipmentEpt(models.Model):
             email = shipment.partnered_ltl_id.email or ''
             if not name or not phone or not email:
                 message = 'Invalid contact details found check name/phone/email for contact %s' % (name)
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 continue
             if len(shipment.partnered_ltl_ids.ids) <= 0:
                 message = 'Number of box must be greater than zero for shipment %s' % (shipment.name)
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 continue
             data, flag = self.prepare_partnered_ltl_parcel_data(shipment, model_id, job)
 
@@ -2030,7 +2030,7 @@ class InboundShipmentEpt(models.Model):
             if response.get('reason', False):
                 error_value = response.get('reason', {})
                 message = '%s %s' % (error_value, shipment.name)
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 shipment.write({'state': 'ERROR'})
             else:
                 result = response.get('result', {})
@@ -2072,13 +2072,13 @@ class InboundShipmentEpt(models.Model):
             if not pallet.ul_id:
                 message = 'Inbound Shipment %s is not update in amazon because of dimension ' \
                           'for package not found' % shipment.name
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 flag = False
                 break
             if pallet.ul_id.length <= 0.0 or pallet.ul_id.width <= 0.0 or pallet.ul_id.height <= 0.0:
                 message = 'Inbound Shipment %s is not update in amazon because of Dimension ' \
                           'Length, Width and Height value must be greater that zero' % (shipment.name)
-                log_line_obj.create_log_lines(message, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(message, model_id, shipment, job)
                 flag = False
                 break
             dimension_unit = pallet.ul_id.dimension_unit or 'centimeters'
@@ -20,6 +20,124 @@ IR_MODEL = 'ir.model'
 AMZ_REMOVAL_ORDER_REPORT_HISTORY = 'amazon.removal.order.report.history'
 COMMON_LOG_BOOK_EPT = 'common.log.book.ept'
 AMZ_REMOVAL_ORDER_EPT = 'amazon.removal.order.ept'
+AMAZON_PRODUCT_EPT = 'amazon.product.ept'
+
+
+class AmazonRemovalReportIndex:
+    """
+    In memory index of the removal orders and amazon products of all the rows of a removal order
+    report, loaded with one query per model. It also collects the stock move lines and the split
+    pack operations prepared while processing the report, so they are created with multi-row
+    creates and the pickings are validated together.
+    """
+
+    def __init__(self, removal_report, rows):
+        env = removal_report.env
+        self.removal_report = removal_report
+        self.orders = {}
+        order_refs = list({row.get('order-id', '') for row in rows})
+        removal_orders = env[AMZ_REMOVAL_ORDER_EPT].search([('name', 'in', order_refs)])
+        for order in removal_orders:
+            self.orders[order.name] = self.orders.get(order.name, env[AMZ_REMOVAL_ORDER_EPT]) | order
+
+        self.instance_ids = set((removal_report.seller_id.instance_ids | removal_orders.instance_id).ids)
+        self.sku_products = {}
+        self.asin_products = {}
+        skus = list({row.get('sku', '') for row in rows})
+        asins = list({row.get('fnsku', '') for row in rows})
+        amazon_products = env[AMAZON_PRODUCT_EPT].search(
+            ['|', ('seller_sku', 'in', skus), ('product_asin', 'in', asins), ('fulfillment_by', '=', 'FBA'),
+             ('instance_id', 'in', list(self.instance_ids))], order='id')
+        for amazon_product in amazon_products:
+            self.sku_products.setdefault((amazon_product.seller_sku, amazon_product.instance_id.id),
+                                         amazon_product)
+            self.asin_products.setdefault((amazon_product.product_asin, amazon_product.instance_id.id),
+                                          amazon_product)
+
+        self.move_line_vals = []
+        self.split_operation_vals = []
+        self.pending_done_qty = {}
+        self.picking_ids = []
+
+    def get_orders(self, order_ref):
+        """
+        Return the removal orders of the order reference.
+        """
+        return self.orders.get(order_ref, self.removal_report.env[AMZ_REMOVAL_ORDER_EPT])
+
+    def add_order(self, order):
+        """
+        Add the removal order created while processing the report.
+        """
+        self.orders[order.name] = self.get_orders(order.name) | order
+        self.instance_ids.add(order.instance_id.id)
+
+    def get_amazon_product(self, sku, instance_id, asin=False):
+        """
+        Return the FBA amazon product of the instance by seller sku, else by asin when given.
+        """
+        amazon_product_obj = self.removal_report.env[AMAZON_PRODUCT_EPT]
+        if instance_id not in self.instance_ids:
+            amazon_product = amazon_product_obj.search([('seller_sku', '=', sku), ('fulfillment_by', '=', 'FBA'),
+                                                        ('instance_id', '=', instance_id)], limit=1)
+            if not amazon_product and asin:
+                amazon_product = amazon_product_obj.search([('product_asin', '=', asin),
+                                                            ('fulfillment_by', '=', 'FBA'),
+                                                            ('instance_id', '=', instance_id)], limit=1)
+            return amazon_product
+        amazon_product = self.sku_products.get((sku, instance_id), amazon_product_obj)
+        if not amazon_product and asin:
+            amazon_product = self.asin_products.get((asin, instance_id), amazon_product_obj)
+        return amazon_product
+
+    @staticmethod
+    def prefetch_pickings(orders):
+        """
+        Read the pickings, moves and move lines of all the removal orders at once.
+        """
+        orders.removal_order_picking_ids.move_lines.move_line_ids.mapped('qty_done')
+
+    def get_pending_done_qty(self, move):
+        """
+        Return the done quantity of the move lines prepared but not yet created for the move.
+        """
+        return self.pending_done_qty.get(move.id, 0.0)
+
+    def add_move_line(self, vals):
+        """
+        Add stock move line values to create.
+        """
+        self.move_line_vals.append(vals)
+        self.pending_done_qty[vals['move_id']] = self.pending_done_qty.get(vals['move_id'], 0.0) + \
+                                                 vals.get('qty_done', 0.0)
+
+    def add_split_operation(self, vals_list):
+        """
+        Add split pack operation values to create, their done quantity is pending for the move
+        until they are created.
+        """
+        self.split_operation_vals += vals_list
+        for vals in vals_list:
+            self.pending_done_qty[vals['move_id']] = self.pending_done_qty.get(vals['move_id'], 0.0) + \
+                                                     vals.get('qty_done', 0.0)
+
+    def has_pending_move_lines(self, moves):
+        """
+        Return True when move lines are prepared but not yet created for one of the moves.
+        """
+        return any(move.id in self.pending_done_qty for move in moves)
+
+    def flush(self):
+        """
+        Create the prepared stock move lines and split pack operations.
+        """
+        env = self.removal_report.env
+        if self.move_line_vals or self.split_operation_vals:
+            env['stock.move.line'].create(self.move_line_vals + self.split_operation_vals)
+        self.move_line_vals = []
+        self.split_operation_vals = []
+        self.pending_done_qty = {}
+        return True
 
 
 class AmazonRemovalOrderReportHistory(models.Model):
@@ -247,13 +365,12 @@ class AmazonRemovalOrderReportHistory(models.Model):
         reader = csv.DictReader(imp_file, delimiter='\t')
         disposal_line_dict, return_line_dict, order_dict, liquidations_line_dict = {}, {}, {}, {}
         job = self.amz_removal_search_or_create_job()
-        for row in reader:
-            if not row.get('order-type', '') or row.get('order-type', '') == 'order-type':
-                continue
-            if row.get('order-status', '') not in ['Completed', 'Cancelled', 'Pending']:
-                continue
+        rows = [row for row in reader if row.get('order-type', '') and row.get('order-type', '') != 'order-type'
+                and row.get('order-status', '') in ['Completed', 'Cancelled', 'Pending']]
+        report_index = AmazonRemovalReportIndex(self, rows)
+        for row in rows:
             order_id = row.get('order-id', '')
-            existing_order, skip_line = self.check_amazon_order_exist_order_not(row, job)
+            existing_order, skip_line = self.check_amazon_order_exist_order_not(row, job, report_index)
             if existing_order and existing_order.state == row.get('order-status', ''):
                 continue
             if not existing_order and row.get('order-status', '') in ['Completed', 'Pending']:
@@ -264,9 +381,10 @@ class AmazonRemovalOrderReportHistory(models.Model):
                     existing_order, row, job, disposal_line_dict, return_line_dict, liquidations_line_dict)
         if order_dict:
             existing_order, disposal_line_dict, return_line_dict, liquidations_line_dict = self.create_order_if_not_found_in_odoo(
-                order_dict, job, disposal_line_dict, return_line_dict, liquidations_line_dict)
+                order_dict, job, disposal_line_dict, return_line_dict, liquidations_line_dict, report_index)
         if disposal_line_dict or return_line_dict or liquidations_line_dict:
-            self.process_removal_lines(disposal_line_dict, return_line_dict, liquidations_line_dict, job)
+            self.process_removal_lines(disposal_line_dict, return_line_dict, liquidations_line_dict, job,
+                                       report_index)
         is_mismatch_logs = bool(job.log_lines.filtered(lambda l: l.mismatch_details))
         state = 'partially_processed' if is_mismatch_logs else 'processed'
         self.write({'state': state})
@@ -293,7 +411,7 @@ class AmazonRemovalOrderReportHistory(models.Model):
             if not amazon_removal_order_config:
                 message = "Configuration not found for order-type {} || order-id {} ".format(
                     row.get('order-type', ''), row.get('order-id', ''))
-                job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
+                job.add_log_line_ept({'message': message, 'mismatch_details': True})
             else:
                 key = (existing_order.id, amazon_removal_order_config.id)
                 disposal_line_dict, return_line_dict, liquidations_line_dict = self.update_return_or_removal_line_dict_ept(
@@ -301,13 +419,14 @@ class AmazonRemovalOrderReportHistory(models.Model):
         return disposal_line_dict, return_line_dict, liquidations_line_dict
 
     def create_order_if_not_found_in_odoo(self, order_dict, job, disposal_line_dict,
-                                          return_line_dict, liquidations_line_dict):
+                                          return_line_dict, liquidations_line_dict, report_index=None):
         """
         Creating removal order if order not found in odoo.
         :param order_dict: dict()
         :param job: common.log.book.ept()
         :param disposal_line_dict: dict{key: [row]}
         :param return_line_dict: dict{key: [row]}
+        :param report_index: AmazonRemovalReportIndex
         :return: amazon.removal.order.ept(), dict{key: [row]}, dict{key: [row]}
         @author: Keyur Kanani
 
@@ -319,24 +438,25 @@ class AmazonRemovalOrderReportHistory(models.Model):
               2) Disposal order and all lines have no disposed quantity
         """
         removal_order = []
+        instance = self.seller_id.instance_ids.filtered(lambda l: l.is_allow_to_create_removal_order)
+        if not instance:
+            instance = self.seller_id.instance_ids[0]
         for order_id, rows in list(order_dict.items()):
-            instance = self.seller_id.instance_ids.filtered(lambda l: l.is_allow_to_create_removal_order)
-            if not instance:
-                instance = self.seller_id.instance_ids[0]
             lines = []
             skip_lines = 0
             order_type = rows[0].get('order-type', '')
             for row in rows:
-                amazon_product = self.get_amazon_product(row.get('sku', ''), instance)
+                amazon_product = report_index.get_amazon_product(row.get('sku', ''), instance.id) if \
+                    report_index else self.get_amazon_product(row.get('sku', ''), instance)
                 if not amazon_product:
                     message = "Line is skipped due to product not found in ERP || Order ref {} ||" \
                               "Seller sku {} ".format(order_id, row.get('sku', ''))
-                    job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
+                    job.add_log_line_ept({'message': message, 'mismatch_details': True})
                     continue
                 if float(row.get('requested-quantity', 0.0)) <= 0.0:
                     message = "Line is skipped due to request qty not found in file || " \
                               "Order ref {} || Seller sku {}".format(order_id, row.get('sku', ''))
-                    job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
+                    job.add_log_line_ept({'message': message, 'mismatch_details': True})
                     continue
                 lines, skip_lines = self.prepare_removal_order_lines_vals_ept(lines, skip_lines, row, amazon_product)
             # Not create Removal order if all lines of order are skip
@@ -345,6 +465,8 @@ class AmazonRemovalOrderReportHistory(models.Model):
             if lines:
                 removal_order = self.create_removal_order_and_process_pickings(order_id, order_type, instance,
                                                                                lines, job)
+                if report_index:
+                    report_index.add_order(removal_order)
                 disposal_line_dict, return_line_dict, liquidations_line_dict = self.amz_prepare_disposal_and_removal_line_dict(
                     removal_order, rows, job, disposal_line_dict, return_line_dict, liquidations_line_dict)
         return removal_order, disposal_line_dict, return_line_dict, liquidations_line_dict
@@ -377,7 +499,7 @@ class AmazonRemovalOrderReportHistory(models.Model):
                 liquidations_line_dict.update({key: [row]})
         else:
             message = "Order type {} || skipped of {} ".format(row.get('order-type', ''), row.get('order-id', ''))
-            job.write({'log_lines': [(0, 0, {'message': message})]})
+            job.add_log_line_ept({'message': message})
         return disposal_line_dict, return_line_dict, liquidations_line_dict
 
     def create_removal_order_and_process_pickings(self, order_id, order_type, instance, lines, job):
@@ -455,7 +577,7 @@ class AmazonRemovalOrderReportHistory(models.Model):
             message = "FBA Liquidation Partner is Missing! " \
                       "Please Configure FBA Liquidation Partner in Amazon Seller Configuration."
             if self._context.get('is_auto_process'):
-                job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
+                job.add_log_line_ept({'message': message, 'mismatch_details': True})
             else:
                 raise UserError(_(message))
         return {
@@ -469,25 +591,29 @@ class AmazonRemovalOrderReportHistory(models.Model):
 
         }
 
-    def check_amazon_order_exist_order_not(self, row, job):
+    def check_amazon_order_exist_order_not(self, row, job, report_index=None):
         """
         This Method relocates check amazon order exist or not.If exist then find order with order ref.
         :param row: dict{}
         :param job: common.log.book.ept()
+        :param report_index: AmazonRemovalReportIndex
         :return: amazon.removal.order.ept(), boolean(True / False)
         """
         amz_removal_order_obj = self.env[AMZ_REMOVAL_ORDER_EPT]
         order_id = row.get('order-id', '')
         order_status = row.get('order-status', '')
         skip_line = False
-        existing_order = amz_removal_order_obj.search([('name', '=', order_id)])
+        if report_index:
+            existing_order = report_index.get_orders(order_id)
+        else:
+            existing_order = amz_removal_order_obj.search([('name', '=', order_id)])
         if not existing_order and order_status == 'Cancelled':
             message = "Removal order not found for processing order-id {} ".format(order_id)
-            job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
+            job.add_log_line_ept({'message': message, 'mismatch_details': True})
             skip_line = True
         elif len(existing_order.ids) > 1:
             message = "Multiple Order found for processing order-id {} ".format(order_id)
-            job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
+            job.add_log_line_ept({'message': message, 'mismatch_details': True})
             skip_line = True
         elif existing_order and order_status == 'Cancelled':
             remove_order_picking_ids = existing_order.removal_order_picking_ids
@@ -506,35 +632,50 @@ class AmazonRemovalOrderReportHistory(models.Model):
         :param instance: This Arguments instance of amazon.
         :return: This Method return amazon product.
         """
-        amazon_product = self.env['amazon.product.ept'].search(
+        amazon_product = self.env[AMAZON_PRODUCT_EPT].search(
             [('seller_sku', '=', sku), ('instance_id', '=', instance.id),
              ('fulfillment_by', '=', 'FBA')], limit=1)
         return amazon_product
 
-    def process_removal_lines(self, disposal_line_dict, return_line_dict, liquidations_line_dict, job):
+    def process_removal_lines(self, disposal_line_dict, return_line_dict, liquidations_line_dict, job,
+                              report_index=None):
         """
         This Method relocates process removal order lines.
+        In bulk mode (with report index) the move lines of all the lines are created together and
+        all the affected pickings are validated at once.
         :param liquidations_line_dict: dict()
         :param disposal_line_dict: dict()
         :param return_line_dict: dict()
         :param job: common.log.book.ept()
+        :param report_index: AmazonRemovalReportIndex
         :return: boolean
         """
+        if report_index:
+            order_ids = [order_key[0] for line_dict in [disposal_line_dict, return_line_dict, liquidations_line_dict]
+                         for order_key in line_dict]
+            report_index.prefetch_pickings(self.env[AMZ_REMOVAL_ORDER_EPT].browse(order_ids))
+        pickings = []
         if disposal_line_dict:
-            self.process_disposal_lines(disposal_line_dict, job)
+            pickings += self.process_disposal_lines(disposal_line_dict, job, report_index)
         if return_line_dict:
-            self.process_return_lines(return_line_dict, job)
+            pickings += self.process_return_lines(return_line_dict, job, report_index)
         if liquidations_line_dict:
-            self.process_disposal_lines(liquidations_line_dict, job)
+            pickings += self.process_disposal_lines(liquidations_line_dict, job, report_index)
+        if report_index:
+            report_index.flush()
+            if pickings:
+                self.process_picking(list(set(pickings)))
         return True
 
-    def process_disposal_lines(self, disposal_line_dict, job):
+    def process_disposal_lines(self, disposal_line_dict, job, report_index=None):
         """
         This Method relocates process disposal line.
         If dispose quantity found grater 0 then check move processed or not.
         If dispose quantity found less or equal 0 then search stock move.
+        The pickings are processed by the caller when report index is given.
         :param disposal_line_dict: list(dict{key: [row]})
         :param job: common.log.book.ept()
+        :param report_index: AmazonRemovalReportIndex
         :return: list()
         @author: Keyur Kanani
         """
@@ -545,13 +686,15 @@ class AmazonRemovalOrderReportHistory(models.Model):
             order = amz_removal_order_obj.browse(order_key[0])
             config = amz_removal_order_config_obj.browse(order_key[1])
             picking_vals = self.amz_removal_pickings_dict(order, config)
+            picking_vals.update({'report_index': report_index})
             unsellable_source_location_id = order.disposition_location_id.id
             sellable_source_location_id = order.instance_id.fba_warehouse_id.lot_stock_id.id
             for row in rows:
                 disposed_qty = float(row.get('disposed-quantity', 0.0) or 0.0)
                 canceled_qty = float(row.get('cancelled-quantity', 0.0) or 0.0)
                 shipped_qty = float(row.get('shipped-quantity', 0.0) or 0.0)
-                product = self.find_amazon_product_for_process_removal_line(row, job, order.instance_id.id)
+                product = self.find_amazon_product_for_process_removal_line(row, job, order.instance_id.id,
+                                                                            report_index)
                 if product:
                     source_location_id = unsellable_source_location_id if row.get(
                         'disposition', '') == 'Unsellable' else sellable_source_location_id
@@ -572,7 +715,7 @@ class AmazonRemovalOrderReportHistory(models.Model):
                             pickings += mv_pickings
                     if canceled_qty > 0.0:
                         self.amz_removal_canceled_qty_ept(row, picking_vals, canceled_qty, job)
-        if pickings:
+        if pickings and not report_index:
             pickings = list(set(pickings))
             self.process_picking(pickings)
         return pickings
@@ -632,8 +775,11 @@ class AmazonRemovalOrderReportHistory(models.Model):
             if not moves:
                 message = 'Move not found for processing sku {} order ref {}'.format(
                     sku, picking_vals.get('order', '').name)
-                job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
+                job.add_log_line_ept({'message': message, 'mismatch_details': True})
             if moves:
+                report_index = picking_vals.get('report_index', False)
+                if report_index and report_index.has_pending_move_lines(moves):
+                    report_index.flush()
                 self.update_cancel_qty_ept(moves, qty)
         return True
 
@@ -671,11 +817,11 @@ class AmazonRemovalOrderReportHistory(models.Model):
                                                              picking_vals.get('location_dest_id', False),
                                                              ['done', 'cancel'])
             if moves:
-                move_pickings = self.create_pack_operations_ept(moves, qty)
+                move_pickings = self.create_pack_operations_ept(moves, qty, picking_vals.get('report_index', False))
             else:
                 message = 'Move not found for processing sku {} order ref {}'.format(
                     sku, picking_vals.get('order', '').name)
-                job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
+                job.add_log_line_ept({'message': message, 'mismatch_details': True})
                 skip_line = True
         return move_pickings, skip_line
 
@@ -703,13 +849,15 @@ class AmazonRemovalOrderReportHistory(models.Model):
             lambda l: l.product_id.id == product_id and l.location_id.id == source_location_id and
             l.location_dest_id.id == location_dest_id and l.state not in state)
 
-    def process_return_lines(self, return_line_dict, job):
+    def process_return_lines(self, return_line_dict, job, report_index=None):
         """
         This Method relocates processed return removal order lines.
         This Method find amazon product for process removal line.
         This Method check move processed or not.
+        The pickings are processed by the caller when report index is given.
         :param return_line_dict: This Arguments relocates dictionary of return line.
         :param job: common.log.book.ept()
+        :param report_index: AmazonRemovalReportIndex
         :return: This Method return pickings.
         """
         procurement_rule_obj = self.env['stock.rule']
@@ -720,6 +868,7 @@ class AmazonRemovalOrderReportHistory(models.Model):
             order = amz_removal_order_obj.browse(order_key[0])
             config = amz_removal_order_config_obj.browse(order_key[1])
             picking_vals = self.amz_removal_pickings_dict(order, config)
+            picking_vals.update({'report_index': report_index})
             procurement_rule = procurement_rule_obj.search(
                 [('route_id', '=', config.unsellable_route_id.id),
                  ('location_src_id', '=', order.disposition_location_id.id)])
@@ -731,7 +880,8 @@ class AmazonRemovalOrderReportHistory(models.Model):
             sellable_source_location_id = procurement_rule.location_src_id.id
             sellable_dest_location_id = procurement_rule.location_id.id
             for row in rows:
-                product = self.find_amazon_product_for_process_removal_line(row, job, order.instance_id.id)
+                product = self.find_amazon_product_for_process_removal_line(row, job, order.instance_id.id,
+                                                                            report_index)
                 if not product:
                     continue
                 shipped_qty = float(row.get('shipped-quantity', 0.0))
@@ -752,34 +902,37 @@ class AmazonRemovalOrderReportHistory(models.Model):
                         pickings += move_pickings
                 if canceled_qty > 0.0:
                     self.amz_removal_canceled_qty_ept(row, picking_vals, canceled_qty, job)
-        if pickings:
+        if pickings and not report_index:
             pickings = list(set(pickings))
             self.process_picking(pickings)
         return pickings
 
-    def find_amazon_product_for_process_removal_line(self, line, job, instance):
+    def find_amazon_product_for_process_removal_line(self, line, job, instance, report_index=None):
         """
         This Method relocates find amazon product for processed removal order line.
         :param line: This Arguments relocates Line of return line dictionary.
         :param job: This Arguments relocates job log of removal order log.
         :param instance: This Arguments instance of amazon.
+        :param report_index: AmazonRemovalReportIndex
         :return: This Method return process removal order product.
         """
-        amazon_product_obj = self.env['amazon.product.ept']
+        amazon_product_obj = self.env[AMAZON_PRODUCT_EPT]
         sku = line.get('sku', '')
         asin = line.get('fnsku', '')
-        amazon_product = amazon_product_obj.search([('seller_sku', '=', sku),
-                                                    ('fulfillment_by', '=', 'FBA'),
-                                                    ('instance_id', '=', instance)], limit=1)
-        if not amazon_product:
+        if report_index:
+            amazon_product = report_index.get_amazon_product(sku, instance, asin)
+        else:
+            amazon_product = amazon_product_obj.search([('seller_sku', '=', sku),
+                                                        ('fulfillment_by', '=', 'FBA'),
+                                                        ('instance_id', '=', instance)], limit=1)
+        if not amazon_product and not report_index:
             amazon_product = amazon_product_obj.search([('product_asin', '=', asin),
                                                         ('fulfillment_by', '=', 'FBA'),
                                                         ('instance_id', '=', instance)], limit=1)
         product = amazon_product.product_id.id if amazon_product else False
         if not amazon_product:
-            job.write({'log_lines': [
-                (0, 0, {'message': 'Product  not found for SKU {} & ASIN {}'.format(sku, asin),
-                        'mismatch_details': True})]})
+            job.add_log_line_ept({'message': 'Product  not found for SKU {} & ASIN {}'.format(sku, asin),
+                                  'mismatch_details': True})
         return product
 
     @staticmethod
@@ -798,10 +951,10 @@ class AmazonRemovalOrderReportHistory(models.Model):
         for move in existing_move:
             qty -= move.product_qty
         if qty <= 0.0:
-            job.write({'log_lines': [(0, 0, {
+            job.add_log_line_ept({
                 'message': """Move already processed Product {} || sku {} Qty {} ||
                 Order ref {} """.format(product_id, sku, qty, order_ref)
-            })]})
+            })
         return qty
 
     def update_cancel_qty_ept(self, moves, quantity):
@@ -832,29 +985,29 @@ class AmazonRemovalOrderReportHistory(models.Model):
     def process_picking(self, pickings):
         """
         This Method relocates process picking and change state.
+        All the pickings are validated with one batched _action_done.
         :param pickings: list().
         :return: Boolean(True/False).
         """
-        stock_picking_obj = self.env['stock.picking']
-        for picking in pickings:
-            picking = stock_picking_obj.browse(picking)
-            # if picking.state == 'assigned':
-            #     picking.action_assign()
-            picking.with_context({'auto_processed_orders_ept': True})._action_done()
-            picking.write({'removal_order_report_id': self.id})
-            removal_order_picking_ids = picking.removal_order_id.removal_order_picking_ids.filtered(
+        pickings = self.env['stock.picking'].browse(pickings)
+        pickings.with_context({'auto_processed_orders_ept': True})._action_done()
+        pickings.write({'removal_order_report_id': self.id})
+        for removal_order in pickings.removal_order_id:
+            removal_order_picking_ids = removal_order.removal_order_picking_ids.filtered(
                 lambda l: l.is_fba_wh_picking and l.state != 'done')
             if not removal_order_picking_ids:
-                picking.removal_order_id.write({'state': 'Completed'})
+                removal_order.write({'state': 'Completed'})
         return True
 
-    def create_pack_operations_ept(self, moves, quantity):
+    def create_pack_operations_ept(self, moves, quantity, report_index=None):
         """
         This Method relocates create pack operation.
         This Method create stock move line for existing move and if any quantity left then create
         stock move line.
+        With report index the stock move lines are collected and created later in one create.
         :param moves: stock.move()
         :param quantity: float
+        :param report_index: AmazonRemovalReportIndex
         :return: list()
         """
         pick_ids = []
@@ -864,13 +1017,15 @@ class AmazonRemovalOrderReportHistory(models.Model):
             if qty_left <= 0.0:
                 break
             mv_done_qty = sum(line.qty_done for line in move.move_line_ids)
+            if report_index:
+                mv_done_qty += report_index.get_pending_done_qty(move)
             move_line_remaning_qty = move.product_uom_qty - mv_done_qty   #move.move_line_ids.qty_done
             operations = move.move_line_ids.filtered(
                 lambda o: o.qty_done <= 0 and not o.result_package_id)
             for operation in operations:
                 op_qty = operation.product_uom_qty if operation.product_uom_qty <= qty_left else qty_left
                 operation.write({'qty_done': op_qty})
-                self._put_in_pack(operation)
+                self._put_in_pack(operation, report_index=report_index)
                 qty_left = float_round(qty_left - op_qty,
                                        precision_rounding=operation.product_uom_id.rounding,
                                        rounding_method='UP')
@@ -881,7 +1036,10 @@ class AmazonRemovalOrderReportHistory(models.Model):
             if qty_left > 0.0 and move_line_remaning_qty > 0.0:
                 op_qty = move_line_remaning_qty if move_line_remaning_qty <= qty_left else qty_left
                 sml_vals = self.amz_create_removal_stock_move_line_vals(move, picking, op_qty)
-                stock_move_line_obj.create(sml_vals)
+                if report_index:
+                    report_index.add_move_line(sml_vals)
+                else:
+                    stock_move_line_obj.create(sml_vals)
                 pick_ids.append(move.picking_id.id)
                 qty_left = float_round(qty_left - op_qty,
                                        precision_rounding=move.product_id.uom_id.rounding,
@@ -890,7 +1048,10 @@ class AmazonRemovalOrderReportHistory(models.Model):
                     break
             if qty_left > 0.0:
                 sml_vals = self.amz_create_removal_stock_move_line_vals(move, picking, qty_left)
-                stock_move_line_obj.create(sml_vals)
+                if report_index:
+                    report_index.add_move_line(sml_vals)
+                else:
+                    stock_move_line_obj.create(sml_vals)
             pick_ids.append(move.picking_id.id)
         return pick_ids
 
@@ -914,11 +1075,12 @@ class AmazonRemovalOrderReportHistory(models.Model):
             'move_id': move.id,
         }
 
-    def _put_in_pack(self, operation, package=False):
+    def _put_in_pack(self, operation, package=False, report_index=None):
         """
         This Method relocates put in pack stock move line.
         :param operation: This Arguments relocates stock move line.
         :param package: This Arguments relocates package.
+        :param report_index: AmazonRemovalReportIndex, collects the split operation to create it later.
         :return: This Method return Boolean(True/False).
         """
         operation_ids = self.env['stock.move.line']
@@ -930,8 +1092,14 @@ class AmazonRemovalOrderReportHistory(models.Model):
                 operation.product_uom_qty - operation.qty_done,
                 precision_rounding=operation.product_uom_id.rounding,
                 rounding_method='UP')
-            new_operation = operation.copy(
-                default={'product_uom_qty': operation.qty_done, 'qty_done': operation.qty_done})
+            default = {'product_uom_qty': operation.qty_done, 'qty_done': operation.qty_done}
+            if package:
+                default.update({'result_package_id': package.id})
+            if report_index:
+                report_index.add_split_operation(operation.copy_data(default=default))
+                operation.write({'product_uom_qty': quantity_left_todo, 'qty_done': 0.0})
+                return True
+            new_operation = operation.copy(default=default)
             operation.write({'product_uom_qty': quantity_left_todo, 'qty_done': 0.0})
             operation_ids |= new_operation
         if package:
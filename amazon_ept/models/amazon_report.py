@@ -237,7 +237,7 @@ class AmazonReports(models.AbstractModel):
         if log_rec and log_rec.log_lines:
             log_rec.log_lines.unlink()
         if message:
-            common_log_line_obj.create_log_lines(self, message, model_id, self, log_rec)
+            common_log_line_obj.buffer_log_line_ept(self, message, model_id, self, log_rec)
         return log_rec
 
     def download_report(self):
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# See LICENSE file for full copyright and licensing details.
+
+"""
+Added mixin which drives the lifecycle of the requested Amazon reports: status check with
+exponential backoff, download as soon as the report is ready and process.
+"""
+import logging
+from datetime import timedelta
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.addons.iap.tools import iap_tools
+from ..endpoint import DEFAULT_ENDPOINT
+
+_logger = logging.getLogger(__name__)
+REPORT_PENDING_STATES = ['_SUBMITTED_', '_IN_PROGRESS_']
+REPORT_STATUS_CHECK_DELAY = 60
+REPORT_STATUS_CHECK_MAX_DELAY = 3600
+REPORT_STATUS_BATCH_SIZE = 100
+
+
+class AmazonReportLifecycleEpt(models.AbstractModel):
+    """
+    Added mixin for the report models which are requested, checked, downloaded and processed by
+    the seller wise process cron. Every pending report stores when its status must be checked
+    next, the delay is doubled after every check which did not find the report ready. The due
+    reports of a seller are checked with one status call and the seller wise process cron is
+    triggered at the next check date instead of polling on a fixed interval.
+    """
+    _name = "amazon.report.lifecycle.ept"
+    _description = "Amazon Report Lifecycle"
+
+    # xml id of the seller wise process cron, formatted with the seller id.
+    _amz_lifecycle_cron = False
+
+    amz_next_status_check = fields.Datetime("Next Status Check", copy=False, readonly=True,
+                                            help="Date on which the report status will be checked "
+                                                 "again on Amazon.")
+    amz_status_check_count = fields.Integer("Status Checks", copy=False, readonly=True,
+                                            help="Number of status checks done while the report "
+                                                 "was not ready.")
+
+    def amz_get_report_context_ept(self):
+        """
+        Define method which return the context used to download the report.
+        :return: dict {}
+        """
+        return {}
+
+    def amz_process_report_file_ept(self):
+        """
+        Define method which process the downloaded report, it must be overridden by the report model.
+        :return: True
+        """
+        return True
+
+    @staticmethod
+    def amz_get_status_check_delay_ept(check_count):
+        """
+        Define method which return the delay before the next status check.
+        :param check_count: number of status checks already done
+        :return: timedelta
+        """
+        return timedelta(seconds=min(REPORT_STATUS_CHECK_DELAY * 2 ** check_count, REPORT_STATUS_CHECK_MAX_DELAY))
+
+    def amz_schedule_status_check_ept(self):
+        """
+        Define method which schedule the first status check of the requested reports and trigger
+        the process cron of the seller at that time.
+        :return: True
+        """
+        reports = self.filtered(lambda report: report.state in REPORT_PENDING_STATES)
+        if not reports:
+            return True
+        next_check = fields.Datetime.now() + self.amz_get_status_check_delay_ept(0)
+        reports.write({'amz_next_status_check': next_check, 'amz_status_check_count': 0})
+        for seller in reports.seller_id:
+            self.amz_trigger_lifecycle_cron_ept(seller, next_check)
+        return True
+
+    def amz_trigger_lifecycle_cron_ept(self, seller, next_check):
+        """
+        Define method which trigger the seller wise process cron at the next check date, when the
+        cron is configured and active.
+        :param seller: amazon.seller.ept()
+        :param next_check: datetime
+        :return: True
+        """
+        if not self._amz_lifecycle_cron:
+            return True
+        cron = self.env.ref(self._amz_lifecycle_cron % seller.id, raise_if_not_found=False)
+        if cron and cron.active:
+            cron.sudo()._trigger(next_check)
+        return True
+
+    @api.model
+    def amz_run_report_lifecycle_ept(self, seller):
+        """
+        Define method which check the status of the due reports of the seller, download the
+        ready reports and process the downloaded ones, then trigger the process cron for the
+        next due status check.
+        :param seller: amazon.seller.ept()
+        :return: True
+        """
+        now = fields.Datetime.now()
+        due_reports = self.search([('seller_id', '=', seller.id), ('state', 'in', REPORT_PENDING_STATES),
+                                   ('report_request_id', '!=', False), '|', ('amz_next_status_check', '=', False),
+                                   ('amz_next_status_check', '<=', now)])
+        for index in range(0, len(due_reports), REPORT_STATUS_BATCH_SIZE):
+            due_reports[index:index + REPORT_STATUS_BATCH_SIZE].with_context(
+                is_auto_process=True).amz_check_report_status_ept(seller)
+            self._cr.commit()
+        reports = self.search([('seller_id', '=', seller.id), ('state', 'in', REPORT_PENDING_STATES + ['_DONE_'])])
+        for report in reports:
+            if report.report_id and report.state == '_DONE_' and not report.attachment_id:
+                report.with_context(is_auto_process=True, **report.amz_get_report_context_ept()).get_report()
+            if report.attachment_id:
+                report.with_context(is_auto_process=True).amz_process_report_file_ept()
+            self._cr.commit()
+        next_report = self.search([('seller_id', '=', seller.id), ('state', 'in', REPORT_PENDING_STATES),
+                                   ('amz_next_status_check', '!=', False)], order='amz_next_status_check', limit=1)
+        if next_report:
+            self.amz_trigger_lifecycle_cron_ept(seller, next_report.amz_next_status_check)
+        return True
+
+    def amz_check_report_status_ept(self, seller):
+        """
+        Define method which check the status of all the reports with one status call and
+        reschedule the reports which are not ready yet with exponential backoff.
+        :param seller: amazon.seller.ept()
+        :return: True
+        """
+        report_dict = {report.report_request_id: report for report in self}
+        kwargs = self[:1].prepare_amazon_request_report_kwargs(seller)
+        kwargs.update({'emipro_api': 'get_report_request_list_v13', 'request_ids': list(report_dict.keys())})
+        response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
+        if response.get('reason', False):
+            if not self._context.get('is_auto_process', False):
+                raise UserError(_(response.get('reason', {})))
+            _logger.info("Amazon report status check failed for seller %s: %s", seller.name,
+                         response.get('reason', {}))
+        else:
+            for result in response.get('result', {}):
+                report_request_info = result.get('ReportRequestInfo', [])
+                if not isinstance(report_request_info, list):
+                    report_request_info = [report_request_info]
+                for info in report_request_info:
+                    request_id = str(info.get('ReportRequestId', {}).get('value', ''))
+                    report = report_dict.get(request_id)
+                    if report:
+                        report.update_report_history({'ReportRequestInfo': info})
+        now = fields.Datetime.now()
+        count_wise_reports = {}
+        for report in self:
+            if report.state in REPORT_PENDING_STATES:
+                check_count = report.amz_status_check_count + 1
+                count_wise_reports[check_count] = count_wise_reports.get(check_count, self.browse()) | report
+        for check_count, reports in count_wise_reports.items():
+            reports.write({'amz_status_check_count': check_count,
+                           'amz_next_status_check': now + self.amz_get_status_check_delay_ept(check_count)})
+        (self - self.filtered(lambda report: report.state in REPORT_PENDING_STATES)).write(
+            {'amz_next_status_check': False})
+        return True
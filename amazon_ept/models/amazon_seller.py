@@ -13,6 +13,7 @@ from odoo.addons.iap.tools import iap_tools
 from odoo.exceptions import UserError
 from ..endpoint import DEFAULT_ENDPOINT
 from ..endpoint import FULFILLMENT_ENDPOINT
+from .request_pool import TokenBucket, iter_throttled_requests
 
 TYPE2JOURNAL = {
     'entry': 'Journal Entry',
@@ -30,6 +31,9 @@ IR_CRON = 'ir.cron'
 SALE_ORDER = 'sale.order'
 RES_COUNTRY = 'res.country'
 STOCK_LOCATION = 'stock.location'
+INBOUND_SHIPMENT_STATUS_SLICE = 50
+INBOUND_SHIPMENT_RESTORE_RATE = 2.0
+INBOUND_SHIPMENT_BURST = 30
 
 
 class AmazonSellerEpt(models.Model):
@@ -151,6 +155,12 @@ class AmazonSellerEpt(models.Model):
                                            string='Auto Workflow (FBA)',
                                            default=_get_default_fba_auto_workflow)
     fulfillment_latency = fields.Integer('Fullfillment Latency', default=3)
+    feed_max_messages = fields.Integer("Max Messages Per Feed", default=10000,
+                                       help="Feeds with more messages are split and submitted "
+                                            "in several parts.")
+    feed_max_size = fields.Integer("Max Feed Size (MB)", default=10,
+                                   help="Feeds bigger than this size are split and submitted in "
+                                        "several parts.")
     shipment_charge_product_id = fields.Many2one(PRODUCT_PRODUCT, "Shipment Fee",
                                                  domain=[('type', '=', 'service')],
                                                  default=_get_default_shipment_amazon_fee)
@@ -287,6 +297,35 @@ class AmazonSellerEpt(models.Model):
     amz_fba_liquidation_partner = fields.Many2one("res.partner", string="FBA Liquidation Partner",
                                                   help="This Partner will be used as delivery partner for "
                                                        "FBA Liquidation Removal Order.")
+    amz_order_item_restore_rate = fields.Float("Order Items Restore Rate", default=0.5, digits=(16, 3),
+                                               help="Number of order item requests per second restored by "
+                                                    "Amazon for this seller.")
+    amz_order_item_burst = fields.Integer("Order Items Burst", default=30,
+                                          help="Maximum number of order item requests Amazon allows in a "
+                                               "burst for this seller.")
+    amz_concurrent_requests = fields.Integer("Concurrent Requests", default=4,
+                                             help="Number of order item or inbound shipment status requests "
+                                                  "kept in flight at the same time.")
+    amz_pending_order_batch_size = fields.Integer("Pending Orders Batch Size", default=50,
+                                                  help="Number of FBA pending orders created and committed "
+                                                       "together while importing the pending orders.")
+
+    def get_order_item_token_bucket_ept(self):
+        """
+        Define method which prepare the token bucket which throttle the order item requests as per
+        the restore rate and burst of seller.
+        :return: TokenBucket
+        """
+        return TokenBucket(self.amz_order_item_restore_rate, self.amz_order_item_burst)
+
+    def get_fetch_endpoint_ept(self):
+        """
+        Define method which return the endpoint used to fetch order details. The system parameter
+        amazon_ept.fetch_endpoint can point to a local mock server for testing.
+        :return: endpoint url
+        """
+        return self.env['ir.config_parameter'].sudo().get_param('amazon_ept.fetch_endpoint',
+                                                                 DEFAULT_ENDPOINT)
 
     def deactivate_fba_warehouse(self):
         """
@@ -737,69 +776,87 @@ class AmazonSellerEpt(models.Model):
                 raise UserError(_(response.get('reason', {})))
             items = response.get('items', {})
             amazon_inbound_shipments = {}
+            ship_member_dict = {}
             for amazon_result in items:
                 shipment_id = amazon_result.get('ShipmentId').get('value', False)
                 seller_sku = amazon_result.get('SellerSKU').get('value', '')
-                if amazon_inbound_shipments:
-                    keys = amazon_inbound_shipments.keys()
-                    if shipment_id in keys:
-                        ship_members = amazon_inbound_shipments.get(shipment_id)
-                        flag = 1
-                        for ship_member in ship_members:
-                            if seller_sku == ship_member.get('SellerSKU').get('value', ''):
-                                new_received_quantity = amazon_result.get('QuantityReceived').get(
-                                    'value', 0.0)
-                                old_quantity = ship_member.get('QuantityReceived').get('value', 0.0)
-                                qty = float(old_quantity) + (float(new_received_quantity))
-                                ship_member.get('QuantityReceived').update({'value': str(qty)})
-                                flag = 0
-                        if flag:
-                            ship_members.append(amazon_result)
-                            amazon_inbound_shipments.update({shipment_id: ship_members})
-                    else:
-                        amazon_inbound_shipments.update({shipment_id: [amazon_result]})
-                else:
-                    amazon_inbound_shipments.update({shipment_id: [amazon_result]})
+                ship_member = ship_member_dict.get((shipment_id, seller_sku))
+                if ship_member:
+                    new_received_quantity = amazon_result.get('QuantityReceived').get('value', 0.0)
+                    old_quantity = ship_member.get('QuantityReceived').get('value', 0.0)
+                    qty = float(old_quantity) + (float(new_received_quantity))
+                    ship_member.get('QuantityReceived').update({'value': str(qty)})
+                    continue
+                ship_member_dict.update({(shipment_id, seller_sku): amazon_result})
+                amazon_inbound_shipments.setdefault(shipment_id, []).append(amazon_result)
             if amazon_inbound_shipments:
                 job_id = common_log_book_obj.create({'module': 'amazon_ept', 'type': 'import'})
                 inbound_shipment_obj.check_status_ept(amazon_inbound_shipments, seller, job_id)
-                max_range = 0
-                ship_id_list = amazon_inbound_shipments.keys()
-                while max_range < len(ship_id_list):
-                    ship_id_list = list(ship_id_list)
-                    kwargs = self.prepare_fba_shipment_status_request_kwargs(seller)
-                    kwargs.update({'emipro_api': 'check_status_v13',
-                                   'shipment_ids': ship_id_list[max_range:max_range + 50]})
-                    max_range += 50
-                    response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
-                    if response.get('reason', False):
-                        raise UserError(_(response.get('reason', {})))
-                    items = response.get('amazon_shipments', {})
-                    shipment_status = {}
-                    for ship_member in items:
-                        shipmentid = ship_member.get('ShipmentId', {}).get('value', '')
-                        status = ship_member.get('ShipmentStatus', {}).get('value', '')
-                        shipment_status[shipmentid] = status
-                    inbound_shipment_ids = shipment_status.keys()
-                    inbound_shipments = inbound_shipment_obj.search(
-                        [('shipment_id', 'in', list(inbound_shipment_ids))])
-                    for inbound_shipment in inbound_shipments:
-                        ship_status = shipment_status.get(inbound_shipment.shipment_id)
-                        inbound_shipment.write({'state': ship_status})
-                        if ship_status == 'CLOSED':
-                            if not inbound_shipment.closed_date:
-                                inbound_shipment.write({'closed_date': time.strftime("%Y-%m-%d")})
-                            pickings = inbound_shipment.mapped('picking_ids').filtered(
-                                lambda r: r.state in ['partially_available', 'assigned'] and r.is_fba_wh_picking)
-                            pickings and pickings.action_cancel()
+                shipment_status = self.get_inbound_shipment_status_ept(seller, list(amazon_inbound_shipments.keys()))
+                self.update_inbound_shipment_status_ept(shipment_status)
                 if not job_id:
                     job_id = common_log_book_obj.create({'module': 'amazon_ept', 'type': 'import'})
                     message = "%s inbound shipment is successfully processed" % (len(amazon_inbound_shipments))
                     model_id = common_log_line_obj.get_model_id('amazon.inbound.shipment.ept')
-                    common_log_line_obj.create_log_lines(message, model_id, False, job_id)
+                    common_log_line_obj.buffer_log_line_ept(message, model_id, False, job_id)
             seller.last_inbound_shipment_status_sync = last_updated_before
         return True
 
+    def get_inbound_shipment_status_ept(self, seller, shipment_ids):
+        """
+        Request the status of the inbound shipments in slices of 50 shipment ids. The slices are
+        requested concurrently, throttled as per the inbound shipment quota of Amazon.
+        :param seller: amazon.seller.ept()
+        :param shipment_ids: list of amazon shipment ids
+        :return: dict {shipment id: status}
+        """
+        kwargs = self.prepare_fba_shipment_status_request_kwargs(seller)
+        kwargs.update({'emipro_api': 'check_status_v13'})
+        endpoint = seller.get_fetch_endpoint_ept()
+
+        def fetch_shipment_status(shipment_id_slice):
+            # Runs in a worker thread, only the prepared kwargs and endpoint must be used here.
+            return iap_tools.iap_jsonrpc(endpoint, params=dict(kwargs, shipment_ids=shipment_id_slice),
+                                         timeout=1000)
+
+        shipment_id_slices = [shipment_ids[index:index + INBOUND_SHIPMENT_STATUS_SLICE]
+                              for index in range(0, len(shipment_ids), INBOUND_SHIPMENT_STATUS_SLICE)]
+        shipment_status = {}
+        for _shipment_id_slice, response in iter_throttled_requests(
+                shipment_id_slices, fetch_shipment_status, max_workers=seller.amz_concurrent_requests,
+                bucket=TokenBucket(INBOUND_SHIPMENT_RESTORE_RATE, INBOUND_SHIPMENT_BURST)):
+            if response.get('reason', False):
+                raise UserError(_(response.get('reason', {})))
+            for ship_member in response.get('amazon_shipments', {}):
+                shipmentid = ship_member.get('ShipmentId', {}).get('value', '')
+                shipment_status[shipmentid] = ship_member.get('ShipmentStatus', {}).get('value', '')
+        return shipment_status
+
+    def update_inbound_shipment_status_ept(self, shipment_status):
+        """
+        Write the status of the inbound shipments with one write per status, set the closed date
+        of closed shipments and cancel the remaining FBA pickings of all closed shipments at once.
+        :param shipment_status: dict {shipment id: status}
+        :return: True
+        """
+        inbound_shipment_obj = self.env['amazon.inbound.shipment.ept']
+        inbound_shipments = inbound_shipment_obj.search([('shipment_id', 'in', list(shipment_status.keys()))])
+        state_wise_shipments = {}
+        for inbound_shipment in inbound_shipments:
+            ship_status = shipment_status.get(inbound_shipment.shipment_id)
+            state_wise_shipments[ship_status] = state_wise_shipments.get(ship_status, inbound_shipment_obj) | \
+                                                inbound_shipment
+        for ship_status, shipments in state_wise_shipments.items():
+            shipments.write({'state': ship_status})
+        closed_shipments = state_wise_shipments.get('CLOSED', inbound_shipment_obj)
+        if closed_shipments:
+            closed_shipments.filtered(lambda shipment: not shipment.closed_date).write(
+                {'closed_date': time.strftime("%Y-%m-%d")})
+            pickings = closed_shipments.mapped('picking_ids').filtered(
+                lambda r: r.state in ['partially_available', 'assigned'] and r.is_fba_wh_picking)
+            pickings and pickings.action_cancel()
+        return True
+
     def prepare_fba_shipment_status_request_kwargs(self, seller):
         """
         Prepare Arguments for FBA Shipment Status Request.
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# See LICENSE file for full copyright and licensing details.
+
+"""
+Added class to store the last stock quantity and fulfillment latency submitted to Amazon.
+"""
+
+import logging
+from xml.etree.ElementTree import ParseError
+from odoo import models, fields
+from .utils import xml2dict
+
+_logger = logging.getLogger(__name__)
+
+
+class AmazonStockExportLedgerEpt(models.Model):
+    """
+    Added class to store per marketplace and seller sku the quantity and latency which
+    Amazon confirmed through the feed result, so unchanged stock is not exported again.
+    """
+    _name = "amazon.stock.export.ledger.ept"
+    _description = "Amazon Stock Export Ledger"
+    _rec_name = 'seller_sku'
+
+    instance_id = fields.Many2one('amazon.instance.ept', string='Marketplace', required=True,
+                                  ondelete='cascade', index=True)
+    seller_sku = fields.Char(required=True, index=True)
+    quantity = fields.Integer(help="Last quantity confirmed by Amazon.")
+    fulfillment_latency = fields.Integer(help="Last fulfillment latency confirmed by Amazon.")
+    is_confirmed = fields.Boolean(default=False, help="True when Amazon confirmed the values at "
+                                                      "least once.")
+    confirmed_date = fields.Datetime()
+    pending_quantity = fields.Integer(help="Quantity submitted in the pending feed.")
+    pending_fulfillment_latency = fields.Integer(help="Latency submitted in the pending feed.")
+    pending_feed_id = fields.Many2one('feed.submission.history', string="Pending Feed",
+                                      ondelete='set null', index=True)
+
+    _sql_constraints = [('amazon_stock_export_ledger_unique_constraint',
+                         'unique(instance_id,seller_sku)',
+                         "Stock export ledger must be unique per marketplace & seller sku")]
+
+    def get_stock_ledger_dict_ept(self, instance, seller_skus):
+        """
+        Define method which return the ledger of marketplace for given skus.
+        :param instance: amazon.instance.ept()
+        :param seller_skus: list of seller sku
+        :return: dict {seller_sku: (quantity, fulfillment_latency)}
+        """
+        ledgers = self.search_read([('instance_id', '=', instance.id), ('seller_sku', 'in', seller_skus),
+                                    ('is_confirmed', '=', True)],
+                                   ['seller_sku', 'quantity', 'fulfillment_latency'])
+        return {ledger['seller_sku']: (ledger['quantity'], ledger['fulfillment_latency'])
+                for ledger in ledgers}
+
+    def register_pending_feed_ept(self, instance, feed, stock_lines):
+        """
+        Define method which store the values submitted in the feed as pending for the skus.
+        :param instance: amazon.instance.ept()
+        :param feed: feed.submission.history()
+        :param stock_lines: list of tuple (seller_sku, quantity, fulfillment_latency)
+        :return: True
+        """
+        stock_dict = {seller_sku: (quantity, latency) for seller_sku, quantity, latency in stock_lines}
+        ledgers = self.search([('instance_id', '=', instance.id), ('seller_sku', 'in', list(stock_dict))])
+        group_wise_ledgers = {}
+        for ledger in ledgers:
+            group_wise_ledgers.setdefault(stock_dict.pop(ledger.seller_sku), []).append(ledger.id)
+        for (quantity, latency), ledger_ids in group_wise_ledgers.items():
+            self.browse(ledger_ids).write({'pending_quantity': quantity,
+                                           'pending_fulfillment_latency': latency,
+                                           'pending_feed_id': feed.id})
+        if stock_dict:
+            self.create([{'instance_id': instance.id, 'seller_sku': seller_sku,
+                          'pending_quantity': quantity, 'pending_fulfillment_latency': latency,
+                          'pending_feed_id': feed.id}
+                         for seller_sku, (quantity, latency) in stock_dict.items()])
+        return True
+
+    @staticmethod
+    def get_feed_result_error_skus_ept(processing_report):
+        """
+        Define method which return the skus which Amazon rejected in the feed processing report.
+        :param processing_report: ProcessingReport of the feed result
+        :return: set of seller skus
+        """
+        report_lines = processing_report.get('Result', [])
+        if not isinstance(report_lines, list):
+            report_lines = [report_lines]
+        error_skus = set()
+        for line in report_lines:
+            if line.get('ResultCode', {}).get('value', '') == 'Error':
+                error_skus.add(line.get('AdditionalInfo', {}).get('SKU', {}).get('value', ''))
+        return error_skus
+
+    def confirm_feed_result_ept(self, feed, result):
+        """
+        Define method which move the pending values of the feed to confirmed values for all skus
+        except the ones rejected by Amazon. Rejected skus keep the old values, so they are exported
+        again with the next stock export. When the result is not a complete processing report the
+        ledgers are left pending, so the skus keep their last confirmed values.
+        :param feed: feed.submission.history()
+        :param result: feed submission result xml
+        :return: True
+        """
+        try:
+            result = xml2dict().fromstring(result)
+        except ParseError:
+            _logger.info('Unable to read the result of stock feed %s.', feed.feed_result_id)
+            return True
+        processing_report = result.get('AmazonEnvelope', {}).get('Message', {}).get('ProcessingReport', {})
+        if not processing_report or processing_report.get('StatusCode', {}).get('value', '') != 'Complete':
+            return True
+        ledgers = self.search([('pending_feed_id', '=', feed.id)])
+        if not ledgers:
+            return True
+        error_skus = self.get_feed_result_error_skus_ept(processing_report)
+        rejected_ledgers = ledgers.filtered(lambda ledger: ledger.seller_sku in error_skus)
+        rejected_ledgers.write({'pending_feed_id': False})
+        confirm_date = fields.Datetime.now()
+        self._cr.execute("""UPDATE amazon_stock_export_ledger_ept
+                            SET quantity = pending_quantity,
+                                fulfillment_latency = pending_fulfillment_latency,
+                                is_confirmed = true, confirmed_date = %s, pending_feed_id = NULL,
+                                write_uid = %s, write_date = %s
+                            WHERE id in %s""",
+                         (confirm_date, self._uid, confirm_date, tuple((ledgers - rejected_ledgers).ids) or (0,)))
+        self.invalidate_cache()
+        return True
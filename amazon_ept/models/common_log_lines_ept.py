@@ -23,7 +23,7 @@ class CommonLogLineEpt(models.Model):
     def amazon_create_product_log_line(self, message, model_id, product_id, default_code, fulfillment_by, log_rec,
                                        product_title='', mismatch=False):
         """
-        will creates and product log line
+        will creates and product log line, the line is inserted with the log line buffer
         """
         transaction_vals = {'default_code': default_code,
                             'model_id': model_id,
@@ -34,13 +34,12 @@ class CommonLogLineEpt(models.Model):
                             'product_title': product_title,
                             'log_book_id': log_rec and log_rec.id or False,
                             'mismatch_details': mismatch}
-        log_line = self.create(transaction_vals)
-        return log_line
+        return self.buffer_log_lines_ept([transaction_vals])
 
     def amazon_create_order_log_line(self, message, model_id, res_id, order_ref, default_code, fulfillment_by,
                                      log_rec, mismatch=False):
         """
-        will creates an order log line
+        will creates an order log line, the line is inserted with the log line buffer
         """
         transaction_vals = {'message': message,
                             'model_id': model_id,
@@ -50,5 +49,4 @@ class CommonLogLineEpt(models.Model):
                             'fulfillment_by': fulfillment_by,
                             'log_book_id': log_rec and log_rec.id or False,
                             'mismatch_details': mismatch}
-        log_line = self.create(transaction_vals)
-        return log_line
+        return self.buffer_log_lines_ept([transaction_vals])
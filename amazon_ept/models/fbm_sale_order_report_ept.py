@@ -6,6 +6,7 @@ Define class to process for FBM sale orders
 
 import base64
 import csv
+import hashlib
 import time
 from io import StringIO
 import pytz
@@ -341,8 +342,12 @@ class FbmSaleOrderReportEpt(models.Model):
         amazon_instance_obj = self.env['amazon.instance.ept']
         state_dict = {}
         country_dict = {}
+        partner_cache = {}
+        order_vals_cache = {}
+        line_vals_cache = {}
         dict_product_details = {}
         count_order_number = 0
+        state_dict.update(self.prepare_fbm_unshipped_state_dict_ept(order_dict, country_dict))
         module_obj = self.env['ir.module.module']
         vat_module = module_obj.sudo().search([('name', '=', 'base_vat'), ('state', '=', 'installed')])
         for order_ref, order_details in order_dict.items():
@@ -354,10 +359,11 @@ class FbmSaleOrderReportEpt(models.Model):
             instance = amazon_instance_obj.browse(order_ref[1])
             vat_country_code = order_details[0].get('vat-country', '')
             customer_vals.update({'check_vat_ept': bool(vat_module), 'vat-country': vat_country_code})
-            partner = self.get_partner(customer_vals, state_dict, country_dict, instance)
+            partner = self.get_partner(customer_vals, state_dict, country_dict, instance, partner_cache)
             order = self.create_amazon_fbm_unshipped_order(instance, partner, order_ref, order_details,
-                                                           business_prime_dict)
-            self.create_amazon_fbm_unshipped_order_lines(order, instance, order_details, dict_product_details)
+                                                           business_prime_dict, order_vals_cache)
+            self.create_amazon_fbm_unshipped_order_lines(order, instance, order_details, dict_product_details,
+                                                         line_vals_cache)
             order.process_orders_and_invoices_ept()
             count_order_number += 1
             if count_order_number >= 10:
@@ -365,7 +371,8 @@ class FbmSaleOrderReportEpt(models.Model):
                 count_order_number = 0
         return True
 
-    def create_amazon_fbm_unshipped_order(self, instance, partner, order_ref, order_details, business_prime_dict):
+    def create_amazon_fbm_unshipped_order(self, instance, partner, order_ref, order_details, business_prime_dict,
+                                          order_vals_cache=None):
         """
         Create FBM Unshipped Orders
         :param instance: amazon.instance.ept()
@@ -373,6 +380,7 @@ class FbmSaleOrderReportEpt(models.Model):
         :param order_ref: sale order reference
         :param order_details: dict of order detail
         :param business_prime_dict: dict of business and prime orders
+        :param order_vals_cache: dict of partner wise order values prepared during the run
         :return:
         """
         # set carrier in order vals
@@ -384,7 +392,7 @@ class FbmSaleOrderReportEpt(models.Model):
         vals = sale_order_obj.prepare_amazon_sale_order_vals(instance, partner, order_values)
         # set picking policy as FBM Auto workflow picking policy
         vals.update({'picking_policy': instance.seller_id.fbm_auto_workflow_id.picking_policy})
-        ordervals = sale_order_obj.create_sales_order_vals_ept(vals)
+        ordervals = sale_order_obj.create_sales_order_vals_ept(vals, order_vals_cache)
         if not seller.is_default_odoo_sequence_in_sales_order:
             name = seller.order_prefix + order_ref[0] if seller.order_prefix else order_ref[0]
             ordervals.update({'name': name})
@@ -532,15 +540,20 @@ class FbmSaleOrderReportEpt(models.Model):
              ('amz_fulfillment_by', '=', 'FBM')])
         return order
 
-    def get_partner(self, vals, state_dict, country_dict, instance):
+    def get_partner(self, vals, state_dict, country_dict, instance, partner_cache=None):
         """
         This method is find the partner and if it's not found than it create the new partner.
         :param vals: {}
         :param state_dict: {}
         :param country_dict: {}
         :param instance: amazon.instance.ept()
+        :param partner_cache: {} partners already resolved during the run, keyed by the hash of
+        customer details, so repeat buyers are resolved only once.
         :return: Partner {}
         """
+        cache_key = self.get_fbm_partner_cache_key_ept(vals, instance) if partner_cache is not None else False
+        if cache_key and cache_key in partner_cache:
+            return partner_cache[cache_key]
         country, state = self.get_fbm_order_state_and_country_ept(vals, country_dict, state_dict)
         email = vals.get('BuyerEmail', '')
         buyer_name = vals.get('BuyerName', '')
@@ -576,7 +589,23 @@ class FbmSaleOrderReportEpt(models.Model):
             invoice_partner.message_post(body=_("<b>VAT Number [%s] is invalid!</b>" % str(vat)))
             if invoice_partner != delivery:
                 delivery.message_post(body=_("<b>VAT Number [%s] is invalid!</b>" % str(vat)))
-        return {'invoice_partner': invoice_partner.id, 'shipping_partner': delivery.id}
+        partner_dict = {'invoice_partner': invoice_partner.id, 'shipping_partner': delivery.id}
+        if cache_key:
+            partner_cache[cache_key] = partner_dict
+        return partner_dict
+
+    @staticmethod
+    def get_fbm_partner_cache_key_ept(vals, instance):
+        """
+        Prepare the hash of the customer details which identify the resolved partners.
+        :param vals: {}
+        :param instance: amazon.instance.ept()
+        :return: sha1 hex digest
+        """
+        keys = ['BuyerEmail', 'BuyerName', 'ShipName', 'AddressLine1', 'AddressLine2', 'AddressLine3', 'City',
+                'PostalCode', 'StateOrRegion', 'CountryCode', 'ShipNumber', 'vat-number', 'vat-country']
+        content = '\x1f'.join([str(instance.id)] + [str(vals.get(key, '') or '') for key in keys])
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
 
     def search_or_create_fbm_delivery_partner(self, invoice_partner, new_partner_vals, instance, partner, ship_name,
                                               country, state):
@@ -603,13 +632,15 @@ class FbmSaleOrderReportEpt(models.Model):
             and invoice_partner.country_id == country
             and invoice_partner.state_id == state) else False
         if not delivery:
+            country_id = country.id if country else False
+            state_id = state.id if state else False
+            fingerprints = [
+                partner_obj.get_amz_address_fingerprint_ept(ship_name, street, street2, zip_code, city, country_id,
+                                                            state_id),
+                partner_obj.get_amz_address_fingerprint_ept(ship_name, street, False, zip_code, city, country_id,
+                                                            state_id)]
             delivery = partner_obj.with_context(is_amazon_partner=True).search(
-                [('name', '=', ship_name), ('street', '=', street),
-                 '|', ('street2', '=', False), ('street2', '=', street2),
-                 ('zip', '=', zip_code),
-                 ('city', '=', city),
-                 ('country_id', '=', country.id if country else False),
-                 ('state_id', '=', state.id if state else False),
+                [('amz_address_fingerprint', 'in', fingerprints),
                  '|', ('company_id', '=', False),
                  ('company_id', '=', instance.company_id.id)], limit=1)
             if not delivery:
@@ -643,6 +674,27 @@ class FbmSaleOrderReportEpt(models.Model):
                 new_partner_vals.update({'vat': vat})
         return new_partner_vals, is_invalid_vat
 
+    def prepare_fbm_unshipped_state_dict_ept(self, order_dict, country_dict):
+        """
+        This method finds the states of the unshipped orders of the report in one pass, so the
+        partners of the orders are not searching the state one by one.
+        :param order_dict: dict{(amazon order ref, instance id): [order lines]}
+        :param country_dict: {country code: res.country()}
+        :return: {state name or code: res.country.state()}
+        """
+        partner_obj = self.env[RES_PARTNER]
+        state_triples = []
+        for order_details in order_dict.values():
+            row = order_details[0]
+            country_code = row.get('ship-country', '')
+            if country_code not in country_dict:
+                country_dict.update({country_code: partner_obj.get_country(country_code)})
+            state_name = row.get('ship-state', '') or False
+            if country_dict.get(country_code) and state_name and state_name != '--':
+                state_triples.append((country_dict.get(country_code), row.get('ship-postal-code', ''), state_name))
+        states = partner_obj.resolve_states_ept(state_triples)
+        return {state_triple[2]: state for state_triple, state in states.items() if state}
+
     def get_fbm_order_state_and_country_ept(self, vals, country_dict, state_dict):
         """
         This method is used to get the FBM order state and country
@@ -784,13 +836,15 @@ class FbmSaleOrderReportEpt(models.Model):
             ordervals.update({'analytic_account_id': analytic_account})
         return ordervals
 
-    def create_amazon_fbm_unshipped_order_lines(self, order, instance, order_details, dict_product_details):
+    def create_amazon_fbm_unshipped_order_lines(self, order, instance, order_details, dict_product_details,
+                                                line_vals_cache=None):
         """
         This method prepare order lines.
         :param order: order Object
         :param instance: instance object
         :param order_details: sale order line from dictionary
-        :param sale_order_line_obj: sale order line object
+        :param dict_product_details: dict {(seller sku, instance id): product.product()}
+        :param line_vals_cache: {} product wise order line defaults prepared during the run
         :return: True
         """
         sale_order_line_obj = self.env['sale.order.line']
@@ -819,7 +873,7 @@ class FbmSaleOrderReportEpt(models.Model):
                 'shipping-price': order_detail.get('shipping-price', 0.0),
                 'shipping-tax': order_detail.get('shipping-tax', 0.0)
             }
-            order_line_vals = sale_order_line_obj.create_sale_order_line_ept(line_vals)
+            order_line_vals = sale_order_line_obj.create_sale_order_line_ept(line_vals, line_vals_cache)
             order_line_vals.update({'amazon_order_item_id': order_detail.get('order-item-id', False),
                                     'line_tax_amount': item_tax, **taxargs})
             # Set Analytic Tags in Sale order line from Amazon Marketplace
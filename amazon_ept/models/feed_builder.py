@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# See LICENSE file for full copyright and licensing details.
+
+"""
+Streamed builder for Amazon XML feeds (AmazonEnvelope) which splits the messages into several
+envelopes when the configured message count or byte size limit is reached.
+"""
+
+import io
+from contextlib import contextmanager
+from xml.sax.saxutils import XMLGenerator
+
+DEFAULT_FEED_MAX_MESSAGES = 10000
+DEFAULT_FEED_MAX_SIZE = 10 * 1024 * 1024
+ENVELOPE_CLOSE = b'</AmazonEnvelope>'
+
+
+class AmazonFeedBuilder:
+    """
+    Write Amazon feed messages into a byte buffer with an XML writer.
+
+    Every message is rendered once into its own small buffer, so its size is known before it
+    is appended to the current envelope. When the next message would exceed ``max_messages`` or
+    ``max_size`` (in bytes), the current envelope is closed and a new one is started.
+
+    A message is given as a list of ``(tag, value)`` or ``(tag, value, attrs)`` tuples, where
+    value is either a scalar or another list of tuples, or as an already rendered XML fragment
+    (str) which is written verbatim.
+
+    >>> builder = AmazonFeedBuilder('MERCHANT', 'Inventory', max_messages=1)
+    >>> builder.add_message([('Inventory', [('SKU', 'A&B'), ('Quantity', 2)])], 'Update', key=1)
+    >>> builder.add_message([('Inventory', [('SKU', 'C'), ('Quantity', 0)])], 'Update', key=2)
+    >>> [feed['keys'] for feed in builder.get_feeds()]
+    [[1], [2]]
+    """
+
+    def __init__(self, merchant_id, message_type, max_messages=0, max_size=0,
+                 purge_and_replace=None):
+        self.merchant_id = merchant_id
+        self.message_type = message_type
+        self.max_messages = max_messages or DEFAULT_FEED_MAX_MESSAGES
+        self.max_size = max_size or DEFAULT_FEED_MAX_SIZE
+        self.purge_and_replace = purge_and_replace
+        self.feeds = []
+        self._buffer = None
+        self._message_count = 0
+        self._keys = []
+        self._group = None
+
+    def __len__(self):
+        return sum(feed['message_count'] for feed in self.feeds) + self._message_count
+
+    @staticmethod
+    def _write_elements(writer, elements):
+        """
+        Write the list of (tag, value[, attrs]) tuples using the XML writer.
+        """
+        for element in elements:
+            tag, value = element[0], element[1]
+            attrs = element[2] if len(element) > 2 else {}
+            writer.startElement(tag, {name: str(attr) for name, attr in attrs.items()})
+            if isinstance(value, (list, tuple)):
+                AmazonFeedBuilder._write_elements(writer, value)
+            elif value is not None and value is not False:
+                writer.characters(str(value))
+            writer.endElement(tag)
+
+    def _render(self, write_method):
+        """
+        Render the content written by write_method(stream, writer) into utf-8 bytes.
+        """
+        stream = io.StringIO()
+        writer = XMLGenerator(stream, encoding='utf-8', short_empty_elements=True)
+        write_method(stream, writer)
+        return stream.getvalue().encode('utf-8')
+
+    def _render_header(self):
+        """
+        Render the envelope header, it is repeated at the beginning of every split feed.
+        """
+
+        def write_header(stream, writer):
+            stream.write('<?xml version="1.0" encoding="utf-8"?>')
+            writer.startElement('AmazonEnvelope', {
+                'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+                'xsi:noNamespaceSchemaLocation': 'amzn-envelope.xsd'})
+            header = [('Header', [('DocumentVersion', '1.01'),
+                                  ('MerchantIdentifier', self.merchant_id)]),
+                      ('MessageType', self.message_type)]
+            if self.purge_and_replace is not None:
+                header.append(('PurgeAndReplace', 'true' if self.purge_and_replace else 'false'))
+            self._write_elements(writer, header)
+
+        return self._render(write_header)
+
+    def _render_message(self, message_id, body, operation_type):
+        """
+        Render one <Message> element.
+        """
+
+        def write_message(stream, writer):
+            writer.startElement('Message', {})
+            elements = [('MessageID', message_id)]
+            if operation_type:
+                elements.append(('OperationType', operation_type))
+            self._write_elements(writer, elements)
+            if isinstance(body, str):
+                stream.write(body)
+            else:
+                self._write_elements(writer, body)
+            writer.endElement('Message')
+
+        return self._render(write_message)
+
+    def _close_feed(self):
+        """
+        Close the envelope which is currently being written and store it as a finished feed.
+        """
+        if not self._buffer:
+            return
+        self._buffer.write(ENVELOPE_CLOSE)
+        self.feeds.append({'data': self._buffer.getvalue().decode('utf-8'),
+                           'message_count': self._message_count,
+                           'keys': self._keys})
+        self._buffer.close()
+        self._buffer = None
+        self._message_count = 0
+        self._keys = []
+
+    def add_message(self, body, operation_type=False, key=None):
+        """
+        Append a message to the current feed, starting a new feed when a limit is reached.
+        Inside message_group the message is kept with the other messages of the group.
+        :param body: list of (tag, value[, attrs]) tuples or a rendered XML fragment.
+        :param operation_type: value of the OperationType element, if any.
+        :param key: identifier stored with the feed to know which records it contains.
+        """
+        if self._group is not None:
+            self._group.append((body, operation_type, key))
+            return
+        self.add_messages([(body, operation_type, key)])
+
+    def add_messages(self, messages):
+        """
+        Append messages which must be submitted in the same feed, a new feed is started when they
+        do not fit in the current one. A group bigger than the limits is written in one feed.
+        :param messages: list of (body, operation_type, key) tuples.
+        """
+        if not messages:
+            return
+        rendered = [self._render_message(self._message_count + index, body, operation_type)
+                    for index, (body, operation_type, key) in enumerate(messages, 1)]
+        if self._buffer and (self._message_count + len(messages) > self.max_messages or
+                             self._buffer.tell() + sum(len(message) for message in rendered) +
+                             len(ENVELOPE_CLOSE) > self.max_size):
+            self._close_feed()
+            rendered = [self._render_message(index, body, operation_type)
+                        for index, (body, operation_type, key) in enumerate(messages, 1)]
+        if not self._buffer:
+            self._buffer = io.BytesIO()
+            self._buffer.write(self._render_header())
+        for message, (body, operation_type, key) in zip(rendered, messages):
+            self._buffer.write(message)
+            self._message_count += 1
+            if key is not None:
+                self._keys.append(key)
+
+    @contextmanager
+    def message_group(self):
+        """
+        Collect the messages added in the block and append them together with add_messages, so
+        they are not split across two feeds.
+        """
+        self._group = []
+        try:
+            yield self
+            messages = self._group
+        finally:
+            self._group = None
+        self.add_messages(messages)
+
+    def pop_feeds(self, close=False):
+        """
+        Return the finished feeds and forget them, so they can be submitted while messages are
+        still being added. The envelope being written is closed first when close is True.
+        """
+        if close:
+            self._close_feed()
+        feeds, self.feeds = self.feeds, []
+        return feeds
+
+    def get_feeds(self):
+        """
+        Close the pending envelope and return the feeds as a list of dictionaries with the keys
+        data, message_count and keys.
+        """
+        self._close_feed()
+        return self.feeds
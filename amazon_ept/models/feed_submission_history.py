@@ -7,6 +7,8 @@ Added class to store feed history and auto process to update tracking number fee
 
 import logging
 import time
+from datetime import datetime, timedelta
+from xml.etree.ElementTree import ParseError
 from odoo import models, fields, _
 from odoo.addons.iap.tools import iap_tools
 from odoo.exceptions import UserError
@@ -15,6 +17,9 @@ from ..endpoint import DEFAULT_ENDPOINT
 
 _logger = logging.getLogger(__name__)
 
+FEED_RESULT_MAX_ATTEMPTS = 12
+FEED_RESULT_MAX_AGE_DAYS = 2
+
 
 class FeedSubmissionHistory(models.Model):
     """
@@ -44,6 +49,14 @@ class FeedSubmissionHistory(models.Model):
                                   ('cancel_request', 'Cancel Request in Amazon'),
                                   ('upload_invoice', 'Upload Customer Invoice in Amazon')],
                                  string="Feed Submission Type")
+    result_state = fields.Selection([('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')],
+                                    string="Result Status", copy=False, index=True,
+                                    help="Status of the feed result polled by the scheduler, feeds without "
+                                         "status are not polled.")
+    stock_ledger_ids = fields.One2many('amazon.stock.export.ledger.ept', 'pending_feed_id',
+                                       string="Pending Stock Ledgers")
+    result_attempts = fields.Integer(copy=False, help="Number of times the scheduler requested the feed "
+                                                      "result.")
 
     def get_feed_submission_result(self):
         """
@@ -82,28 +95,122 @@ class FeedSubmissionHistory(models.Model):
             result = response.get('result', {})
             self.write(
                 {'feed_result': str(result),
-                 'feed_result_date': time.strftime("%Y-%m-%d %H:%M:%S")})
+                 'feed_result_date': time.strftime("%Y-%m-%d %H:%M:%S"),
+                 'result_state': self.result_state and 'done'})
+            if self.feed_type == 'export_stock' and result:
+                self.env['amazon.stock.export.ledger.ept'].confirm_feed_result_ept(self, result)
         return result
 
     def update_tracking_number_feed_cron(self):
         """
         Purpose: The scheduler to update order status and tracking numbers from odoo to amazon
+        The outstanding tracking feeds are checked and all the pickings of a feed, except the ones
+        of the orders which Amazon rejected, are marked as updated in Amazon with one write.
+        The pickings of the feeds which get no result are released after FEED_RESULT_MAX_ATTEMPTS.
         :return:
         """
-        stock_picking_obj = self.env['stock.picking']
-        feeds = self.search([('feed_type', '=', 'update_tracking_number'), ('feed_result', '=', False)], limit=2)
+        feeds = self.get_pending_result_feeds_ept('update_tracking_number')
         for feed in feeds:
-            response = feed.with_context(auto_process=True).get_feed_submission_result()
+            response = feed.poll_feed_submission_result_ept()
             if response:
-                xml_to_dict_obj = xml2dict()
-                result = xml_to_dict_obj.fromstring(response)
-                messages_error = result.get('AmazonEnvelope', {}).get('Message', {}).get(
-                    'ProcessingReport', {}).get(\
-                    'ProcessingSummary', {}).get('MessagesWithError', {}).get('value', '')
-                messages_warning = result.get('AmazonEnvelope', {}).get('Message', {}).get(
-                    'ProcessingReport', {}).get(\
-                    'ProcessingSummary', {}).get('MessagesWithWarning', {}).get('value', '')
-                if messages_error and messages_warning == '0':
-                    stock_picking_obj.search([('feed_submission_id', '=', feed.id)]).write(\
-                        {'updated_in_amazon': True})
+                feed.confirm_tracking_feed_result_ept(response)
+        return True
+
+    def get_pending_result_feeds_ept(self, feed_type, domain=None, limit=20):
+        """
+        Define method which return the feeds of which the scheduler is waiting for the result, the
+        feeds requested the least times are taken first, so the old feeds do not block new ones.
+        :param feed_type: feed type
+        :param domain: additional domain
+        :param limit: number of feeds
+        :return: feed.submission.history()
+        """
+        return self.search([('feed_type', '=', feed_type), ('result_state', '=', 'pending'),
+                            ('feed_result', '=', False)] + (domain or []),
+                           order='result_attempts asc, feed_submit_date asc', limit=limit)
+
+    def poll_feed_submission_result_ept(self):
+        """
+        Define method which request the result of the feed from the scheduler. After
+        FEED_RESULT_MAX_ATTEMPTS requests without result or FEED_RESULT_MAX_AGE_DAYS after the
+        submission, the feed is marked as failed and its records are released, so they are exported
+        again.
+        :return: feed submission result or False
+        """
+        self.result_attempts += 1
+        result = self.with_context(auto_process=True).get_feed_submission_result()
+        if not result and (self.result_attempts >= FEED_RESULT_MAX_ATTEMPTS or not self.feed_submit_date or
+                           self.feed_submit_date < datetime.now() - timedelta(days=FEED_RESULT_MAX_AGE_DAYS)):
+            _logger.info('No result of feed %s after %s attempts, the feed is marked as failed.',
+                         self.feed_result_id, self.result_attempts)
+            self.result_state = 'failed'
+            self.release_failed_feed_ept()
+        return result
+
+    def release_failed_feed_ept(self):
+        """
+        Define method which release the records waiting for the result of the failed feed.
+        :return: True
+        """
+        if self.feed_type == 'update_tracking_number':
+            self.env['stock.picking'].search([('feed_submission_id', '=', self.id)]).write(
+                {'feed_submission_id': False})
+        elif self.feed_type == 'export_stock':
+            self.stock_ledger_ids.write({'pending_feed_id': False})
+        return True
+
+    def confirm_tracking_feed_result_ept(self, result):
+        """
+        Define method which mark the pickings of the tracking feed as updated in Amazon. Pickings
+        of the rejected orders are released from the feed, so they are exported again with the next
+        tracking update.
+        :param result: feed submission result xml
+        :return: True
+        """
+        result = xml2dict().fromstring(result)
+        processing_report = result.get('AmazonEnvelope', {}).get('Message', {}).get('ProcessingReport', {})
+        if not processing_report:
+            return True
+        pickings = self.env['stock.picking'].search([('feed_submission_id', '=', self.id)])
+        rejected_orders = self.get_tracking_feed_rejected_orders_ept(processing_report)
+        rejected_pickings = pickings.filtered(lambda picking: picking.sale_id.amz_order_reference in rejected_orders)
+        rejected_pickings.write({'feed_submission_id': False})
+        (pickings - rejected_pickings).write({'updated_in_amazon': True})
+        return True
+
+    def get_tracking_feed_rejected_orders_ept(self, processing_report):
+        """
+        Define method which return the amazon order references of the messages rejected by Amazon,
+        the message ids of the processing report are mapped with the submitted feed.
+        :param processing_report: ProcessingReport of the feed result
+        :return: set of amazon order references
+        """
+        report_lines = processing_report.get('Result', [])
+        if not isinstance(report_lines, list):
+            report_lines = [report_lines]
+        error_message_ids = {line.get('MessageID', {}).get('value', '') for line in report_lines
+                             if line.get('ResultCode', {}).get('value', '') == 'Error'}
+        if not error_message_ids:
+            return set()
+        try:
+            messages = xml2dict().fromstring(self.message or '').get('AmazonEnvelope', {}).get('Message', [])
+        except ParseError:
+            _logger.info('Unable to read the message of tracking feed %s.', self.feed_result_id)
+            return set(self.env['stock.picking'].search([('feed_submission_id', '=', self.id)]).mapped(
+                'sale_id.amz_order_reference'))
+        if not isinstance(messages, list):
+            messages = [messages]
+        return {message.get('OrderFulfillment', {}).get('AmazonOrderID', {}).get('value', '')
+                for message in messages if message.get('MessageID', {}).get('value', '') in error_message_ids}
+
+    def export_stock_feed_result_cron(self):
+        """
+        Purpose: The scheduler to get the result of the exported stock feeds, so the stock export
+        ledger is updated with the quantities confirmed by amazon. Only the feeds having pending
+        ledgers are polled, the ledgers of the feeds which get no result are released.
+        :return: True
+        """
+        feeds = self.get_pending_result_feeds_ept('export_stock', [('stock_ledger_ids', '!=', False)])
+        for feed in feeds:
+            feed.poll_feed_submission_result_ept()
         return True
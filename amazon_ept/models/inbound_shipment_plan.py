@@ -231,7 +231,7 @@ class InboundShipmentPlanEpt(models.Model):
                 error_value = 'No any warehouse found related to fulfillment center %s. Please set ' \
                               'fulfillment center %s in warehouse || shipment %s.' % (
                                   fulfill_center, fulfill_center, shipment.name)
-                log_line_obj.create_log_lines(error_value, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(error_value, model_id, shipment, job)
                 continue
             location_routes = location_route_obj.search([('supplied_wh_id', '=', warehouse.id), (
                 'supplier_wh_id', '=', ship_plan.warehouse_id.id)])
@@ -240,7 +240,7 @@ class InboundShipmentPlanEpt(models.Model):
                     job = log_book_obj.create({'module': 'amazon_ept', 'type': 'export'})
                 error_value = 'Location routes are not found. Please configure routes in warehouse ' \
                               'properly || warehouse %s & shipment %s.' % (warehouse.name, shipment.name)
-                log_line_obj.create_log_lines(error_value, model_id, shipment, job)
+                log_line_obj.buffer_log_line_ept(error_value, model_id, shipment, job)
                 continue
             location_routes = location_routes[0]
             group_wh_dict.update({proc_group: warehouse})
@@ -310,7 +310,7 @@ class InboundShipmentPlanEpt(models.Model):
         response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
         if response.get('reason', False):
             error_value = response.get('reason', {})
-            log_line_obj.create_log_lines(error_value, model_id, self, job)
+            log_line_obj.buffer_log_line_ept(error_value, model_id, self, job)
         else:
             shipment.write({'state': 'CANCELLED'})
         return True
@@ -394,7 +394,7 @@ class InboundShipmentPlanEpt(models.Model):
                 error_value = response.get('reason', {})
                 if not job:
                     job = log_book_obj.create({'module': 'amazon_ept', 'type': 'export', })
-                log_line_obj.create_log_lines(error_value, model_id, self, job)
+                log_line_obj.buffer_log_line_ept(error_value, model_id, self, job)
                 self.write({'state': 'cancel'})
                 return True
             shipments = []
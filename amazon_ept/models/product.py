@@ -13,12 +13,15 @@ from datetime import datetime, timedelta
 from odoo import models, fields, api, _
 from odoo.addons.iap.tools import iap_tools
 from odoo.exceptions import UserError
+from odoo.tools.sql import create_index
 
 from ..endpoint import DEFAULT_ENDPOINT
+from .feed_builder import AmazonFeedBuilder
 
 PRODUCT_PRODUCT = 'product.product'
 AMAZON_PRODUCT_EPT = 'amazon.product.ept'
 FEED_SUBMISSION_HISTORY = 'feed.submission.history'
+AMAZON_STOCK_EXPORT_LEDGER_EPT = 'amazon.stock.export.ledger.ept'
 STOCK_HEIGHTS = "Stock Height"
 DATE_YMDHMS = "%Y-%m-%d %H:%M:%S"
 
@@ -200,19 +203,51 @@ class AmazonProductEpt(models.Model):
                   'instance_id': instance.id, }
         return kwargs
 
+    @staticmethod
+    def get_amazon_feed_builder_ept(instance, message_type, purge_and_replace=None):
+        """
+        Define method which prepare the streamed feed builder using the feed limits of the seller.
+        :param instance: amazon.instance.ept()
+        :param message_type: MessageType of the feed envelope (Product, Inventory, Price, ...)
+        :return: AmazonFeedBuilder
+        """
+        seller = instance.seller_id
+        return AmazonFeedBuilder(instance.merchant_id, message_type,
+                                 max_messages=seller.feed_max_messages,
+                                 max_size=seller.feed_max_size * 1024 * 1024,
+                                 purge_and_replace=purge_and_replace)
+
+    def submit_amazon_feed_ept(self, instance, data, emipro_api, marketplace=True):
+        """
+        Define method which submit one feed envelope to Amazon and return the response.
+        :param instance: amazon.instance.ept()
+        :param data: feed envelope
+        :param emipro_api: IAP api name
+        :param marketplace: True if the feed is submitted for the marketplace of instance
+        :return: dict
+        """
+        kwargs = self.get_amazon_product_request_data_ept(instance, data, emipro_api)
+        if marketplace:
+            kwargs.update({'marketplaceids': [instance.market_place_id]})
+        return iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
+
     def export_product_amazon(self, instance):
         """
         This Method Relocates export amazon product listing in amazon.
+        Feeds are split as per the seller's feed limits and each part is submitted separately.
         :param instance:This argument relocates instance of amazon.
         :return: This Method return Boolean(True/False).
         """
-        data = self.create_product_envelope(instance)
-        kwargs = self.get_amazon_product_request_data_ept(instance, data, 'export_product_amazon_v13')
-        response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
-        if response.get('reason', False):
-            raise UserError(_(response.get('reason', {})))
-        results = response.get('result', {})
-        self.process_export_product_amazon_result(instance, data, results)
+        feeds = self.create_product_envelope(instance).get_feeds()
+        for feed in feeds:
+            response = self.submit_amazon_feed_ept(instance, feed['data'], 'export_product_amazon_v13',
+                                                   marketplace=False)
+            if response.get('reason', False):
+                raise UserError(_(response.get('reason', {})))
+            results = response.get('result', {})
+            self.browse(feed['keys']).process_export_product_amazon_result(instance, feed['data'], results)
+            if len(feeds) > 1:
+                self._cr.commit()
         return True
 
     def process_export_product_amazon_result(self, instance, data, results):
@@ -238,31 +273,22 @@ class AmazonProductEpt(models.Model):
     def create_product_envelope(self, instance):
         """
         This Method relocates prepare envelope for amazon.
-        :param amazon_products: This arguments relocates product listing of amazon.
         :param instance: This argument relocates instance of amazon.
-        :return: This argument return envelope of amazon.
+        :return: This argument return feed builder with the envelopes of amazon.
         """
-        message_id = 0
-        messages = ''
+        builder = self.get_amazon_feed_builder_ept(instance, 'Product', purge_and_replace=False)
         for product in self:
-            message_id = message_id + 1
-            messages = "%s %s" % (messages, self.get_message(message_id, product))
-        header = self.get_header(instance)
-        data = "%s %s %s" % (header, messages, '</AmazonEnvelope>')
-        return data
+            builder.add_message(self.get_product_message_body(product), 'PartialUpdate',
+                                key=product.id)
+        return builder
 
-    def get_message(self, message_id, product):
+    def get_product_message_body(self, product):
         """
-        This Method relocates prepare envelop message for amazon product.
-        :param message_id:This argument relocates message id of amazon because of amazon
-        depends on message id.
+        This Method relocates prepare the Product element of the envelop message for amazon product.
         :param product:This arguments relocates product listing of amazon
-        :return: This Method return amazon envelope message.
+        :return: This Method return Product element of amazon envelope message.
         """
-        message = """
-                <MessageID>%s</MessageID>
-                <OperationType>PartialUpdate</OperationType>
-                <Product>""" % (message_id)
+        message = "<Product>"
         message = "%s %s" % (message, self.standard_product_code(product))
         if product.standard_product_id_type == 'GTIN':
             message = "%s %s" % (message, "<GtinExemptionReason>%s</GtinExemptionReason>" % ( \
@@ -299,24 +325,7 @@ class AmazonProductEpt(models.Model):
             amazon_only = "%s %s" % (amazon_only, "</Amazon-Only>")
             message = "%s %s" % (message, amazon_only)
         message = "%s </Product>" % (message)
-        return "<Message>%s</Message>" % (message)
-
-    def get_header(self, instnace):
-        """
-        This Method relocates prepare header of envelope for amazon product listing.
-        :param instnace: This argument relocates instance of amazon.
-        :return: This Method return header of envelope for amazon product listing.
-        """
-        return """<?xml version="1.0"?>
-            <AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" 
-            xsi:noNamespaceSchemaLocation="amzn-envelope.xsd">
-            <Header>
-                <DocumentVersion>1.01</DocumentVersion>
-                <MerchantIdentifier>%s</MerchantIdentifier>
-            </Header>
-            <MessageType>Product</MessageType>
-            <PurgeAndReplace>false</PurgeAndReplace>
-         """ % (instnace.merchant_id)
+        return message
 
     def standard_product_code(self, product):
         """
@@ -525,10 +534,11 @@ class AmazonProductEpt(models.Model):
         warehouse_ids = self.get_warehouses_for_export_stock(instance)
         product_ids = self.mapped('product_id')
         amazon_products = self.ids
-        message_information = self.process_export_stock_message_info_ept(instance, product_ids.ids,
-                                                                         amazon_products, warehouse_ids)
-        if message_information:
-            self.process_amazon_export_stock_dict_ept(instance, message_information)
+        # Stock of manually selected products is always exported, even if it is unchanged.
+        builder = self.with_context(force_export_stock=True).process_export_stock_message_info_ept(
+            instance, product_ids.ids, amazon_products, warehouse_ids)
+        if builder:
+            self.process_amazon_export_stock_dict_ept(instance, builder)
         return True
 
     def get_warehouses_for_export_stock(self, instance):
@@ -565,10 +575,10 @@ class AmazonProductEpt(models.Model):
                                                                  ('fulfillment_by', '=', 'FBM'),
                                                                  ('product_id', 'in', product_ids)])
         product_ids = amazon_products.mapped('product_id')
-        message_information = self.process_export_stock_message_info_ept(instance, product_ids.ids,
-                                                                         amazon_products.ids, warehouse_ids)
-        if message_information:
-            self.process_amazon_export_stock_dict_ept(instance, message_information)
+        builder = self.process_export_stock_message_info_ept(instance, product_ids.ids,
+                                                             amazon_products.ids, warehouse_ids)
+        if builder:
+            self.process_amazon_export_stock_dict_ept(instance, builder)
         return True
 
     def process_export_stock_message_info_ept(self, instance, product_ids, amazon_products_ids,
@@ -579,52 +589,63 @@ class AmazonProductEpt(models.Model):
         :param : product_ids : This arguments relocates product listing id of odoo
         :param : amazon_products_ids : This arguments relocates product listing id of amazon
         :param : warehouse_ids : This arguments relocates warehouses of amazon
-        :return : prepare message for export stock
+        :return : feed builder with the messages for export stock
+        Only skus whose quantity or latency differ from the last values confirmed by Amazon are
+        added, unless force_export_stock is passed in context.
         """
         product_listing_stock = self.check_stock_type(instance, product_ids, warehouse_ids)
-        message_information = ''
+        builder = self.get_amazon_feed_builder_ept(instance, 'Inventory')
         if product_listing_stock:
-            message_id = 1
-            for amazon_product_id in amazon_products_ids:
-                amazon_product = self.browse(amazon_product_id)
+            # Browse all products at once, so the amazon and odoo product fields are prefetched
+            # in one pass instead of one query per product.
+            amazon_products = self.browse(amazon_products_ids)
+            ledger_dict = {}
+            if not self._context.get('force_export_stock', False):
+                ledger_dict = self.env[AMAZON_STOCK_EXPORT_LEDGER_EPT].get_stock_ledger_dict_ept(
+                    instance, amazon_products.mapped('seller_sku'))
+            for amazon_product in amazon_products:
                 stock = product_listing_stock.get(amazon_product.product_id.id)
-                message_information = self.prepare_export_stock_level_dict_operation( \
-                    amazon_product, instance, stock, message_information, message_id)
-                message_id += 1
-        return message_information
-
-    def process_amazon_export_stock_dict_ept(self, instance, message_information):
-        """
-        This method will prepare the message information
-        """
-        merchant_string = "<MerchantIdentifier>%s</MerchantIdentifier>" % (instance.merchant_id)
-        data = """<?xml version="1.0" encoding="utf-8"?><AmazonEnvelope xmlns:xsi=
-        "http://www.w3.org/2001/XMLSchema-instance" xsi:noNamespaceSchemaLocation="amzn-envelope.xsd">
-        <Header><DocumentVersion>1.01</DocumentVersion>""" + merchant_string + """</Header>
-        <MessageType>Inventory</MessageType>""" + message_information + """</AmazonEnvelope>"""
-        kwargs = self.get_amazon_product_request_data_ept(instance, data, 'export_stock_levels_v13')
-        kwargs.update({'marketplaceids': [instance.market_place_id]})
-        response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
-        self.process_amazon_export_stock_response_ept(instance, data, response)
+                stock, latency = self.get_export_stock_values_ept(amazon_product, instance, stock)
+                if ledger_dict.get(amazon_product.seller_sku) == (stock, latency):
+                    continue
+                self.prepare_export_stock_level_dict_operation(amazon_product, stock, latency, builder)
+        return builder
+
+    def process_amazon_export_stock_dict_ept(self, instance, builder):
+        """
+        This method will submit the inventory feeds prepared in the builder, one feed
+        submission per split envelope.
+        """
+        ledger_obj = self.env[AMAZON_STOCK_EXPORT_LEDGER_EPT]
+        feeds = builder.get_feeds()
+        for feed in feeds:
+            response = self.submit_amazon_feed_ept(instance, feed['data'], 'export_stock_levels_v13')
+            feed_history = self.process_amazon_export_stock_response_ept(instance, feed['data'], response)
+            if feed_history:
+                ledger_obj.register_pending_feed_ept(instance, feed_history, feed['keys'])
+            if len(feeds) > 1:
+                self._cr.commit()
         return True
 
     def process_amazon_export_stock_response_ept(self, instance, data, response):
         """
         Define method for process Amazon response from exported products stock and
         create feed history.
+        :return: feed.submission.history() record created for the feed
         """
         amazon_process_job_log_obj = self.env['common.log.book.ept']
         amazon_feed_submit_history = self.env[FEED_SUBMISSION_HISTORY]
+        feed_history = amazon_feed_submit_history
 
         if response.get('reason', False):
-            amazon_process_job_log_obj.create({
+            job = amazon_process_job_log_obj.create({
                 'module': 'amazon_ept',
                 'type': 'export',
                 'res_id': self.id,
                 'model_id': self.env['ir.model']._get(AMAZON_PRODUCT_EPT).id,
                 'active': True,
-                'log_lines': [(0, 0, {'message': response.get('reason', {})})]
             })
+            job.add_log_line_ept({'message': response.get('reason', {})})
         else:
             result = response.get('result', {})
             seller_id = self._context.get('seller_id', False) or instance.seller_id
@@ -634,10 +655,10 @@ class AmazonProductEpt(models.Model):
                 vals = {'message': data, 'feed_result_id': last_feed_submission_id,
                         'feed_submit_date': time.strftime(DATE_YMDHMS),
                         'instance_id': instance.id, 'user_id': self._uid,
-                        'feed_type': 'export_stock',
+                        'feed_type': 'export_stock', 'result_state': 'pending',
                         'seller_id': instance.seller_id.id}
-                amazon_feed_submit_history.create(vals)
-        return True
+                feed_history = amazon_feed_submit_history.create(vals)
+        return feed_history
 
     def check_stock_type(self, instance, product_ids, warehouse_ids):
         """
@@ -658,19 +679,14 @@ class AmazonProductEpt(models.Model):
                 product_listing_stock = prod_obj.get_forecasted_qty_ept(warehouses, product_ids)
         return product_listing_stock
 
-    def prepare_export_stock_level_dict_operation(self, amazon_product, instance, actual_stock,
-                                                  message_information, message_id):
-
+    def get_export_stock_values_ept(self, amazon_product, instance, actual_stock):
         """
-        This Method relocates prepare envelope of export stock value.
+        This Method relocates calculate the quantity and fulfillment latency to export for product.
         :param amazon_product: This arguments relocates product of amazon.
         :param instance: This arguments relocates instance of amazon.
         :param actual_stock : stock
-        :param message_information: This arguments relocates message information.
-        :param message_id: This arguments relocates message id of amazon envelope.
-        :return: This method return message envelope for amazon.
+        :return: tuple (quantity, fulfillment latency)
         """
-        seller_sku = html.escape(amazon_product['seller_sku'])
         stock = self.stock_ept_calculation(actual_stock,
                                            amazon_product['fix_stock_type'],
                                            amazon_product['fix_stock_value'])
@@ -682,11 +698,25 @@ class AmazonProductEpt(models.Model):
         stock = 0 if int(stock) < 1 else int(stock)
         fullfillment_latency = amazon_product.product_id.sale_delay or amazon_product['fulfillment_latency'] or \
                                instance.seller_id.fulfillment_latency
-        message_information += """<Message><MessageID>%s</MessageID>
-        <OperationType>Update</OperationType>
-        <Inventory><SKU>%s</SKU><Quantity>%s</Quantity><FulfillmentLatency>%s</FulfillmentLatency></Inventory>
-        </Message>""" % (message_id, seller_sku, stock, int(fullfillment_latency))
-        return message_information
+        return stock, int(fullfillment_latency)
+
+    def prepare_export_stock_level_dict_operation(self, amazon_product, stock, fulfillment_latency,
+                                                  builder):
+
+        """
+        This Method relocates prepare envelope of export stock value.
+        :param amazon_product: This arguments relocates product of amazon.
+        :param stock : quantity to export
+        :param fulfillment_latency : fulfillment latency to export
+        :param builder: This arguments relocates feed builder of amazon envelope.
+        :return: True
+        """
+        seller_sku = amazon_product['seller_sku']
+        builder.add_message([('Inventory', [('SKU', seller_sku),
+                                            ('Quantity', stock),
+                                            ('FulfillmentLatency', fulfillment_latency)])],
+                            'Update', key=(seller_sku, stock, fulfillment_latency))
+        return True
 
     def stock_ept_calculation(self, actual_stock, fix_stock_type=False, fix_stock_value=0):
         """
@@ -718,27 +748,18 @@ class AmazonProductEpt(models.Model):
         :param instance: This arguments relocates instance of amazon.
         :return:This Method return boolean(True/False).
         """
-        message_id = 1
-        message_information = ''
-        merchant_string = "<MerchantIdentifier>%s</MerchantIdentifier>" % instance.merchant_id
-        message_type = """<MessageType>Price</MessageType>"""
+        builder = self.get_amazon_feed_builder_ept(instance, 'Price')
         for amazon_products in self:
-            message_information = self.update_price_dict(instance, amazon_products,
-                                                         message_information, message_id)
-            message_id += 1
-        if message_information:
-            data = """<?xml version="1.0" encoding="utf-8"?><AmazonEnvelope xmlns:xsi=
-            "http://www.w3.org/2001/XMLSchema-instance" xsi:noNamespaceSchemaLocation="amzn-envelope.xsd">
-            <Header><DocumentVersion>1.01</DocumentVersion>""" + merchant_string + """
-            </Header>""" + message_type + """""" + message_information + """</AmazonEnvelope>"""
-            kwargs = self.get_amazon_product_request_data_ept(instance, data,
-                                                              'update_price_v13')
-            kwargs.update({'marketplaceids': [instance.market_place_id]})
-            response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
+            self.update_price_dict(instance, amazon_products, builder)
+        feeds = builder.get_feeds()
+        for feed in feeds:
+            response = self.submit_amazon_feed_ept(instance, feed['data'], 'update_price_v13')
             if response.get('reason', False):
                 raise UserError(_(response.get('reason', {})))
             results = response.get('result', {})
-            self.process_amazon_update_price_result(instance, data, results)
+            self.browse(feed['keys']).process_amazon_update_price_result(instance, feed['data'], results)
+            if len(feeds) > 1:
+                self._cr.commit()
         return True
 
     def process_amazon_update_price_result(self, instance, data, results):
@@ -761,24 +782,21 @@ class AmazonProductEpt(models.Model):
             amazon_feed_submit_history.create(vals)
         return True
 
-    def update_price_dict(self, instance, amazon_product, message_information, message_id):
+    def update_price_dict(self, instance, amazon_product, builder):
         """
-        This Method relocates Prepare price dictionary for amazon.
+        This Method relocates Prepare price message for amazon.
         :param instance: This arguments relocates instance of amazon.
         :param amazon_product: This arguments relocates product listing of amazon.
-        :param message_information: This arguments prepare message envelope of amazon.
-        :param message_id: This arguments relocates message of amazon.
-        :return:This Method return envelope message of amazon.
+        :param builder: This arguments relocates feed builder of amazon envelope.
+        :return:True
         """
         price = instance.pricelist_id.get_product_price_ept(amazon_product.product_id)
         price = price and round(price, 2) or 0.0
-        seller_sku = html.escape(amazon_product.seller_sku)
-        price_string = """<Message><MessageID>%(message_id)s</MessageID><Price><SKU>%(sku)s</SKU>
-        <StandardPrice currency="%(currency)s">%(price)s</StandardPrice></Price></Message>"""
-        price_string = price_string % {'currency': instance.pricelist_id.currency_id.name,
-                                       'message_id': message_id, 'sku': seller_sku, 'price': price}
-        message_information += price_string
-        return message_information
+        builder.add_message([('Price', [('SKU', amazon_product.seller_sku),
+                                        ('StandardPrice', price,
+                                         {'currency': instance.pricelist_id.currency_id.name})])],
+                            key=amazon_product.id)
+        return True
 
     def update_images(self, instance):
         """
@@ -786,31 +804,22 @@ class AmazonProductEpt(models.Model):
         :param instance: This arguments relocates instance of amazon.
         :return: This Method return boolean(True/False).
         """
-        message_id = 1
-        merchant_string = "<MerchantIdentifier>%s</MerchantIdentifier> " % (instance.merchant_id)
-        message_information = ''
+        builder = self.get_amazon_feed_builder_ept(instance, 'ProductImage')
         for amazon_product in self:
             if not amazon_product.exported_to_amazon:
                 continue
             for image_obj in amazon_product.product_id.ept_image_ids:
-                message_information = self.create_image_dict(amazon_product, image_obj,
-                                                             message_information, message_id)
-                message_id += 1
-        if message_information:
-            data = """<?xml version="1.0" encoding="utf-8"?>
-            <AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" 
-            xsi:noNamespaceSchemaLocation="amzn-envelope.xsd"><Header><DocumentVersion>1.01
-            </DocumentVersion>""" + merchant_string + """</Header><MessageType>
-            ProductImage</MessageType>""" + message_information + """</AmazonEnvelope> """
-            kwargs = self.get_amazon_product_request_data_ept(instance, data, 'update_images_v13')
-            kwargs.update({'marketplaceids': [instance.market_place_id]})
-
-            response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
+                self.create_image_dict(amazon_product, image_obj, builder)
+        feeds = builder.get_feeds()
+        for feed in feeds:
+            response = self.submit_amazon_feed_ept(instance, feed['data'], 'update_images_v13')
             if response.get('reason', False):
                 raise UserError(_(response.get('reason', {})))
             results = response.get('result', {})
-            self.process_amazon_update_image_result(instance, results, data)
-
+            self.browse(set(feed['keys'])).process_amazon_update_image_result(instance, results,
+                                                                              feed['data'])
+            if len(feeds) > 1:
+                self._cr.commit()
         return True
 
     def process_amazon_update_image_result(self, instance, results, data):
@@ -832,34 +841,29 @@ class AmazonProductEpt(models.Model):
                     'feed_type': 'export_image',
                     'seller_id': instance.seller_id.id}
             feed = feed_submission_obj.create(vals)
-            amazon_process_job_log_obj.create({
+            job = amazon_process_job_log_obj.create({
                 'module': 'amazon_ept',
                 'type': 'import',
                 'res_id': self.id,
                 'model_id': self.env['ir.model']._get(AMAZON_PRODUCT_EPT).id,
                 'active': True,
-                'log_lines': [(0, 0, {'message': 'Requested Feed Id' + feed and feed.id or False})]
             })
+            job.add_log_line_ept({'message': 'Requested Feed Id %s' % feed.id})
         return True
 
-    def create_image_dict(self, amazon_product, image_obj, message_information, message_id):
+    def create_image_dict(self, amazon_product, image_obj, builder):
         """
-        This Method relocates prepare image envelope for amazon.
+        This Method relocates prepare image message for amazon.
         :param amazon_product: This arguments relocates product listing of amazon.
         :param image_obj: This arguments relocates image object of amazon.
-        :param message_information: This arguments prepare message envelope of amazon.
-        :param message_id:This arguments relocates message of amazon.
-        :return: This Method return envelope message of amazon.
+        :param builder: This arguments relocates feed builder of amazon envelope.
+        :return: True
         """
-        seller_sku = amazon_product.seller_sku
-        amazon_image_type = 'Main'
-        amazon_image_url = image_obj.url
-
-        message_information += """<Message><MessageID>%s</MessageID>
-        <OperationType>Update</OperationType>
-        <ProductImage><SKU>%s</SKU><ImageType>%s</ImageType><ImageLocation>%s</ImageLocation></ProductImage>
-        </Message>""" % (message_id, seller_sku, amazon_image_type, amazon_image_url)
-        return message_information
+        builder.add_message([('ProductImage', [('SKU', amazon_product.seller_sku),
+                                               ('ImageType', 'Main'),
+                                               ('ImageLocation', image_obj.url)])],
+                            'Update', key=amazon_product.id)
+        return True
 
     @api.model
     def _name_search(self, name, args=None, operator='ilike', limit=100, name_get_uid=None):
@@ -886,6 +890,14 @@ class ProductProduct(models.Model):
 
     is_mapped_with_amz = fields.Boolean(compute="_compute_is_amazon_mapped")
 
+    def init(self):
+        super(ProductProduct, self).init()
+        # Case insensitive indexes used to match the seller sku of the listing reports with the
+        # internal reference or barcode of the products.
+        create_index(self._cr, 'product_product_lower_default_code_index', self._table,
+                     ['lower(default_code)'])
+        create_index(self._cr, 'product_product_lower_barcode_index', self._table, ['lower(barcode)'])
+
     def _compute_is_amazon_mapped(self):
         """
         Define method which help to map odoo products with amazon products..
@@ -23,6 +23,7 @@ RATING_REPORT_HISTORY = 'rating.report.history'
 AMZ_SHIPPING_REPORT_REQUEST_HISTORY = 'shipping.report.request.history'
 DATE_YMDHMS = "%Y-%m-%d %H:%M:%S"
 DATE_YMDTHMS = "%Y-%m-%dT%H:%M:%S"
+RATING_DATE_FORMATS = ('%m/%d/%y', '%d/%m/%y')
 
 
 class RatingReportHistory(models.Model):
@@ -31,7 +32,8 @@ class RatingReportHistory(models.Model):
     """
     _name = "rating.report.history"
     _description = "Rating Report History"
-    _inherit = ['mail.thread', 'amazon.reports']
+    _inherit = ['mail.thread', 'amazon.reports', 'amazon.report.lifecycle.ept']
+    _amz_lifecycle_cron = 'amazon_ept.ir_cron_process_rating_request_report_seller_%d'
     _order = 'id desc'
 
     @api.depends('seller_id')
@@ -166,6 +168,7 @@ class RatingReportHistory(models.Model):
                                          'requested_date': time.strftime(DATE_YMDHMS)
                                          })
             rating_report.with_context(is_auto_process=True).request_report()
+            rating_report.amz_schedule_status_check_ept()
             seller.write({'rating_report_last_sync_on': date_end})
         return True
 
@@ -179,19 +182,15 @@ class RatingReportHistory(models.Model):
         seller_id = args.get('seller_id', False)
         if seller_id:
             seller = self.env[AMZ_SELLER_EPT].browse(seller_id)
-            rating_report = self.search([('seller_id', '=', seller.id),
-                                         ('state', 'in', ['_SUBMITTED_', '_IN_PROGRESS_', '_DONE_'])])
-
-            for report in rating_report:
-                if report.state != '_DONE_':
-                    report.with_context(is_auto_process=True).get_report_request_list()
-                if report.report_id and report.state == '_DONE_' and not report.attachment_id:
-                    report.with_context(is_auto_process=True).get_report()
-                if report.attachment_id:
-                    report.with_context(is_auto_process=True).process_rating_report()
-                self._cr.commit()
+            self.amz_run_report_lifecycle_ept(seller)
         return True
 
+    def amz_process_report_file_ept(self):
+        """
+        Process the downloaded rating report.
+        """
+        return self.process_rating_report()
+
     def list_of_rating(self):
         """
         This Method relocate list of amazon rating.
@@ -245,13 +244,14 @@ class RatingReportHistory(models.Model):
     def process_rating_report(self):
         """
         This Method process rating report.
+        The orders and existing ratings of all the rows are searched once and the new ratings
+        are created with one multi-row create.
         :return:This Method return boolean(True/False).
         """
         self.ensure_one()
         self.check_rating_report_configuration_ept()
         amazon_process_job_log_obj = self.env[COMMON_LOG_BOOK_EPT]
         common_log_line_obj = self.env[COMMON_LOG_LINES_EPT]
-        sale_order_obj = self.env[SALE_ORDER]
         rating_obj = self.env[RATING_RATING]
         ir_model = self.env[IR_MODEL]
         imp_file = StringIO(base64.b64decode(self.attachment_id.datas).decode())
@@ -260,42 +260,94 @@ class RatingReportHistory(models.Model):
         ir_model = ir_model.search([('model', '=', SALE_ORDER)])
         job = amazon_process_job_log_obj.amazon_search_or_create_transaction_log('import', model_id, self.id)
         message = 'Import Rating Report Process'
-        common_log_line_obj.create_log_lines(message, model_id, self, job)
-        for row in reader:
+        common_log_line_obj.buffer_log_line_ept(message, model_id, self, job)
+        rows = list(reader)
+        sale_order_dict = self.get_rating_report_orders_ept([row.get('Order ID', '') for row in rows])
+        rated_order_ids = self.get_rated_order_ids_ept(list({order.id for order in sale_order_dict.values()}))
+        rating_vals_list = []
+        log_line_vals = []
+        for row in rows:
             amz_order_id = row.get('Order ID', '')
             amz_rating_value = row.get('Rating', '')
-            amz_rating_comment = row.get('Comments', '')
-            amz_your_response = row.get('Your Response', '')
-            amz_rating_date = row.get('Date', '')
-            try:
-                amz_rating_date = datetime.strptime(amz_rating_date, '%m/%d/%y')
-            except Exception:
-                amz_rating_date = datetime.strptime(amz_rating_date, '%d/%m/%y')
-            amazon_sale_order = sale_order_obj.search(
-                [('amz_order_reference', '=', amz_order_id),
-                 ('amz_instance_id', 'in', self.seller_id.instance_ids.ids)])
+            amazon_sale_order = sale_order_dict.get(amz_order_id)
             if not amazon_sale_order:
                 message = 'This Order %s does not exist in odoo' % (amz_order_id)
-                common_log_line_obj.create_log_lines(message, False, False, job, False, amz_order_id, False)
+                log_line_vals.append(self.prepare_rating_log_line_vals_ept(message, job, amz_order_id))
                 continue
-            amazon_order_rating = rating_obj.search(
-                [('res_model', '=', SALE_ORDER), ('res_id', '=', amazon_sale_order.id)])
-            if not amazon_order_rating:
-                rating_obj.create({
-                    'rating': float(amz_rating_value) if amz_rating_value is not None else False,
-                    'feedback': amz_rating_comment,
-                    'res_model_id': ir_model.id,
-                    'res_id': amazon_sale_order.id,
-                    'consumed': True,
-                    'partner_id': amazon_sale_order.partner_id.id,
-                    'amz_instance_id': amazon_sale_order.amz_instance_id.id,
-                    'amz_fulfillment_by': amazon_sale_order.amz_fulfillment_by,
-                    'amz_rating_report_id': self.id,
-                    'publisher_comment': amz_your_response,
-                    'amz_rating_submitted_date': amz_rating_date
-                })
-            else:
+            if amazon_sale_order.id in rated_order_ids:
                 message = 'For This Order %s rating already exist in odoo' % amz_order_id
-                common_log_line_obj.create_log_lines(message, False, False, job, False, amz_order_id, False)
+                log_line_vals.append(self.prepare_rating_log_line_vals_ept(message, job, amz_order_id))
+                continue
+            rated_order_ids.add(amazon_sale_order.id)
+            rating_vals_list.append({
+                'rating': float(amz_rating_value) if amz_rating_value is not None else False,
+                'feedback': row.get('Comments', ''),
+                'res_model_id': ir_model.id,
+                'res_id': amazon_sale_order.id,
+                'consumed': True,
+                'partner_id': amazon_sale_order.partner_id.id,
+                'amz_instance_id': amazon_sale_order.amz_instance_id.id,
+                'amz_fulfillment_by': amazon_sale_order.amz_fulfillment_by,
+                'amz_rating_report_id': self.id,
+                'publisher_comment': row.get('Your Response', ''),
+                'amz_rating_submitted_date': self.parse_rating_date_ept(row.get('Date', ''))
+            })
+        if rating_vals_list:
+            rating_obj.create(rating_vals_list)
+        if log_line_vals:
+            common_log_line_obj.buffer_log_lines_ept(log_line_vals)
         self.write({'state': 'processed'})
         return True
+
+    def get_rating_report_orders_ept(self, amz_order_refs):
+        """
+        This Method search the sale orders of the seller for all the amazon order references at once.
+        :param amz_order_refs: list of amazon order reference
+        :return: dict {amazon order reference: sale.order()}
+        """
+        sale_orders = self.env[SALE_ORDER].search(
+            [('amz_order_reference', 'in', list(set(amz_order_refs))),
+             ('amz_instance_id', 'in', self.seller_id.instance_ids.ids)], order='id')
+        sale_order_dict = {}
+        for sale_order in sale_orders:
+            sale_order_dict.setdefault(sale_order.amz_order_reference, sale_order)
+        return sale_order_dict
+
+    def get_rated_order_ids_ept(self, order_ids):
+        """
+        This Method return the sale orders which already have a rating.
+        :param order_ids: list of sale order ids
+        :return: set of sale order ids
+        """
+        if not order_ids:
+            return set()
+        ratings = self.env[RATING_RATING].search_read(
+            [('res_model', '=', SALE_ORDER), ('res_id', 'in', order_ids)], ['res_id'])
+        return {rating['res_id'] for rating in ratings}
+
+    @staticmethod
+    def parse_rating_date_ept(rating_date):
+        """
+        This Method parse the rating date. The formats are always tried in the order of
+        RATING_DATE_FORMATS, so an ambiguous date is read the same way in every row.
+        :param rating_date: str
+        :return: datetime
+        """
+        for date_format in RATING_DATE_FORMATS[:-1]:
+            try:
+                return datetime.strptime(rating_date, date_format)
+            except ValueError:
+                continue
+        return datetime.strptime(rating_date, RATING_DATE_FORMATS[-1])
+
+    @staticmethod
+    def prepare_rating_log_line_vals_ept(message, job, amz_order_id):
+        """
+        This Method prepare the values of rating report log line.
+        :param message: str
+        :param job: common.log.book.ept()
+        :param amz_order_id: amazon order reference
+        :return: dict {}
+        """
+        return {'message': message, 'model_id': False, 'res_id': False, 'log_book_id': job.id,
+                'default_code': False, 'order_ref': amz_order_id, 'product_id': False}
@@ -219,7 +219,7 @@ class RemovalOrder(models.Model):
         model_id = self.env['ir.model']._get('amazon.removal.order.ept').id
         job = amazon_process_job_log_obj.amazon_search_or_create_transaction_log('import', model_id, self.id)
         message = 'Removal order Process '
-        common_log_line_obj.create_log_lines(message, model_id, self, job)
+        common_log_line_obj.buffer_log_line_ept(message, model_id, self, job)
         ctx.update({'job_id': job})
 
         self.check_validate_fields()
@@ -297,7 +297,7 @@ class RemovalOrder(models.Model):
             if not self._context.get('is_auto_process', False):
                 raise UserError(_(message))
             job = self._context.get('job_id', False)
-            job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
+            job.add_log_line_ept({'message': message, 'mismatch_details': True})
 
         picking_type_id = config.picking_type_id.id
         dest_location_id = config.location_id.id
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# See LICENSE file for full copyright and licensing details.
+
+"""
+Helpers to run several IAP requests concurrently while respecting the Amazon restore rates.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_NO_PARAMS = object()
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket. ``rate`` tokens are restored per second up to ``burst`` tokens,
+    which is how Amazon throttles its operations (restore rate and maximum request quota).
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate if rate and rate > 0 else 1.0
+        self.burst = burst if burst and burst > 0 else 1
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take one token, waiting until it is restored when the bucket is empty.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def iter_throttled_requests(params_list, request_method, max_workers=4, bucket=None):
+    """
+    Call request_method(params) for every params of params_list with at most max_workers
+    requests in flight, taking a token of bucket before each call.
+    Results are yielded as (params, response) in the order of params_list, so the caller can
+    process them as they arrive. The request method runs in worker threads, it must not use the
+    Odoo environment or cursor.
+    """
+
+    def call(params):
+        if bucket:
+            bucket.acquire()
+        return request_method(params)
+
+    params_iter = iter(params_list)
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max(max_workers, 1))
+    try:
+        for _ in range(max(max_workers, 1)):
+            params = next(params_iter, _NO_PARAMS)
+            if params is _NO_PARAMS:
+                break
+            pending.append((params, executor.submit(call, params)))
+        while pending:
+            params, future = pending.popleft()
+            response = future.result()
+            next_params = next(params_iter, _NO_PARAMS)
+            if next_params is not _NO_PARAMS:
+                pending.append((next_params, executor.submit(call, next_params)))
+            yield params, response
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-pack
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import hashlib
 from odoo import api, models, fields
 from odoo.addons.iap.tools import iap_tools
 from ..endpoint import DEFAULT_ENDPOINT
@@ -13,6 +14,30 @@ class ResPartner(models.Model):
     _inherit = "res.partner"
 
     is_amz_customer = fields.Boolean("Is Amazon Customer?")
+    amz_address_fingerprint = fields.Char("Address Fingerprint", compute="_compute_amz_address_fingerprint",
+                                          store=True, index=True, copy=False,
+                                          help="Hash of the name and address of Amazon customer, used to "
+                                               "find an existing delivery address with one indexed lookup.")
+
+    @api.depends('is_amz_customer', 'name', 'street', 'street2', 'zip', 'city', 'country_id', 'state_id')
+    def _compute_amz_address_fingerprint(self):
+        """
+        Compute the address fingerprint of Amazon customers.
+        """
+        for partner in self:
+            partner.amz_address_fingerprint = self.get_amz_address_fingerprint_ept(
+                partner.name, partner.street, partner.street2, partner.zip, partner.city,
+                partner.country_id.id, partner.state_id.id) if partner.is_amz_customer else False
+
+    @staticmethod
+    def get_amz_address_fingerprint_ept(name, street, street2, zip_code, city, country_id, state_id):
+        """
+        Prepare the fingerprint of the name and address, the values are compared case insensitively.
+        :return: sha1 hex digest
+        """
+        values = [(value or '').strip().lower() for value in [name, street, street2, zip_code, city]]
+        values += [str(country_id or 0), str(state_id or 0)]
+        return hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
 
     @api.model
     def _search(self, args, offset=0, limit=None, order=None, count=False, access_rights_uid=None):
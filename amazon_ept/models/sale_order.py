@@ -17,6 +17,8 @@ from odoo.addons.iap.tools import iap_tools
 from odoo.exceptions import UserError
 
 from ..endpoint import DEFAULT_ENDPOINT
+from .feed_builder import AmazonFeedBuilder
+from .request_pool import iter_throttled_requests
 
 utc = pytz.utc
 _logger = logging.getLogger(__name__)
@@ -31,6 +33,8 @@ COMMON_LOG_LINES_EPT = 'common.log.lines.ept'
 DATE_YMDHMS = "%Y-%m-%d %H:%M:%S"
 DATE_YMDTHMS = "%Y-%m-%dT%H:%M:%S"
 AMAZON_INSTANCE_NOT_CONFIGURED_WARNING = "There is no any instance is configured of seller"
+FBA_PENDING_ORDER_BATCH_SIZE = 50
+TRACKING_FEED_FLUSH_INTERVAL = 300
 
 
 class SaleOrder(models.Model):
@@ -400,24 +404,22 @@ class SaleOrder(models.Model):
     def process_fba_pending_sale_order_response(self, seller, kwargs, result):
         """
         This method is used to process fba pending sale order response to create pending sale
-        order.
+        order. All the pages are collected first, so the order items of every order are fetched
+        concurrently and the draft orders are created in batches.
         """
-        self.create_amazon_pending_sales_order(seller, [result])
-        self._cr.commit()
+        list_of_wrapper = [result]
         next_token = result.get('NextToken', {}).get('value', {})
+        if next_token:
+            # We have create list of Dictwrapper now we create orders into system
+            kwargs.update({'next_token': next_token,
+                           'emipro_api': 'order_by_next_token_v13', })
 
-        # We have create list of Dictwrapper now we create orders into system
-        kwargs.update({'next_token': next_token,
-                       'emipro_api': 'order_by_next_token_v13', })
-
-        response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
-        if response.get('reason', False):
-            raise UserError(_(response.get('reason', {})))
-
-        order_by_next_token = response.get('result', {})
-        for order in order_by_next_token:
-            self.create_amazon_pending_sales_order(seller, [order])
-            self._cr.commit()
+            response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
+            if response.get('reason', False):
+                raise UserError(_(response.get('reason', {})))
+            list_of_wrapper += response.get('result', [])
+        self.create_amazon_pending_sales_order(seller, list_of_wrapper)
+        self._cr.commit()
         return True
 
     def check_amazon_fba_draft_orders(self, seller, marketplaceids, instance_ids):
@@ -466,13 +468,13 @@ class SaleOrder(models.Model):
                 date_to = datetime.now()
             date_ranges.update({date_from: date_to})
             date_from = date_from + timedelta(days=31)
+        list_of_wrapper = []
         for from_date, to_date in list(date_ranges.items()):
             min_date_str = from_date.strftime(DATE_YMDTHMS)
             created_after = min_date_str + 'Z'
-            list_of_wrapper = self.check_amazon_fba_and_fbm_cancel_order(seller, marketplaceids, created_after, 'AFN')
-            for result in list_of_wrapper:
-                self.with_context({'fulfillment_by': 'FBA'}).cancel_amazon_draft_sales_order(seller, [result])
-                self._cr.commit()
+            list_of_wrapper += self.check_amazon_fba_and_fbm_cancel_order(seller, marketplaceids, created_after, 'AFN')
+        self.with_context({'fulfillment_by': 'FBA'}).cancel_amazon_draft_sales_order(seller, list_of_wrapper)
+        self._cr.commit()
         return True
 
     def cancel_amazon_fbm_pending_sale_orders(self, seller, marketplaceids, instance_ids):
@@ -511,9 +513,8 @@ class SaleOrder(models.Model):
 
             list_of_wrapper = self.check_amazon_fba_and_fbm_cancel_order(seller, marketplaceids, updated_after_date,
                                                                          'MFN')
-            for result in list_of_wrapper:
-                self.with_context({'fulfillment_by': 'FBM'}).cancel_amazon_draft_sales_order(seller, [result])
-                self._cr.commit()
+            self.with_context({'fulfillment_by': 'FBM'}).cancel_amazon_draft_sales_order(seller, list_of_wrapper)
+            self._cr.commit()
         return True
 
     def check_amazon_fba_and_fbm_cancel_order(self, seller, marketplaceids, updated_after,
@@ -538,13 +539,15 @@ class SaleOrder(models.Model):
 
     def check_and_cancel_amazon_orders(self, seller, fulfillment_by, orders):
         """
-        This method will check and cancel amazon orders
+        This method will check and cancel amazon orders. Existing orders are searched at once and
+        all the draft orders cancelled on Amazon are cancelled with one state update.
         """
         log_book_obj = self.env[COMMON_LOG_BOOK_EPT]
         comman_log_line_obj = self.env[COMMON_LOG_LINES_EPT]
         model_id = comman_log_line_obj.get_model_id(SALE_ORDER)
         log_rec = log_book_obj.amazon_create_transaction_log('import', model_id, self.id)
         marketplace_instance_dict = {}
+        cancel_order_keys = []
         for order in orders:
             order_status = order.get('OrderStatus', {}).get('value', '')
             if order_status != 'Canceled':
@@ -558,22 +561,39 @@ class SaleOrder(models.Model):
                 instance = seller.instance_ids.filtered(
                     lambda x, marketplace_id=marketplace_id: x.market_place_id == marketplace_id)
                 marketplace_instance_dict.update({marketplace_id: instance})
-            existing_order = self.search([('amz_order_reference', '=', amazon_order_ref),
-                                          ('amz_instance_id', '=', instance.id),
-                                          ('state', '!=', 'cancel'),
-                                          ('amz_fulfillment_by', '=', fulfillment_by)])
+            if (amazon_order_ref, instance.id) not in cancel_order_keys:
+                cancel_order_keys.append((amazon_order_ref, instance.id))
+        if not cancel_order_keys:
+            log_rec.unlink()
+            return True
+        existing_orders = self.search([('amz_order_reference', 'in', [key[0] for key in cancel_order_keys]),
+                                       ('amz_instance_id', 'in', list({key[1] for key in cancel_order_keys})),
+                                       ('state', '!=', 'cancel'),
+                                       ('amz_fulfillment_by', '=', fulfillment_by)])
+        order_dict = {}
+        for existing_order in existing_orders:
+            key = (existing_order.amz_order_reference, existing_order.amz_instance_id.id)
+            order_dict[key] = order_dict.get(key, self.browse()) | existing_order
+        draft_orders = self.browse()
+        for amazon_order_ref, instance_id in cancel_order_keys:
+            existing_order = order_dict.get((amazon_order_ref, instance_id))
             if not existing_order:
                 message = 'Amazon order[%s] not Found in Odoo.' % (amazon_order_ref)
                 comman_log_line_obj.amazon_create_order_log_line(message, model_id, False, amazon_order_ref,
                                                                  False, fulfillment_by, log_rec)
                 continue
-            if existing_order and existing_order.state != 'draft':
+            if any(sale_order.state != 'draft' for sale_order in existing_order):
                 message = 'Sale order %s not in draft state, only draft order can be ' \
-                          'cancelled.' % (existing_order.name)
-                comman_log_line_obj.amazon_create_order_log_line(message, model_id, False, existing_order.name,
+                          'cancelled.' % (', '.join(existing_order.mapped('name')))
+                comman_log_line_obj.amazon_create_order_log_line(message, model_id, False,
+                                                                 ', '.join(existing_order.mapped('name')),
                                                                  False, fulfillment_by, log_rec)
                 continue
-            super(SaleOrder, existing_order).action_cancel()
+            draft_orders |= existing_order
+        if draft_orders:
+            super(SaleOrder, draft_orders).action_cancel()
+        if not log_rec.log_lines:
+            log_rec.unlink()
         return True
 
     def cancel_amazon_draft_sales_order(self, seller, list_of_wrapper):
@@ -588,13 +608,13 @@ class SaleOrder(models.Model):
         """
         ctx = self._context.copy() or {}
         fulfillment_by = ctx.get('fulfillment_by', '')
+        orders = []
         for wrapper_obj in list_of_wrapper:
-            orders = []
             if not isinstance(wrapper_obj.get('Orders', {}).get('Order', []), list):
                 orders.append(wrapper_obj.get('Orders', {}).get('Order', {}))
             else:
-                orders = wrapper_obj.get('Orders', {}).get('Order', [])
-            self.check_and_cancel_amazon_orders(seller, fulfillment_by, orders)
+                orders += wrapper_obj.get('Orders', {}).get('Order', [])
+        self.check_and_cancel_amazon_orders(seller, fulfillment_by, orders)
         return True
 
     @staticmethod
@@ -638,7 +658,9 @@ class SaleOrder(models.Model):
 
     def create_amazon_pending_sales_order(self, seller, list_of_wrapper):
         """
-        This Function Create Amazon Pending Orders with Draft state into ERP System
+        This Function Create Amazon Pending Orders with Draft state into ERP System.
+        Order items are fetched concurrently as per the throttling of seller and the draft orders
+        are created in batches of amz_pending_order_batch_size orders.
         :param seller: amazon.seller.ept()
         :param list_of_wrapper:
         :return:
@@ -649,6 +671,7 @@ class SaleOrder(models.Model):
         marketplace_instance_dict = {}
         amazon_order_list = []
         product_details = {}
+        order_requests = []
         model_id = comman_log_line_obj.get_model_id(AMZ_SHIPPING_REPORT_REQUEST_HISTORY)
         log_rec = log_book_obj.amazon_create_transaction_log('import', model_id, self.id)
         for wrapper_obj in list_of_wrapper:
@@ -666,23 +689,53 @@ class SaleOrder(models.Model):
                     comman_log_line_obj.amazon_create_order_log_line(message, model_id, False, amazon_order_ref,
                                                                      False, 'FBA', log_rec)
                     continue
+                order_requests.append((instance, order, amazon_order_ref))
+
+        existing_orders = self.get_existing_fba_pending_orders_ept(order_requests)
+        new_order_requests = []
+        for instance, order, amazon_order_ref in order_requests:
+            existing_order_name = existing_orders.get((amazon_order_ref, instance.id))
+            if existing_order_name:
+                message = 'Order %s Already Exist in Odoo.' % (existing_order_name)
+                comman_log_line_obj.amazon_create_order_log_line(message, model_id, self.id, amazon_order_ref,
+                                                                 False, 'FBA', log_rec)
+                continue
+            existing_orders[(amazon_order_ref, instance.id)] = amazon_order_ref
+            new_order_requests.append((instance, order, amazon_order_ref))
 
-                existing_order = self.search([('amz_order_reference', '=', amazon_order_ref),
-                                              ('amz_instance_id', '=', instance.id),
-                                              ('amz_fulfillment_by', '=', 'FBA')])
-                if existing_order:
-                    message = 'Order %s Already Exist in Odoo.' % (existing_order.name)
-                    comman_log_line_obj.amazon_create_order_log_line(message, model_id, self.id, amazon_order_ref,
-                                                                     False, 'FBA', log_rec)
-                    continue
-
-                self.request_fba_pending_sale_order_and_process_ept(seller, instance, order, product_details,
-                                                                    amazon_order_list, log_rec)
+        batch_size = seller.amz_pending_order_batch_size or FBA_PENDING_ORDER_BATCH_SIZE
+        pending_orders = []
+        for (instance, order, _ref), response in self.fetch_amazon_order_items_ept(seller, new_order_requests):
+            if response.get('reason', False):
+                raise UserError(_(response.get('reason', {})))
+            self.request_fba_pending_sale_order_and_process_ept(instance, order, response.get('result', {}),
+                                                                product_details, pending_orders, log_rec)
+            if len(pending_orders) >= batch_size:
+                amazon_order_list += self.create_fba_pending_order_batch_ept(pending_orders, product_details)
+                pending_orders = []
+                self._cr.commit()
+        if pending_orders:
+            amazon_order_list += self.create_fba_pending_order_batch_ept(pending_orders, product_details)
         seller.fba_pending_order_last_sync_on = datetime.now()
         if not log_rec.log_lines:
             log_rec.unlink()
         return amazon_order_list
 
+    def get_existing_fba_pending_orders_ept(self, order_requests):
+        """
+        This method search the FBA orders which are already imported for the order requests.
+        :param order_requests: list of tuple (instance, order, amazon order reference)
+        :return: dict {(amazon order reference, instance id): order name}
+        """
+        if not order_requests:
+            return {}
+        existing_orders = self.search_read(
+            [('amz_order_reference', 'in', list({request[2] for request in order_requests})),
+             ('amz_instance_id', 'in', list({request[0].id for request in order_requests})),
+             ('amz_fulfillment_by', '=', 'FBA')], ['name', 'amz_order_reference', 'amz_instance_id'])
+        return {(existing_order['amz_order_reference'], existing_order['amz_instance_id'][0]): existing_order['name']
+                for existing_order in existing_orders if existing_order['amz_instance_id']}
+
     @staticmethod
     def check_amazon_order_vals_ept(seller, order, marketplace_instance_dict):
         """
@@ -703,27 +756,20 @@ class SaleOrder(models.Model):
                 return message, instance
         return message, instance
 
-    def request_fba_pending_sale_order_and_process_ept(self, seller, instance, order,
-                                                       product_details, amazon_order_list, log_rec):
+    def request_fba_pending_sale_order_and_process_ept(self, instance, order, list_of_orderlines_wrapper,
+                                                       product_details, pending_orders, log_rec):
         """
-        This method will request for FBA pending sale order process the response to create
-        sale order and sale order line.
+        This method will process the order items response of FBA pending sale order, find or
+        create the products and add the order to pending_orders to create it with the next batch.
+        :param instance: amazon.instance.ept()
+        :param order: order dict
+        :param list_of_orderlines_wrapper: order items response
+        :param product_details: dict {(seller sku, instance id): product.product()}
+        :param pending_orders: list of tuple (instance, order, order lines)
+        :param log_rec: common.log.book.ept()
+        :return: True
         """
-        sale_order_line_obj = self.env['sale.order.line']
-
-        # default_fba_partner_id fetched according to seller wise
         amazon_order_ref = order.get('AmazonOrderId', {}).get('value', False)
-        partner_dict = self.fba_pending_order_partner_dict(instance)
-
-        kwargs = self.prepare_amazon_request_report_kwargs(seller, 'create_Sale_order_v13')
-        kwargs.update({'amazon_order_ref': amazon_order_ref})
-
-        response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
-        if response.get('reason', False):
-            raise UserError(_(response.get('reason', {})))
-
-        list_of_orderlines_wrapper = response.get('result', {})
-        amazon_order = False
         skip_order = False
         order_lines = []
         for order_line_wrapper_obj in list_of_orderlines_wrapper:
@@ -741,16 +787,41 @@ class SaleOrder(models.Model):
                     break
 
         if not skip_order:
-            if not amazon_order:
-                order_vals = self.create_amazon_sales_order_vals(partner_dict, order, instance)
-                amazon_order = self.create(order_vals)
-                amazon_order_list.append(amazon_order)
+            pending_orders.append((instance, order, order_lines))
+        return True
 
+    def create_fba_pending_order_batch_ept(self, pending_orders, product_details):
+        """
+        This method create the draft FBA orders of the batch with one create and their order
+        lines with another one.
+        :param pending_orders: list of tuple (instance, order, order lines)
+        :param product_details: dict {(seller sku, instance id): product.product()}
+        :return: list of sale.order()
+        """
+        sale_order_line_obj = self.env['sale.order.line']
+        instance_partner_dict = {}
+        order_vals_cache = {}
+        line_vals_cache = {}
+        order_vals_list = []
+        for instance, order, _order_lines in pending_orders:
+            # default_fba_partner_id fetched according to seller wise
+            if instance not in instance_partner_dict:
+                instance_partner_dict[instance] = self.fba_pending_order_partner_dict(instance)
+            order_vals_list.append(self.create_amazon_sales_order_vals(instance_partner_dict[instance], order,
+                                                                       instance, order_vals_cache))
+        amazon_orders = self.create(order_vals_list)
+
+        order_line_vals_list = []
+        for amazon_order, (instance, _order, order_lines) in zip(amazon_orders, pending_orders):
             for order_line in order_lines:
                 line_data = self.prepare_fba_pending_order_line_ept(order_line)
-                sale_order_line_obj.create_amazon_sale_order_line(amazon_order, line_data, product_details)
-            self.env.cr.commit()
-        return True
+                odoo_product = product_details.get((line_data.get('sku', ''), instance.id), False)
+                if odoo_product:
+                    order_line_vals_list.append(
+                        sale_order_line_obj.create_sale_order_line_vals_amazon(line_data, odoo_product, amazon_order,
+                                                                               line_vals_cache))
+        sale_order_line_obj.create(order_line_vals_list)
+        return list(amazon_orders)
 
     @staticmethod
     def prepare_fba_pending_order_line_ept(order_line):
@@ -1150,13 +1221,14 @@ class SaleOrder(models.Model):
             return unit_price
         return unit_price + tax
 
-    def amz_create_order_lines(self, order, instance, order_details, dict_product_details):
+    def amz_create_order_lines(self, order, instance, order_details, dict_product_details, line_vals_cache=None):
         """
         This method prepare order lines.
         :param order: order Object
         :param instance: instance object
         :param order_details: sale order line from dictionary
-        :param sale_order_line_obj: sale order line object
+        :param dict_product_details: dict {(seller sku, instance id): product.product()}
+        :param line_vals_cache: {} product wise order line defaults prepared during the run
         :return: True
         """
         taxargs = {}
@@ -1185,7 +1257,7 @@ class SaleOrder(models.Model):
             'product_uom': product and product.product_tmpl_id.uom_id.id,
             'discount': 0.0
         }
-        order_line_vals = order.order_line.create_sale_order_line_ept(line_vals)
+        order_line_vals = order.order_line.create_sale_order_line_ept(line_vals, line_vals_cache)
         order_line_vals.update({
             'amazon_order_item_id': order_details.get('OrderItemId', {}).get('value', ''),
             'line_tax_amount': item_tax,
@@ -1197,16 +1269,16 @@ class SaleOrder(models.Model):
         order.order_line.create(order_line_vals)
 
         ## Shipping Charge Line
-        self.get_fbm_shipped_order_line(instance, order, order_details)
+        self.get_fbm_shipped_order_line(instance, order, order_details, line_vals_cache)
 
         ## Shipping Charge Discount Line
-        self.get_fbm_shipped_discount_order_line(instance, order, order_details)
+        self.get_fbm_shipped_discount_order_line(instance, order, order_details, line_vals_cache)
 
         ## Promotion Discount Line
-        self.get_fbm_promotion_discount_line(instance, order, order_details)
+        self.get_fbm_promotion_discount_line(instance, order, order_details, line_vals_cache)
         return True
 
-    def get_fbm_shipped_order_line(self, instance, order, order_details):
+    def get_fbm_shipped_order_line(self, instance, order, order_details, line_vals_cache=None):
         """
         This method will prepare the values of shipped order lines and create that.
         """
@@ -1226,7 +1298,7 @@ class SaleOrder(models.Model):
                 'discount': False,
                 'is_delivery': True
             }
-            ship_line_vals = order.order_line.create_sale_order_line_ept(shipping_vals)
+            ship_line_vals = order.order_line.create_sale_order_line_ept(shipping_vals, line_vals_cache)
             ship_line_vals.update({
                 'amazon_order_item_id': order_details.get('OrderItemId', {}).get('value', False) + "_ship",
                 'amz_shipping_charge_ept': ship_total,
@@ -1257,7 +1329,7 @@ class SaleOrder(models.Model):
 
         return ship_total, shipargs
 
-    def get_fbm_shipped_discount_order_line(self, instance, order, order_details):
+    def get_fbm_shipped_discount_order_line(self, instance, order, order_details, line_vals_cache=None):
         """
         This method will prepare the FBM shipped discount order lines.
         """
@@ -1277,7 +1349,7 @@ class SaleOrder(models.Model):
 
             product_id = instance.seller_id.shipment_charge_product_id
             ship_disc_vals = self.create_fbm_shipped_chargable_order_line(order, instance, product_id, discount_price)
-            ship_disc_line_vals = order.order_line.create_sale_order_line_ept(ship_disc_vals)
+            ship_disc_line_vals = order.order_line.create_sale_order_line_ept(ship_disc_vals, line_vals_cache)
             ship_disc_line_vals.update({
                 'amz_shipping_discount_ept': discount_price,
                 'amazon_order_item_id': order_details.get('OrderItemId', {}).get(
@@ -1287,7 +1359,7 @@ class SaleOrder(models.Model):
             order.order_line.create(ship_disc_line_vals)
         return True
 
-    def get_fbm_promotion_discount_line(self, instance, order, order_details):
+    def get_fbm_promotion_discount_line(self, instance, order, order_details, line_vals_cache=None):
         """
         This method will create promotion discount lines.
         """
@@ -1301,7 +1373,7 @@ class SaleOrder(models.Model):
             discount = item_discount - discount_tax
             product_id = instance.seller_id.promotion_discount_product_id
             promo_disc_vals = self.create_fbm_shipped_chargable_order_line(order, instance, product_id, discount)
-            promo_disc_line_vals = order.order_line.create_sale_order_line_ept(promo_disc_vals)
+            promo_disc_line_vals = order.order_line.create_sale_order_line_ept(promo_disc_vals, line_vals_cache)
             promo_disc_line_vals.update({
                 'amz_promotion_discount': discount,
                 'amazon_order_item_id': order_details.get('OrderItemId', {}).get(
@@ -1358,10 +1430,17 @@ class SaleOrder(models.Model):
         """
         common_log_line_ept = self.env[COMMON_LOG_LINES_EPT]
         marketplace_instance_dict = dict()
-        request_counter = 0
+        partner_cache = dict()
+        order_vals_cache = dict()
+        line_vals_cache = dict()
         model_id = self.env[IR_MODEL]._get(SALE_ORDER).id
         seller = queue_order.amz_seller_id
         queue_lines = queue_order.shipped_order_data_queue_lines.filtered(lambda x: x.state != 'done')
+        # Queue lines without marketplace are sent with a NULL instance, they are rejected by
+        # check_amazon_order_vals_ept.
+        order_keys = [(line.order_id, line.amz_instance_id.id or None) for line in queue_lines]
+        existing_orders = set(order_keys) - set(self.filter_existing_fbm_orders_ept(order_keys))
+        order_requests = []
 
         for line in queue_lines:
             order = json.loads(line.order_data_id)
@@ -1392,27 +1471,41 @@ class SaleOrder(models.Model):
                                                                  amazon_order_ref, False, 'FBM', log_book)
                 line.state = 'failed'
                 continue
-            existing_order = self.search([('amz_order_reference', '=', amazon_order_ref),
-                                          ('amz_instance_id', '=', instance.id),
-                                          ('amz_fulfillment_by', '=', 'FBM')])
-            if existing_order:
+            if (amazon_order_ref, instance.id) in existing_orders:
                 line.state = 'done'
                 continue
-            kwargs = self.prepare_amazon_request_report_kwargs(seller, 'create_Sale_order_v13')
-            kwargs.update({'amazon_order_ref': amazon_order_ref})
-            request_counter += 1
-            if request_counter >= 25:
-                request_counter = 0
-                time.sleep(5)
-            response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
+            order_requests.append((instance, order, line, amazon_order_ref))
+
+        for (instance, order, line, _ref), response in self.fetch_amazon_order_items_ept(seller, order_requests):
             if response.get('reason', False):
                 raise UserError(_(response.get('reason', {})))
 
             list_of_shipped_order_lines = response.get('result', {})
             self.process_shipped_or_missing_unshipped_lines_ept(instance, order, line,
-                                                                list_of_shipped_order_lines, log_book)
+                                                                list_of_shipped_order_lines, log_book, partner_cache,
+                                                                order_vals_cache, line_vals_cache)
         return True
 
+    def fetch_amazon_order_items_ept(self, seller, order_requests):
+        """
+        This method fetch the order items of the orders concurrently. Requests are throttled with the
+        token bucket of seller and at most amz_concurrent_requests are in flight at the same time.
+        :param seller: amazon.seller.ept()
+        :param order_requests: list of tuple, last element of each tuple is the amazon order reference
+        :return: generator of (order request, response) in the order of order_requests
+        """
+        kwargs = self.prepare_amazon_request_report_kwargs(seller, 'create_Sale_order_v13')
+        endpoint = seller.get_fetch_endpoint_ept()
+
+        def fetch_order_items(order_request):
+            # Runs in a worker thread, only the prepared kwargs and endpoint must be used here.
+            return iap_tools.iap_jsonrpc(endpoint, params=dict(kwargs, amazon_order_ref=order_request[-1]),
+                                         timeout=1000)
+
+        return iter_throttled_requests(order_requests, fetch_order_items,
+                                       max_workers=seller.amz_concurrent_requests,
+                                       bucket=seller.get_order_item_token_bucket_ept())
+
     def get_fbm_next_token_orders(self, seller, next_token):
         """
         This method will request for amazon order by next token and return response.
@@ -1427,9 +1520,13 @@ class SaleOrder(models.Model):
         return orders
 
     def process_shipped_or_missing_unshipped_lines_ept(self, instance, order, line,
-                                                       list_of_shipped_order_lines, log_book):
+                                                       list_of_shipped_order_lines, log_book, partner_cache=None,
+                                                       order_vals_cache=None, line_vals_cache=None):
         """
         This method will process amazon shipped order lines.
+        :param partner_cache: {} partners resolved during the run, shared by all the orders.
+        :param order_vals_cache: {} partner wise order values prepared during the run.
+        :param line_vals_cache: {} product wise order line defaults prepared during the run.
         """
         common_log_line_ept = self.env[COMMON_LOG_LINES_EPT]
         model_id = self.env[IR_MODEL]._get(SALE_ORDER).id
@@ -1445,7 +1542,10 @@ class SaleOrder(models.Model):
             else:
                 order_lines = order_line_wrapper_obj.get('OrderItems', {}).get('OrderItem', [])
             sales_order, line_state = self.process_shipped_or_missing_unshipped_order_ept(instance, order, order_lines,
-                                                                                          line_state, log_book)
+                                                                                          line_state, log_book,
+                                                                                          partner_cache,
+                                                                                          order_vals_cache,
+                                                                                          line_vals_cache)
             if sales_order:
                 created_order_list.append(sales_order)
                 if order_status == 'Shipped':
@@ -1464,9 +1564,14 @@ class SaleOrder(models.Model):
                 order_counter = 0
         return True
 
-    def process_shipped_or_missing_unshipped_order_ept(self, instance, order, order_lines, line_state, log_book):
+    def process_shipped_or_missing_unshipped_order_ept(self, instance, order, order_lines, line_state, log_book,
+                                                       partner_cache=None, order_vals_cache=None,
+                                                       line_vals_cache=None):
         """
         This method will process amazon shipped orders.
+        :param partner_cache: {} partners resolved during the run, shared by all the orders.
+        :param order_vals_cache: {} partner wise order values prepared during the run.
+        :param line_vals_cache: {} product wise order line defaults prepared during the run.
         updated by Kishan Sorani on date 01-Jul-2021
         @MOD : set carrier in order vals
         """
@@ -1503,20 +1608,23 @@ class SaleOrder(models.Model):
                                           'check_vat_ept': order.get('check_vat_ept', False)})
 
                     partner = fbm_sale_order_report_obj.get_partner(customer_vals, state_dict, country_dict,
-                                                                    instance)
+                                                                    instance, partner_cache)
                 if partner:
-                    ordervals = self.create_amazon_shipped_or_unshipped_order_vals(instance, partner, order)
+                    ordervals = self.create_amazon_shipped_or_unshipped_order_vals(instance, partner, order,
+                                                                                   order_vals_cache)
                     sales_order = self.create(ordervals)
-                    self.amz_create_order_lines(sales_order, instance, order_line, dict_product_details)
+                    self.amz_create_order_lines(sales_order, instance, order_line, dict_product_details,
+                                                line_vals_cache)
                     line_state = 'done'
         return sales_order, line_state
 
-    def create_amazon_shipped_or_unshipped_order_vals(self, instance, partner, order):
+    def create_amazon_shipped_or_unshipped_order_vals(self, instance, partner, order, order_vals_cache=None):
         """
         Define method which help to create amazon shipped or unshipped orders.
         :param : instance : amazon instance
         :param : partner : amazon partner
         :param : order : amazon order details
+        :param : order_vals_cache : partner wise order values prepared during the run
         : return : sale order values dict {}
         :migration done by kishan sorani on date 28-Sep-2021
         """
@@ -1527,7 +1635,7 @@ class SaleOrder(models.Model):
         vals = self.prepare_amazon_sale_order_vals(instance, partner, order)
         # set picking policy as FBM Auto workflow picking policy
         vals.update({'picking_policy': instance.seller_id.fbm_auto_workflow_id.picking_policy})
-        ordervals = self.create_sales_order_vals_ept(vals)
+        ordervals = self.create_sales_order_vals_ept(vals, order_vals_cache)
         if not seller_id.is_default_odoo_sequence_in_sales_order:
             name = seller_id.order_prefix + amazon_order_ref if seller_id.order_prefix else amazon_order_ref
             ordervals.update({'name': name})
@@ -1558,23 +1666,52 @@ class SaleOrder(models.Model):
 
     def create_shipped_or_missing_unshipped_queue(self, datas, instance_dict, seller, data_queue):
         """
-        This method will create an shipped order queue.
+        This method will create the shipped order queue lines of one page of orders with a single
+        insert. Orders which already exist as FBM sale order of the marketplace are skipped.
+        :return: number of created queue lines
         """
-        shipped_order_data_queue_line_obj = self.env['shipped.order.data.queue.line.ept']
+        if not instance_dict:
+            instance_dict.update({instance.marketplace_id.name: instance for instance in seller.instance_ids})
+        order_vals = {}
         for data in datas:
             instance = instance_dict.get(data.get('SalesChannel', {}).get('value', ''))
-            if not instance:
-                instance = seller.mapped('instance_ids').filtered(
-                    lambda l, data=data: l.marketplace_id.name == data.get('SalesChannel', {}).get('value', ''))
-                instance_dict.update({data.get('SalesChannel', {}).get('value', ''): instance})
-            shipped_order_data_queue_line_obj.create({
-                'order_id': data.get('AmazonOrderId', {}).get('value', False),
-                'order_data_id': json.dumps(data),
-                'amz_instance_id': instance.id,
-                'last_process_date': datetime.now(),
-                'shipped_order_data_queue_id': data_queue.id
-            })
-        return True
+            order_ref = data.get('AmazonOrderId', {}).get('value', False)
+            order_vals[(order_ref, instance.id if instance else None)] = data
+        new_orders = self.filter_existing_fbm_orders_ept(list(order_vals))
+        if not new_orders:
+            return 0
+        now = datetime.now()
+        self._cr.execute("""INSERT INTO shipped_order_data_queue_line_ept
+                            (order_id, order_data_id, amz_instance_id, state, last_process_date,
+                             shipped_order_data_queue_id, create_uid, create_date, write_uid, write_date)
+                            SELECT unnest(%s::varchar[]), unnest(%s::varchar[]), unnest(%s::integer[]),
+                                   'draft', %s, %s, %s, %s, %s, %s""",
+                         ([order_ref for order_ref, _instance_id in new_orders],
+                          [json.dumps(order_vals[key]) for key in new_orders],
+                          [instance_id for _order_ref, instance_id in new_orders],
+                          now, data_queue.id, self._uid, now, self._uid, now))
+        data_queue.invalidate_cache(['shipped_order_data_queue_lines'])
+        return len(new_orders)
+
+    def filter_existing_fbm_orders_ept(self, order_keys):
+        """
+        This method removes the orders which are already imported as FBM sale orders, using one
+        anti-join query for all the orders.
+        :param order_keys: list of tuple (amazon order reference, amazon instance id or None)
+        :return: list of tuple of orders which are not imported yet, in the same order
+        """
+        if not order_keys:
+            return []
+        self._cr.execute("""SELECT o.order_ref, o.instance_id
+                            FROM unnest(%s::varchar[], %s::integer[]) AS o(order_ref, instance_id)
+                            WHERE NOT EXISTS (SELECT 1 FROM sale_order so
+                                              WHERE so.amz_order_reference = o.order_ref
+                                                AND so.amz_instance_id = o.instance_id
+                                                AND so.amz_fulfillment_by = 'FBM')""",
+                         ([order_ref for order_ref, _instance_id in order_keys],
+                          [instance_id for _order_ref, instance_id in order_keys]))
+        new_orders = set(self._cr.fetchall())
+        return [key for key in order_keys if key in new_orders]
 
     def auto_process_shipped_order_queue_line(self, data_queue):
         """
@@ -1629,26 +1766,26 @@ class SaleOrder(models.Model):
             seller, instance, updated_after_date)
         result = self.get_fbm_orders(seller, marketplaceids, orderstatus, updated_after_date)
         next_token = result.get('NextToken', {}).get('value', '')
-        data_queue = shipped_order_data_queue_obj.create({'amz_seller_id': seller.id})
         datas = result.get('Orders', {}).get('Order', [])
         if not isinstance(datas, list) and datas:
             datas = [datas]
-        if datas:
-            self.create_shipped_or_missing_unshipped_queue(datas, instance_dict, seller, data_queue)
-            self._cr.commit()
-            self.auto_process_shipped_order_queue_line(data_queue)
-            while True:
-                if not next_token:
-                    break
-                result = self.get_fbm_next_token_orders(seller, next_token)
-                datas = result.get('Orders', {}).get('Order', [])
-                next_token = result.get('NextToken', {}).get('value', '')
-                if not isinstance(datas, list) and datas:
-                    datas = [datas]
-                if datas:
-                    data_queue = shipped_order_data_queue_obj.create({'amz_seller_id': seller.id})
-                    self.create_shipped_or_missing_unshipped_queue(datas, instance_dict, seller, data_queue)
-                    self._cr.commit()
+        is_cron_triggered = False
+        while datas:
+            data_queue = shipped_order_data_queue_obj.create({'amz_seller_id': seller.id})
+            if self.create_shipped_or_missing_unshipped_queue(datas, instance_dict, seller, data_queue):
+                self._cr.commit()
+                if not is_cron_triggered:
+                    self.auto_process_shipped_order_queue_line(data_queue)
+                    is_cron_triggered = True
+            else:
+                data_queue.unlink()
+            if not next_token:
+                break
+            result = self.get_fbm_next_token_orders(seller, next_token)
+            datas = result.get('Orders', {}).get('Order', [])
+            next_token = result.get('NextToken', {}).get('value', '')
+            if not isinstance(datas, list) and datas:
+                datas = [datas]
         return True
 
     @staticmethod
@@ -1673,13 +1810,14 @@ class SaleOrder(models.Model):
             'is_prime_order': is_prime_order
         }
 
-    def create_amazon_sales_order_vals(self, partner_dict, order, instance):
+    def create_amazon_sales_order_vals(self, partner_dict, order, instance, order_vals_cache=None):
         """
         This function Creates Sale Orders values
         and pass the values to common connector library for import orders in odoo
         :param partner_dict: {}
         :param order: {}
         :param instance: amazon.instance.ept()
+        :param order_vals_cache: {} partner wise order values shared by the orders of the batch
         :return: {}
         """
 
@@ -1689,7 +1827,7 @@ class SaleOrder(models.Model):
         # set picking policy as FBA Auto workflow picking policy
         vals.update({'picking_policy': instance.seller_id.fba_auto_workflow_id.picking_policy})
         # Create Sale Orders from Common Connector library
-        ordervals = sale_order_obj.create_sales_order_vals_ept(vals)
+        ordervals = sale_order_obj.create_sales_order_vals_ept(vals, order_vals_cache)
         # Prepare Sale Order values for update
         sale_order_values = self.prepare_sale_order_update_values(instance, order)
         sale_order_values.update({'is_fba_pending_order': True})
@@ -1823,6 +1961,9 @@ class SaleOrder(models.Model):
     def amz_update_tracking_number(self, seller):
         """
         Check If Order already shipped in the amazon then we will skip that all orders and set update_into_amazon=True
+        The fulfillment messages are streamed into the feed builder while the unshipped orders are
+        read page by page, a feed is submitted as soon as it reaches the message or size limit of
+        seller, or when the pending messages are older than TRACKING_FEED_FLUSH_INTERVAL seconds.
         :param seller: amazon.seller.ept()
         :return: True
         @author: Keyur Kanani
@@ -1830,25 +1971,53 @@ class SaleOrder(models.Model):
         marketplaceids = seller.instance_ids.mapped(lambda l: l.marketplace_id.market_place_id)
         if not marketplaceids:
             raise UserError(_(AMAZON_INSTANCE_NOT_CONFIGURED_WARNING + " %s" % (seller.name)))
+        builder = self.get_amazon_tracking_feed_builder_ept(seller)
+        last_flush = time.monotonic()
         next_token = {}
         flag = True
         while next_token or flag:
             amazon_orders, next_token = self.check_already_status_updated_in_amazon(seller, marketplaceids,
                                                                                     seller.instance_ids, next_token)
             flag = False
-            if not amazon_orders:
-                continue
-            message_information, shipment_pickings = self.get_amz_message_information_ept(amazon_orders)
-            if not message_information:
-                continue
-            data = self.create_data(message_information, str(seller.merchant_id))
+            if amazon_orders:
+                self.get_amz_message_information_ept(amazon_orders, builder)
+            flush_pending = time.monotonic() - last_flush >= TRACKING_FEED_FLUSH_INTERVAL
+            if flush_pending:
+                last_flush = time.monotonic()
+            self.submit_amazon_tracking_feeds_ept(seller, marketplaceids, builder.pop_feeds(close=flush_pending))
+        self.submit_amazon_tracking_feeds_ept(seller, marketplaceids, builder.pop_feeds(close=True))
+        return True
+
+    @staticmethod
+    def get_amazon_tracking_feed_builder_ept(seller):
+        """
+        Define method which prepare the streamed feed builder of the order fulfillment feed using
+        the feed limits of the seller.
+        :param seller: amazon.seller.ept()
+        :return: AmazonFeedBuilder
+        """
+        return AmazonFeedBuilder(str(seller.merchant_id), 'OrderFulfillment',
+                                 max_messages=seller.feed_max_messages,
+                                 max_size=seller.feed_max_size * 1024 * 1024)
+
+    def submit_amazon_tracking_feeds_ept(self, seller, marketplaceids, feeds):
+        """
+        Define method which submit the finished order fulfillment feeds to Amazon, every feed is
+        linked with the pickings of its messages and committed.
+        :param seller: amazon.seller.ept()
+        :param marketplaceids: list of marketplace ids
+        :param feeds: list of feeds returned by AmazonFeedBuilder
+        :return: True
+        """
+        for feed in feeds:
             kwargs = self.prepare_amazon_request_report_kwargs(seller, 'amz_update_order_status_v13')
-            kwargs.update({'data': data, 'marketplaceids': marketplaceids})
+            kwargs.update({'data': feed['data'], 'marketplaceids': marketplaceids})
             response = iap_tools.iap_jsonrpc(DEFAULT_ENDPOINT, params=kwargs, timeout=1000)
             if response.get('reason', False):
                 raise UserError(_(response.get('reason', {})))
             results = response.get('result', {})
-            self.process_amazon_update_tracking_feed_response(results, data, seller, shipment_pickings)
+            self.process_amazon_update_tracking_feed_response(results, feed['data'], seller,
+                                                              list(set(feed['keys'])))
             self._cr.commit()
         return True
 
@@ -1866,9 +2035,9 @@ class SaleOrder(models.Model):
             feed_submission_obj = self.env['feed.submission.history']
             feed_submission_id = results.get('FeedSubmissionInfo', {}).get(
                 'FeedSubmissionId', {}).get('value', False)
-            vals = {'message': data.encode('utf-8'), 'feed_result_id': feed_submission_id,
+            vals = {'message': data, 'feed_result_id': feed_submission_id,
                     'feed_submit_date': time.strftime(DATE_YMDHMS), 'user_id': self._uid,
-                    'seller_id': seller.id, 'feed_type': 'update_tracking_number'}
+                    'seller_id': seller.id, 'feed_type': 'update_tracking_number', 'result_state': 'pending'}
             feed_id = feed_submission_obj.create(vals)
             if feed_id:
                 picking_obj.browse(shipment_pickings).write({'feed_submission_id': feed_id.id})
@@ -1887,18 +2056,21 @@ class SaleOrder(models.Model):
         """"
         This method will check is picking already updated in amazon
         # Here We Take only done picking and updated in amazon false
+        Pickings of which the tracking feed is still waiting for its result are skipped as well.
         """
         if (picking.updated_in_amazon and amazon_order.picking_ids.filtered(
                 lambda l, picking=picking: l.backorder_id.id == picking.id)) or picking.state != 'done' \
                 or picking.location_dest_id.usage != 'customer':
             return True
+        if picking.feed_submission_id.result_state == 'pending':
+            return True
         return False
 
     def get_amz_ship_info_and_parcel_values(self, picking, amazon_order, fulfillment_date_concat):
         """
         This method return the ship from address and prepared parcel values.
         """
-        ship_info = ''
+        ship_info = []
         carrier_name = self.amz_get_carrier_name_ept(picking)
         tracking_no = picking.carrier_tracking_ref
         parcel = self.amz_prepare_parcel_values_ept(carrier_name, tracking_no, amazon_order, fulfillment_date_concat)
@@ -1907,17 +2079,16 @@ class SaleOrder(models.Model):
             ship_info = self.amz_get_ship_from_address_details(partner)
         return ship_info, parcel
 
-    def get_amz_message_information_ept(self, amazon_orders):
+    def get_amz_message_information_ept(self, amazon_orders, builder):
         """
         Find done pickings also find pickings location destination is customer,
-        then prepare xml details to update in amazon feed
+        then add the fulfillment messages to the feed builder, every message is keyed by its picking
+        and all the messages of a picking are added in the same feed.
         :param amazon_orders: sale.order()
-        :return: message_information, shipment_pickings
+        :param builder: AmazonFeedBuilder
+        :return: True
         @author: Keyur Kanani
         """
-        shipment_pickings = []
-        message_information = ''
-        message_id = 1
         amazon_orders = list(filter(lambda order: (order.amz_shipment_service_level_category), amazon_orders))
         for amazon_order in amazon_orders:
             for picking in amazon_order.picking_ids:
@@ -1925,54 +2096,43 @@ class SaleOrder(models.Model):
                 if is_skip:
                     continue
                 fulfillment_date_concat = self.get_shipment_fulfillment_date(picking)
-                shipment_pickings.append(picking.id)
                 # will manage multiple tracking number into the delivery order if carrier tracking ref not set into
                 # the picking
-                # manage_multi_tracking_number_in_delivery_order = False if picking.carrier_tracking_ref else True
-                # if not manage_multi_tracking_number_in_delivery_order:
                 if picking.carrier_tracking_ref:
                     ship_info, parcel = self.get_amz_ship_info_and_parcel_values(picking, amazon_order,
                                                                                  fulfillment_date_concat)
-                    message_information += self.create_parcel_for_single_tracking_number(parcel, message_id, ship_info)
-                    message_id = message_id + 1
+                    builder.add_message(self.create_parcel_for_single_tracking_number(parcel, ship_info),
+                                        'Update', key=picking.id)
                 else:
-                    # Create message for bom type products
-                    phantom_msg_info, message_id, update_move_ids = self.get_qty_for_phantom_type_products(
-                        amazon_order, picking, message_id, fulfillment_date_concat)
-                    if phantom_msg_info:
-                        message_information += phantom_msg_info
-                    # Create Message for each move
-                    message_information, message_id = self.create_message_for_multi_tracking_number_ept(
-                        picking, message_information, update_move_ids, message_id)
-        return message_information, shipment_pickings
+                    # The messages of the picking are kept in the same feed, so the picking is linked
+                    # with one feed only.
+                    with builder.message_group():
+                        # Create message for bom type products
+                        update_move_ids = self.get_qty_for_phantom_type_products(amazon_order, picking, builder,
+                                                                                 fulfillment_date_concat)
+                        # Create Message for each move
+                        self.create_message_for_multi_tracking_number_ept(picking, builder, update_move_ids)
+        return True
 
     @staticmethod
     def amz_get_ship_from_address_details(partner):
         """
-        Prepare xml data for ship from address in the update tracking numbers
+        Prepare xml elements for ship from address in the update tracking numbers
         :param partner:res.partner()
-        :return: text
+        :return: list of (tag, value) tuples
         @author: Keyur Kanani
         """
-        address = ""
+        address = [('Name', partner.name)]
         if partner.street:
-            address = """<AddressFieldOne>%s</AddressFieldOne>""" % partner.street
+            address.append(('AddressFieldOne', partner.street))
         if partner.street2:
-            address += """<AddressFieldTwo>%s</AddressFieldTwo>""" % partner.street2
-        ship_from = """<ShipFromAddress>
-            <Name>%s</Name>
-            %s
-            <City>%s</City>
-            <County>%s</County>
-            <StateOrRegion>%s</StateOrRegion>
-            <PostalCode>%s</PostalCode>
-            <CountryCode>%s</CountryCode>
-        </ShipFromAddress>""" % (partner.name, address, partner.city,
-                                 partner.country_id.name if partner.country_id else '',
-                                 partner.state_id.code if partner.state_id else '', partner.zip,
-                                 partner.country_id.code if partner.country_id else '')
-
-        return ship_from
+            address.append(('AddressFieldTwo', partner.street2))
+        address += [('City', partner.city or ''),
+                    ('County', partner.country_id.name if partner.country_id else ''),
+                    ('StateOrRegion', partner.state_id.code if partner.state_id else ''),
+                    ('PostalCode', partner.zip or ''),
+                    ('CountryCode', partner.country_id.code if partner.country_id else '')]
+        return [('ShipFromAddress', address)]
 
     @staticmethod
     def prepare_tracking_no_dict_with_qty(move):
@@ -1991,20 +2151,19 @@ class SaleOrder(models.Model):
             tracking_no_with_qty.update({tracking_no: quantity})
         return tracking_no_with_qty
 
-    def create_message_for_multi_tracking_number_ept(self, picking, message_information, update_move_ids, message_id):
+    def create_message_for_multi_tracking_number_ept(self, picking, builder, update_move_ids):
         """
-        Prepare message for multiple tracking number pickings
-        :param picking: stock.move()
-        :param message_information: string
+        Add the messages of multiple tracking number pickings to the feed builder
+        :param picking: stock.picking()
+        :param builder: AmazonFeedBuilder
         :param update_move_ids: list[]
-        :param message_id: int
-        :return: message_information, message_id
+        :return: True
         @author: Keyur Kanani
         """
         fulfillment_date_concat = self.get_shipment_fulfillment_date(picking)
         carrier_name = self.amz_get_carrier_name_ept(picking)
         for move in picking.move_lines:
-            if move in update_move_ids or move.sale_line_id.product_id.id != move.product_id.id:
+            if move.id in update_move_ids or move.sale_line_id.product_id.id != move.product_id.id:
                 continue
             amazon_order_item_id = move.sale_line_id.amazon_order_item_id
             # Create Package for the each parcel
@@ -2015,9 +2174,9 @@ class SaleOrder(models.Model):
                 parcel = self.amz_prepare_parcel_values_ept(carrier_name, tracking_no, picking.sale_id,
                                                             fulfillment_date_concat)
                 parcel.update({'qty': product_qty, 'amazon_order_item_id': amazon_order_item_id})
-                message_information += self.create_parcel_for_multi_tracking_number(parcel, message_id, picking.sale_id)
-                message_id = message_id + 1
-        return message_information, message_id
+                builder.add_message(self.create_parcel_for_multi_tracking_number(parcel, picking.sale_id),
+                                    'Update', key=picking.id)
+        return True
 
     @staticmethod
     def amz_prepare_parcel_values_ept(carrier_name, tracking_no, amazon_order, fulfillment_date_concat):
@@ -2103,17 +2262,16 @@ class SaleOrder(models.Model):
                         move_line.result_package_id else False
         return tracking_no
 
-    def get_qty_for_phantom_type_products(self, order, picking, message_id, fulfillment_date_concat):
+    def get_qty_for_phantom_type_products(self, order, picking, builder, fulfillment_date_concat):
         """
-        Get quantity of phantom type products and prepare message information
+        Get quantity of phantom type products and add their messages to the feed builder
         :param order: sale.order()
-        :param picking: stock.move()
-        :param message_id: int
+        :param picking: stock.picking()
+        :param builder: AmazonFeedBuilder
         :param fulfillment_date_concat: date
-        :return: message_information, message_id, update_move_ids
+        :return: update_move_ids
         @author: Keyur Kanani
         """
-        message_information = ''
         move_obj = self.env['stock.move']
         update_move_ids = []
         picking_ids = order.picking_ids.ids
@@ -2132,10 +2290,10 @@ class SaleOrder(models.Model):
                     parcel = self.amz_prepare_parcel_values_ept(carrier_name, tracking_no, order,
                                                                 fulfillment_date_concat)
                     parcel.update({'qty': product_qty, 'amazon_order_item_id': sale_line_id.amazon_order_item_id})
-                    message_information += self.create_parcel_for_multi_tracking_number(parcel, message_id, order)
-                    message_id = message_id + 1
+                    builder.add_message(self.create_parcel_for_multi_tracking_number(parcel, order),
+                                        'Update', key=picking.id)
 
-        return message_information, message_id, update_move_ids
+        return update_move_ids
 
     @staticmethod
     def amz_get_sale_line_product_qty_ept(sale_line_id):
@@ -2154,97 +2312,49 @@ class SaleOrder(models.Model):
         return int(product_qty)
 
     @staticmethod
-    def create_data(message_information, merchant_id):
+    def get_parcel_fulfillment_data_ept(parcel):
         """
-        Prepare xml header data for send in amazon feed.
-        :param message_information: text
-        :param merchant_id: int
-        :return: text
-        @author: Keyur Kanani
+        Prepare FulfillmentData element of the parcel
+        :param parcel: dict{}
+        :return: tuple (tag, value)
         """
-        data = """<?xml version="1.0" encoding="utf-8"?>
-                        <AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:noNamespaceSchemaLocation="amzn-envelope.xsd">
-                            <Header>
-                                <DocumentVersion>1.01</DocumentVersion>
-                                    <MerchantIdentifier>%s</MerchantIdentifier>
-                            </Header>
-                        <MessageType>OrderFulfillment</MessageType>""" % (merchant_id) + message_information + """
-                        </AmazonEnvelope>"""
-        return data
+        if parcel.get('carrier_code', ''):
+            carrier_information = ('CarrierCode', parcel.get('carrier_code', ''))
+        else:
+            carrier_information = ('CarrierName', parcel.get('carrier_name', ''))
+        return ('FulfillmentData', [carrier_information,
+                                    ('ShippingMethod', parcel.get('shipping_level_category', '')),
+                                    ('ShipperTrackingNumber', parcel.get('tracking_no', ''))])
 
-    @staticmethod
-    def create_parcel_for_single_tracking_number(parcel, message_id, ship_info):
+    def create_parcel_for_single_tracking_number(self, parcel, ship_info):
         """
-        Prepare Parcel tracking information data for single tracking number in picking
+        Prepare Parcel tracking information message for single tracking number in picking
         :param parcel: dict{}
-        :param message_id: int
-        :return: text
+        :param ship_info: list of ship from address elements
+        :return: list of (tag, value) tuples
         @author: Keyur Kanani
         """
-        message_information = ''
-        if parcel.get('carrier_code', ''):
-            carrier_information = '''<CarrierCode>%s</CarrierCode>''' % (parcel.get('carrier_code', ''))
-        else:
-            carrier_information = '''<CarrierName>%s</CarrierName>''' % (parcel.get('carrier_name', ''))
-        message_information += """<Message>
-                                        <MessageID>%s</MessageID>
-                                        <OperationType>Update</OperationType>
-                                        <OrderFulfillment>
-                                            <AmazonOrderID>%s</AmazonOrderID>
-                                            <FulfillmentDate>%s</FulfillmentDate>
-                                            <FulfillmentData>
-                                                %s
-                                                <ShippingMethod>%s</ShippingMethod>
-                                                <ShipperTrackingNumber>%s</ShipperTrackingNumber>
-                                            </FulfillmentData>
-                                            %s
-                                        </OrderFulfillment>
-                                    </Message>""" % (str(message_id), parcel.get('order_ref', ''),
-                                                     parcel.get('fulfillment_date_concat', ''),
-                                                     carrier_information, parcel.get('shipping_level_category', ''),
-                                                     parcel.get('tracking_no', ''), ship_info)
-        return message_information
-
-    def create_parcel_for_multi_tracking_number(self, parcel, message_id, order):
-        """
-        Prepare Parcel tracking information for multiple tracking numbers of a picking
+        return [('OrderFulfillment', [('AmazonOrderID', parcel.get('order_ref', '')),
+                                      ('FulfillmentDate', parcel.get('fulfillment_date_concat', '')),
+                                      self.get_parcel_fulfillment_data_ept(parcel)] + ship_info)]
+
+    def create_parcel_for_multi_tracking_number(self, parcel, order):
+        """
+        Prepare Parcel tracking information message for multiple tracking numbers of a picking
         :param parcel: dict{}
-        :param message_id: int
-        :return: text
+        :param order: sale.order()
+        :return: list of (tag, value) tuples
         @author: Keyur Kanani
         """
-        message_information = ''
-        ship_info = ""
+        ship_info = []
         partner = order.warehouse_id.partner_id
         if partner:
             ship_info = self.amz_get_ship_from_address_details(partner)
-        if parcel.get('carrier_code', ''):
-            carrier_information = '''<CarrierCode>%s</CarrierCode>''' % (parcel.get('carrier_code', ''))
-        else:
-            carrier_information = '''<CarrierName>%s</CarrierName>''' % (parcel.get('carrier_name', ''))
-        item_string = '''<Item>
-                                <AmazonOrderItemCode>%s</AmazonOrderItemCode>
-                                <Quantity>%s</Quantity>
-                          </Item>''' % (parcel.get('amazon_order_item_id', False), parcel.get('qty', 0))
-        message_information += """<Message>
-                                        <MessageID>%s</MessageID>
-                                        <OperationType>Update</OperationType>
-                                        <OrderFulfillment>
-                                            <AmazonOrderID>%s</AmazonOrderID>
-                                            <FulfillmentDate>%s</FulfillmentDate>
-                                            <FulfillmentData>
-                                                %s
-                                                <ShippingMethod>%s</ShippingMethod>
-                                                <ShipperTrackingNumber>%s</ShipperTrackingNumber>
-                                            </FulfillmentData>
-                                            %s
-                                            %s
-                                        </OrderFulfillment>
-                                    </Message>""" % (str(message_id), parcel.get('order_ref', ''),
-                                                     parcel.get('fulfillment_date_concat', ''),
-                                                     carrier_information, parcel.get('shipping_level_category', ''),
-                                                     parcel.get('tracking_no', ''), item_string, ship_info)
-        return message_information
+        item = ('Item', [('AmazonOrderItemCode', parcel.get('amazon_order_item_id', False)),
+                         ('Quantity', parcel.get('qty', 0))])
+        return [('OrderFulfillment', [('AmazonOrderID', parcel.get('order_ref', '')),
+                                      ('FulfillmentDate', parcel.get('fulfillment_date_concat', '')),
+                                      self.get_parcel_fulfillment_data_ept(parcel), item] + ship_info)]
 
     def get_amazon_customer_vat_details(self, order, vat, vat_country_code):
         """
@@ -85,12 +85,13 @@ class SaleOrderLine(models.Model):
                 return sale_line
         return True
 
-    def create_sale_order_line_vals_amazon(self, order_line, odoo_product, amazon_order):
+    def create_sale_order_line_vals_amazon(self, order_line, odoo_product, amazon_order, line_vals_cache=None):
         """
         Create Sale order line values for amazon order
         :param order_line:
         :param odoo_product:
         :param amazon_order:
+        :param line_vals_cache: {} product wise order line defaults shared by the lines of the batch
         :return: {}
         """
 
@@ -112,7 +113,7 @@ class SaleOrderLine(models.Model):
             'discount': 0.0,
             'product_uom': odoo_product and odoo_product.product_tmpl_id.uom_id.id
         })
-        order_vals = so_line_obj.create_sale_order_line_ept(vals)
+        order_vals = so_line_obj.create_sale_order_line_ept(vals, line_vals_cache)
         if amazon_order.amz_instance_id.is_use_percent_tax:
             unit_tax = item_tax / quantity if quantity > 0.0 else item_tax
             item_tax_percent = (unit_tax * 100) / unit_price if unit_price > 0 else 0.00
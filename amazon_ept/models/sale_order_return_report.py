@@ -10,7 +10,7 @@ import base64
 import csv
 from io import StringIO
 from dateutil import parser
-from odoo import models, fields, api, _, Command
+from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 from .. reportTypes import ReportType
 
@@ -22,12 +22,103 @@ SALE_ORDER_RETURN_REPORT = 'sale.order.return.report'
 AMAZON_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
+class AmazonReturnMoveIndex:
+    """
+    In memory index of the orders, order lines and done delivery moves of all the orders of a
+    customer return report, loaded with one query per model.
+    """
+
+    def __init__(self, return_report, lines):
+        env = return_report.env
+        self.return_report = return_report
+        self.fulfillment_warehouse = {}
+        self.set_product_lines = {}
+        order_refs = list({line.get('order-id', '') for line in lines})
+        self.orders = {}
+        sale_orders = env['sale.order'].search([('amz_order_reference', 'in', order_refs)])
+        for order in sale_orders:
+            self.orders[order.amz_order_reference] = self.orders.get(
+                order.amz_order_reference, env['sale.order']) | order
+
+        self.amazon_products = {}
+        skus = list({line.get('sku', '') for line in lines})
+        amazon_products = env['amazon.product.ept'].search(
+            [('seller_sku', 'in', skus), ('instance_id', 'in', sale_orders.amz_instance_id.ids)], order='id')
+        for amazon_product in amazon_products:
+            self.amazon_products.setdefault((amazon_product.seller_sku, amazon_product.instance_id.id),
+                                            amazon_product)
+
+        self.order_lines = {}
+        order_lines = env['sale.order.line'].search([('order_id', 'in', sale_orders.ids)], order='id')
+        for order_line in order_lines:
+            self.order_lines.setdefault(order_line.order_id.id, []).append(order_line)
+
+        self.moves = {}
+        moves = env['stock.move'].search([('sale_line_id', 'in', order_lines.ids), ('state', '=', 'done')],
+                                         order='product_qty desc, id')
+        for move in moves:
+            self.moves.setdefault(move.sale_line_id.id, []).append(move)
+
+    def get_orders(self, order_ref):
+        """
+        Return all the sale orders of the amazon order reference.
+        """
+        return self.orders.get(order_ref, self.return_report.env['sale.order'])
+
+    def get_amazon_product(self, sku, orders):
+        """
+        Return the amazon product of the sku for the first instance of the orders.
+        """
+        amazon_product = self.return_report.env['amazon.product.ept']
+        products = [self.amazon_products.get((sku, instance_id)) for instance_id in orders.amz_instance_id.ids]
+        products = [product for product in products if product]
+        if products:
+            amazon_product = min(products, key=lambda product: product.id)
+        return amazon_product
+
+    def get_order_lines(self, orders, product):
+        """
+        Return the order lines of the orders for the product.
+        """
+        order_lines = self.return_report.env['sale.order.line']
+        for order in orders:
+            for order_line in self.order_lines.get(order.id, []):
+                if order_line.product_id == product:
+                    order_lines |= order_line
+        return order_lines.sorted('id')
+
+    def get_done_moves(self, order_lines, product=False, remaining_move_qty=None):
+        """
+        Return the done moves of the order lines sorted by quantity, with the product only if
+        given. Moves whose quantity is already fully allocated to returns are excluded.
+        """
+        moves = []
+        for order_line in order_lines:
+            for move in self.moves.get(order_line.id, []):
+                if product and move.product_id != product:
+                    continue
+                if remaining_move_qty is not None and remaining_move_qty.get(move.id, 1.0) <= 0.0:
+                    continue
+                moves.append(move)
+        moves.sort(key=lambda move: (-move.product_qty, move.id))
+        return self.return_report.env['stock.move'].concat(*moves)
+
+    def get_set_product_lines(self, product):
+        """
+        Return the exploded phantom BOM lines of the product, computed once per product.
+        """
+        if product.id not in self.set_product_lines:
+            self.set_product_lines[product.id] = self.return_report.amz_return_report_get_set_product_ept(product)
+        return self.set_product_lines[product.id]
+
+
 class SaleOrderReturnReport(models.Model):
     """
     Added class to import and process Sale Orders Return Report.
     """
     _name = "sale.order.return.report"
-    _inherit = ['mail.thread', 'amazon.reports']
+    _inherit = ['mail.thread', 'amazon.reports', 'amazon.report.lifecycle.ept']
+    _amz_lifecycle_cron = 'amazon_ept.ir_cron_auto_process_customer_return_report_seller_%d'
     _description = "Customer Return Report"
     _order = 'id desc'
 
@@ -219,55 +310,47 @@ class SaleOrderReturnReport(models.Model):
         if not self.attachment_id:
             raise UserError(_("There is no any report are attached with this record."))
 
-    def check_amz_return_move_line_ept(self, line, fulfillment_warehouse, job):
+    def check_amz_return_move_line_ept(self, line, move_index, job):
         """
         Define method for check required details for return line.
         :param : line : return report line
-        :param : fulfillment_warehouse : {fulfillment_center: warehouse}
+        :param : move_index : AmazonReturnMoveIndex loaded for the report
         :param : job : common.log.book.ept()
-        :return: True/False, sale.order.line(), dict {}
+        :return: True/False, sale.order.line()
         """
-        sale_order_line_obj = self.env['sale.order.line']
-        sale_order_obj = self.env['sale.order']
-        amazon_product_obj = self.env['amazon.product.ept']
         amazon_order_id = line.get('order-id', '')
         sku = line.get('sku', '')
         fulfillment_center_id = line.get('fulfillment-center-id', '')
-        amazon_orders = sale_order_obj.search([('amz_order_reference', '=', amazon_order_id)])
+        amazon_orders = move_index.get_orders(amazon_order_id)
         if not amazon_orders:
             message = 'Order %s Is Skipped due to not found in ERP' % (amazon_order_id)
-            job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
-            return True, [], fulfillment_warehouse
+            job.add_log_line_ept({'message': message, 'mismatch_details': True})
+            return True, []
 
-        instance_ids = [amazon_order.amz_instance_id.id for amazon_order in amazon_orders]
-        amazon_products = amazon_product_obj.search(
-            [('seller_sku', '=', sku), ('instance_id', 'in', instance_ids)], limit=1)
+        amazon_products = move_index.get_amazon_product(sku, amazon_orders)
         if not amazon_products:
             message = 'Order %s Is Skipped due to Product %s not found in ERP' % (
                 amazon_order_id, sku)
-            job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
-            return True, [], fulfillment_warehouse
+            job.add_log_line_ept({'message': message, 'mismatch_details': True})
+            return True, []
 
-        amazon_order_lines = sale_order_line_obj.search(
-            [('order_id', 'in', amazon_orders.ids),
-             ('product_id', '=', amazon_products.product_id.id)],
-            order="id")
+        amazon_order_lines = move_index.get_order_lines(amazon_orders, amazon_products.product_id)
         if not amazon_order_lines:
             message = 'Order line %s Is Skipped due to not found in ERP' % (sku)
-            job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
-            return True, [], fulfillment_warehouse
+            job.add_log_line_ept({'message': message, 'mismatch_details': True})
+            return True, []
 
-        if fulfillment_center_id not in fulfillment_warehouse:
+        if fulfillment_center_id not in move_index.fulfillment_warehouse:
             warehouse = self.get_warehouse(fulfillment_center_id, self.seller_id.id,
                                            amazon_orders[0])
-            fulfillment_warehouse.update({fulfillment_center_id: warehouse})
-        warehouse = fulfillment_warehouse.get(fulfillment_center_id)
+            move_index.fulfillment_warehouse.update({fulfillment_center_id: warehouse})
+        warehouse = move_index.fulfillment_warehouse.get(fulfillment_center_id)
         if not warehouse:
             message = 'Order %s Is Skipped due warehouse not found in ERP || ' \
                       'Fulfillment center %s ' % (amazon_order_id, fulfillment_center_id)
-            job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
-            return True, [], fulfillment_warehouse
-        return False, amazon_order_lines, fulfillment_warehouse
+            job.add_log_line_ept({'message': message, 'mismatch_details': True})
+            return True, []
+        return False, amazon_order_lines
 
     def process_return_report_file(self):
         """
@@ -275,82 +358,67 @@ class SaleOrderReturnReport(models.Model):
         move records
         Test Cases:https://docs.google.com/spreadsheets/d/12XqQEheGpQ6c-JV3Ma3eY2MkCMGRaYgf0iht36Ps
         ZFc/edit?usp=sharing
+        All done delivery moves of the orders of the report are loaded at once in an index and
+        the returned quantities are allocated against that index.
         @author: Keyur Kanani
         :return:
         """
         self.ensure_one()
         self.check_return_report_configuration_ept()
         model_id = self.env[IR_MODEL]._get(SALE_ORDER_RETURN_REPORT).id
-        move_obj = self.env[STOCK_MOVE]
         amazon_process_job_log_obj = self.env[COMMON_LOG_BOOK_EPT]
-        fulfillment_warehouse = {}
         remaning_move_qty = {}
         return_move_dict = {}
 
         imp_file = StringIO(base64.b64decode(self.attachment_id.datas).decode())
-        reader = csv.DictReader(imp_file, delimiter='\t')
+        lines = list(csv.DictReader(imp_file, delimiter='\t'))
         job = amazon_process_job_log_obj.amazon_search_or_create_transaction_log('import', model_id, self.id)
-        for line in reader:
+        move_index = AmazonReturnMoveIndex(self, lines)
+        for line in lines:
             status = line.get('status', '')
-            return_date = datetime.strftime(parser.parse(line.get('return-date', '')), AMAZON_DATETIME_FORMAT)
+            return_datetime = parser.parse(line.get('return-date', ''))
+            return_date = datetime.strftime(return_datetime, AMAZON_DATETIME_FORMAT)
             amazon_order_id = line.get('order-id', '')
             sku = line.get('sku', '')
             returned_qty = float(line.get('quantity', 0.0))
             disposition = line.get('detailed-disposition', '')
             reason = line.get('reason', '')
             fulfillment_center_id = line.get('fulfillment-center-id', '')
-            skip_line, amazon_order_lines, fulfillment_warehouse = self.check_amz_return_move_line_ept(
-                line, fulfillment_warehouse, job)
+            skip_line, amazon_order_lines = self.check_amz_return_move_line_ept(line, move_index, job)
             if skip_line:
                 continue
-            warehouse = fulfillment_warehouse.get(fulfillment_center_id)
-            move_lines = move_obj.search([('sale_line_id', 'in', amazon_order_lines.ids),
-                                          ('product_id', '=', amazon_order_lines[0].product_id.id),
-                                          ('state', '=', 'done')])
+            warehouse = move_index.fulfillment_warehouse.get(fulfillment_center_id)
+            product = amazon_order_lines[0].product_id
+            move_lines = move_index.get_done_moves(amazon_order_lines, product)
             if not move_lines:
                 message = 'Move Line is not found for Order %s' % (amazon_order_id)
-                job.write({'log_lines': [Command.create({'message': message})]})
-                move_lines = move_obj.search([('sale_line_id', 'in', amazon_order_lines.ids),
-                                              ('sale_line_id.product_id', '=', amazon_order_lines[0].product_id.id),
-                                              ('state', '=', 'done')])
+                job.add_log_line_ept({'message': message})
+                move_lines = move_index.get_done_moves(amazon_order_lines)
             already_processed = False
             for move_line in move_lines:
-                if move_line.fba_returned_date and datetime.strftime(parser.parse(return_date), '%Y-%m-%d') == \
-                            datetime.strftime(parser.parse(str(move_line.fba_returned_date)), '%Y-%m-%d'):
+                if move_line.fba_returned_date and return_datetime.date() == move_line.fba_returned_date.date():
                     message = 'Skipped because return already processed for Order %s' % (
                         move_line.amazon_order_reference)
-                    job.write({'log_lines': [Command.create({'message': message})]})
+                    job.add_log_line_ept({'message': message})
                     already_processed = True
                     break
             if already_processed:
                 continue
 
-            exclude_move_ids = []
-            for move_id, qty in remaning_move_qty.items():
-                if qty <= 0.0:
-                    exclude_move_ids.append(move_id)
-
-            move_lines = move_obj.search([('sale_line_id', 'in', amazon_order_lines.ids),
-                                          ('product_id', '=', amazon_order_lines[0].product_id.id),
-                                          ('state', '=', 'done'), ('id', 'not in', exclude_move_ids)],
-                                         order='product_qty desc')
+            move_lines = move_index.get_done_moves(amazon_order_lines, product, remaning_move_qty)
             if not move_lines:
-                move_lines = move_obj.search(
-                    [('sale_line_id', 'in', amazon_order_lines.ids),
-                     ('sale_line_id.product_id', '=', amazon_order_lines[0].product_id.id),
-                     ('state', '=', 'done'),
-                     ('id', 'not in', exclude_move_ids)], order='product_qty desc')
+                move_lines = move_index.get_done_moves(amazon_order_lines, False, remaning_move_qty)
                 if move_lines:
                     return_move_dict, remaning_move_qty = self.process_kit_type_product(
-                        amazon_order_lines[0].product_id, move_lines, returned_qty,
+                        product, move_lines, returned_qty,
                         warehouse, return_date, sku, disposition, reason,
                         return_move_dict, status, fulfillment_center_id,
-                        remaning_move_qty)
+                        remaning_move_qty, move_index)
                     continue
             if not move_lines:
                 message = 'Order %s Is Skipped due to delivery move not found either ' \
                           'move have already returned or move missing in the ERP ' % (amazon_order_id)
-                job.write({'log_lines': [Command.create({'message': message, 'mismatch_details': True})]})
+                job.add_log_line_ept({'message': message, 'mismatch_details': True})
                 continue
             return_move_dict, remaning_move_qty = self.get_required_moves_for_return_process(
                 move_lines, warehouse, return_date, sku, disposition, reason, status, fulfillment_center_id,
@@ -387,7 +455,7 @@ class SaleOrderReturnReport(models.Model):
             ).mapped('move_line_ids').mapped('product_qty'))
             if round(qty, 2) <= 0:
                 message = 'Order %s Is Skipped due to not found quant qty from quant history ' % (amazon_order_id),
-                job.write({'log_lines': [(0, 0, {'message': message, 'mismatch_details': True})]})
+                job.add_log_line_ept({'message': message, 'mismatch_details': True})
                 continue
             if move.id in remaning_move_qty:
                 get_remain_qty = remaning_move_qty.get(move.id)
@@ -459,7 +527,7 @@ class SaleOrderReturnReport(models.Model):
                     new_move.move_line_ids.write({'lot_id': origin_move_quant_ids[0].lot_id.id})
                 new_move._action_done()
         message = 'Customer Return Process Completed.'
-        job.write({'log_lines': [Command.create({'message': message})]})
+        job.add_log_line_ept({'message': message})
         return True
 
     def update_reason_record_and_fulfillment_center_dict(self, key, reason_record_dict, fulfillment_center_dict):
@@ -513,7 +581,7 @@ class SaleOrderReturnReport(models.Model):
     def process_kit_type_product(self, sale_line_product, move_lines, returned_qty,
                                  warehouse, return_date, sku, disposition, reason,
                                  return_move_dict, status, fulfillment_center_id,
-                                 remaning_move_qty):
+                                 remaning_move_qty, move_index=None):
         """
         Process BOM product's sale order line, get exploded products for KIT Type Products in
         order line
@@ -530,14 +598,18 @@ class SaleOrderReturnReport(models.Model):
         :param status:
         :param fulfillment_center_id:
         :param remaining_move_qty:
+        :param move_index: AmazonReturnMoveIndex which caches the exploded BOM lines
         :return:
         """
         skip_moves = []
         return_qty_dict = {}
+        if move_index is not None:
+            one_set_product_dict = move_index.get_set_product_lines(sale_line_product)
+        else:
+            one_set_product_dict = self.amz_return_report_get_set_product_ept(sale_line_product)
         for move in move_lines:
             if move.product_id.id in skip_moves:
                 continue
-            one_set_product_dict = self.amz_return_report_get_set_product_ept(sale_line_product)
             if not one_set_product_dict:
                 continue
             if returned_qty <= 0:
@@ -627,6 +699,7 @@ class SaleOrderReturnReport(models.Model):
                  'requested_date': datetime.now()
                  })
             return_report.request_report()
+            return_report.amz_schedule_status_check_ept()
             seller.write({'return_report_last_sync_on': date_end})
         return True
 
@@ -638,14 +711,11 @@ class SaleOrderReturnReport(models.Model):
         seller_id = args.get('seller_id', False)
         if seller_id:
             seller = self.env[AMZ_SELLER_EPT].browse(seller_id)
-            return_reports = self.search([('seller_id', '=', seller.id),
-                                          ('state', 'in', ['_SUBMITTED_', '_IN_PROGRESS_', '_DONE_'])])
-            for report in return_reports:
-                if report.state != '_DONE_':
-                    report.get_report_request_list()
-                if report.report_id and report.state == '_DONE_' and not report.attachment_id:
-                    report.with_context(is_auto_process=True).get_report()
-                if report.attachment_id:
-                    report.with_context(is_auto_process=True).process_return_report_file()
-                self.env.cr.commit()
+            self.amz_run_report_lifecycle_ept(seller)
         return True
+
+    def amz_process_report_file_ept(self):
+        """
+        Process the downloaded customer return report.
+        """
+        return self.process_return_report_file()
@@ -33,7 +33,8 @@ VIEW_MODE = 'tree,form'
 class ShippingReportRequestHistory(models.Model):
     _name = "shipping.report.request.history"
     _description = "Shipping Report"
-    _inherit = ['mail.thread', 'amazon.reports']
+    _inherit = ['mail.thread', 'amazon.reports', 'amazon.report.lifecycle.ept']
+    _amz_lifecycle_cron = 'amazon_ept.ir_cron_process_amazon_fba_shipment_report_seller_%d'
     _order = 'id desc'
 
     @api.depends('seller_id')
@@ -828,8 +829,7 @@ class ShippingReportRequestHistory(models.Model):
             process_invoice = False
             log_line_vals = {'message': 'Stock move is not done of order %s Due to %s' % (order_name, exception),
                              'fulfillment_by': 'FBA', 'mismatch_details': True}
-            transaction_log_lines = [(0, 0, log_line_vals)]
-            job.write({'log_lines': transaction_log_lines})
+            job.add_log_line_ept(log_line_vals)
         return process_invoice
 
     def amz_create_and_process_fba_invoices(self, order, process_invoice):
@@ -1889,6 +1889,7 @@ class ShippingReportRequestHistory(models.Model):
                                            'requested_date': time.strftime(DATE_YMDHMS)})
             shipment_report.with_context({'is_auto_process': True,
                                           'emipro_api': 'shipping_request_report_v13'}).request_report()
+            shipment_report.amz_schedule_status_check_ept()
 
     def search_or_create_amz_shipment_report(self, seller_id, report):
         """
@@ -1969,19 +1970,21 @@ class ShippingReportRequestHistory(models.Model):
         seller_id = args.get('seller_id', False)
         if seller_id:
             seller = self.env[AMZ_SELLER_EPT].browse(seller_id)
-            ship_reports = self.search([('seller_id', '=', seller.id),
-                                        ('state', 'in',
-                                         ['_SUBMITTED_', '_IN_PROGRESS_', '_DONE_'])])
-            for report in ship_reports:
-                if report.state != '_DONE_':
-                    report.get_report_request_list()
-                if report.report_id and report.state == '_DONE_' and not report.attachment_id:
-                    report.with_context({'is_auto_process': True, 'amz_report_type': 'shipment_report'}).get_report()
-                if report.attachment_id:
-                    report.with_context(is_auto_process=True).process_shipment_file()
-                self._cr.commit()
+            self.amz_run_report_lifecycle_ept(seller)
         return True
 
+    def amz_get_report_context_ept(self):
+        """
+        Download the shipment report as shipment report type.
+        """
+        return {'amz_report_type': 'shipment_report'}
+
+    def amz_process_report_file_ept(self):
+        """
+        Process the downloaded shipment report.
+        """
+        return self.process_shipment_file()
+
     def get_reports_from_other_softwares(self, seller, start_date, end_date):
         """
         will request for the amazon shipment report and return response
@@ -8,11 +8,10 @@ and process that.
 
 import base64
 import csv
-import copy
 import time
 from datetime import datetime, timedelta
 from io import StringIO
-from odoo import models, fields, api, _, Command
+from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 from ..reportTypes import ReportType
 
@@ -25,6 +24,7 @@ AMAZON_SELLER_EPT = 'amazon.seller.ept'
 IR_ATTACHMENT = 'ir.attachment'
 DATE_YMDHMS = '%Y-%m-%d %H:%M:%S'
 DATE_YMDTHMS = "%Y-%m-%dT%H:%M:%S"
+ADJUSTMENT_MOVE_BATCH_SIZE = 500
 
 
 class StockAdjustmentReportHistory(models.Model):
@@ -34,7 +34,8 @@ class StockAdjustmentReportHistory(models.Model):
     """
     _name = "amazon.stock.adjustment.report.history"
     _description = "Stock Adjustment Report"
-    _inherit = ['mail.thread', 'amazon.reports']
+    _inherit = ['mail.thread', 'amazon.reports', 'amazon.report.lifecycle.ept']
+    _amz_lifecycle_cron = 'amazon_ept.ir_cron_process_fba_stock_adjustment_report_seller_%d'
     _order = 'id desc'
 
     @api.depends('seller_id')
@@ -179,6 +180,7 @@ class StockAdjustmentReportHistory(models.Model):
             inv_report = self.create({'seller_id': seller_id, 'start_date': start_date, 'end_date': date_end,
                                       'state': 'draft', 'requested_date': time.strftime(DATE_YMDHMS)})
             inv_report.with_context(is_auto_process=True).request_report()
+            inv_report.amz_schedule_status_check_ept()
             seller.write({'stock_adjustment_report_last_sync_on': date_end})
         return True
 
@@ -192,20 +194,15 @@ class StockAdjustmentReportHistory(models.Model):
         seller_id = args.get('seller_id', False)
         if seller_id:
             seller = self.env[AMAZON_SELLER_EPT].browse(seller_id)
-            inv_reports = self.search([('seller_id', '=', seller.id),
-                                       ('state', 'in', ['_SUBMITTED_', '_IN_PROGRESS_'])])
-            for report in inv_reports:
-                report.with_context(is_auto_process=True).get_report_request_list()
-            inv_reports = self.search([('seller_id', '=', seller.id),
-                                       ('state', 'in', ['_DONE_', '_SUBMITTED_', '_IN_PROGRESS_']),
-                                       ('report_id', '!=', False)])
-            for report in inv_reports:
-                if report.report_id and report.state == '_DONE_' and not report.attachment_id:
-                    report.with_context(is_auto_process=True).get_report()
-                report.with_context(is_auto_process=True).process_stock_adjustment_report()
-                self._cr.commit()
+            self.amz_run_report_lifecycle_ept(seller)
         return True
 
+    def amz_process_report_file_ept(self):
+        """
+        Process the downloaded stock adjustment report.
+        """
+        return self.process_stock_adjustment_report()
+
     def list_of_stock_moves(self):
         """
         Open tree view for list stock views
@@ -287,6 +284,7 @@ class StockAdjustmentReportHistory(models.Model):
     def _prepare_group_wise_lines_list_ept(self, job):
         """
         Prepare stock adjustment list as per it's Groups configurations.
+        Reason codes and seller configurations are indexed once per report.
         :param job: log record.
         :return: prepared stock adjustment list and process status
         """
@@ -298,33 +296,42 @@ class StockAdjustmentReportHistory(models.Model):
         reader = csv.DictReader(imp_file, delimiter='\t')
         reason_codes = amazon_adjustment_reason_code_obj.search([('group_id', '!=', False)])
         stock_config = amazon_stock_adjustment_config_obj.search([('seller_id', '=', self.seller_id.id)])
+        code_index = {}
+        for reason_code in reason_codes:
+            code_index[reason_code.name] = code_index.get(reason_code.name, amazon_adjustment_reason_code_obj) | \
+                                           reason_code
+        config_index = {}
+        for config in stock_config:
+            config_index[config.group_id.id] = config_index.get(config.group_id.id,
+                                                                amazon_stock_adjustment_config_obj) | config
+        damaged_group = self.env.ref('amazon_ept.amazon_damaged_inventory_ept')
         for row in reader:
             reason = row.get('reason', '')
             if not reason:
                 continue
-            code = reason_codes.filtered(lambda l, reason=reason: l.name == reason)
+            code = code_index.get(reason)
             if not code:
                 partially_processed = True
-                job.write({'log_lines': [Command.create({'message': 'Code %s configuration not found for processing' %
-                                                                   (reason), 'mismatch_details': True})]})
+                job.add_log_line_ept({'message': 'Code %s configuration not found for processing' %
+                                                (reason), 'mismatch_details': True})
                 continue
             if len(code.ids) > 1:
                 partially_processed = True
-                job.write({'log_lines': [Command.create({'message': 'Multiple Code %s configuration found for processing' % (reason),
-                                                         'mismatch_details': True})]})
+                job.add_log_line_ept({'message': 'Multiple Code %s configuration found for processing' % (reason),
+                                      'mismatch_details': True})
                 continue
-            config = stock_config.filtered(lambda l, code=code: l.group_id.id == code.group_id.id)
+            config = config_index.get(code.group_id.id)
             if not config:
                 partially_processed = True
-                job.write({'log_lines': [Command.create({'message': 'Seller wise code %s configuration not found for processing' % (code.name),
-                                                         'mismatch_details': True})]})
+                job.add_log_line_ept({'message': 'Seller wise code %s configuration not found for processing' % (code.name),
+                                      'mismatch_details': True})
                 continue
-            if not config.is_send_email and not config.location_id and not config.group_id.id == self.env.ref('amazon_ept.amazon_damaged_inventory_ept').id:
+            if not config.is_send_email and not config.location_id and not config.group_id.id == damaged_group.id:
                 partially_processed = True
                 if not config.location_id:
                     message = 'Location not configured for stock adjustment config ERP Id %s || group name %s' % (
                         config.id, config.group_id.name)
-                    job.write({'log_lines': [Command.create({'message': message, 'mismatch_details': True})]})
+                    job.add_log_line_ept({'message': message, 'mismatch_details': True})
                 continue
             group_wise_lines_list = self.get_amazon_group_wise_lines_list(row, config, group_wise_lines_list)
         return group_wise_lines_list, partially_processed
@@ -403,52 +410,49 @@ class StockAdjustmentReportHistory(models.Model):
         :param create_log: This arguments represent create log (True/False).
         :return: This Method returns the state of adjustment report process.
         """
-        temp_lines = copy.copy(lines)
-        transaction_item_ids = []
+        transaction_item_ids = set()
         amazon_adjustment_reason_code_obj = self.env[AMAZON_ADJUSTMENT_REASON_CODE]
         counter_line_list = []
-        code_dict = {}
         reason_codes = amazon_adjustment_reason_code_obj.search([('group_id', '=', config.group_id.id)])
+        code_dict = {reason_code.name: reason_code for reason_code in reason_codes}
+        counter_line_index = self._prepare_counter_line_index(lines)
         for line in lines:
             if line.get('transaction-item-id', False) in transaction_item_ids:
                 continue
             reason = line.get('reason', '')
-            if line.get('reason', '') not in code_dict:
-                reason_code = reason_codes.filtered(lambda l, line=line: l.name == line.get('reason', ''))
-                code_dict.update({line.get('reason', ''): reason_code})
-            code = code_dict.get(line.get('reason', ''))
+            code = code_dict.get(reason)
             if not code:
                 continue
             counter_part_code = code.counter_part_id.name
             if not counter_part_code:
                 continue
-            args = {'line': line, 'temp_lines': temp_lines,
+            args = {'line': line, 'counter_line_index': counter_line_index,
                     'counter_part_code': code.counter_part_id.name,
                     'reason': reason, 'create_log': create_log, 'job': job}
             counter_line_list = self._prepare_counter_line_list(transaction_item_ids, counter_line_list, args)
         if counter_line_list:
-            stock_move_ids = self._amz_process_counter_line_list_ept(counter_line_list, code_dict, reason_codes, job)
-            if stock_move_ids:
-                self._prepare_stock_move_create(stock_move_ids)
+            move_vals_list = self._amz_process_counter_line_list_ept(counter_line_list, code_dict, reason_codes, job)
+            if move_vals_list:
+                self._prepare_stock_move_create(move_vals_list)
         return partially_processed
 
     def _amz_process_counter_line_list_ept(self, counter_line_list, code_dict, reason_codes, job):
         """
-        Process counter part lines list, Find and create stock move if not exist.
+        Process counter part lines list, prepare the values of the stock moves which do not exist.
         :param counter_line_list:
         :param code_dict:
         :param reason_codes:
         :param job:
-        :return: stock_move_ids []
+        :return: list of stock move values
         """
-        stock_move_obj = self.env[STOCK_MOVE]
         fulfillment_center_obj = self.env['amazon.fulfillment.center']
         fulfillment_warehouse = {}
-        stock_move_ids = []
+        product_dict = {}
+        move_vals_list = []
         for counter_line in counter_line_list:
             line = counter_line[0]
             p_line = counter_line[1]
-            product = self._find_amazon_product_for_process_adjustment_line(line, job)
+            product = self._find_amazon_product_for_process_adjustment_line(line, job, product_dict)
             if not product:
                 continue
             adjustment_date = self._amz_get_adjustment_date(p_line.get('adjusted-date', False))
@@ -474,8 +478,8 @@ class StockAdjustmentReportHistory(models.Model):
                     else:
                         message = 'Unsellable location not found for Warehouse %s || Product %s' % (
                             fn_warehouse.name, line.get('sku', ''))
-                    job.write({'log_lines': [Command.create({'message': 'Mismatch: ' + message,
-                                                             'mismatch_details': True})]})
+                    job.add_log_line_ept({'message': 'Mismatch: ' + message,
+                                          'mismatch_details': True})
                     continue
                 fulfillment_warehouse.update(
                     {counter_vals.get('fulfillment_center_id', False): [fn_warehouse, fulfillment_center]})
@@ -486,43 +490,72 @@ class StockAdjustmentReportHistory(models.Model):
                 code_dict.update({p_line.get('reason', ''): reason_code})
             code = code_dict.get(p_line.get('reason', ''))
             counter_vals.update({'code': code, 'fulfillment_center': fulfillment_center.id, 'warehouse': warehouse})
-            exist_move_domain = self._amz_prepare_existing_stock_move_domain(product, counter_vals)
-            exist_stock_move = stock_move_obj.search(exist_move_domain)
-            if exist_stock_move:
-                job.write({'log_lines': [Command.create({'message': 'Line already processed for Product %s || Code %s-%s'
-                                                                    % (product.name or False, p_line.get('reason', ''),
-                                                                       line.get('reason', ''))})]})
-            else:
-                vals = self._amz_adjust_prepare_stock_move_vals_ept(product, counter_vals)
-                vals.update({'state': 'confirmed'})
-                stock_move = stock_move_obj.create(vals)
-                stock_move_ids.append(stock_move.id)
-        return stock_move_ids
+            self._amz_set_counter_part_locations(counter_vals)
+            vals = self._amz_adjust_prepare_stock_move_vals_ept(product, counter_vals)
+            message = 'Line already processed for Product %s || Code %s-%s' % (
+                product.name or False, p_line.get('reason', ''), line.get('reason', ''))
+            move_vals_list.append((vals, message))
+        return self._amz_filter_existing_adjustment_moves(move_vals_list, job)
 
     @staticmethod
-    def _amz_prepare_existing_stock_move_domain(product, counter_vals):
+    def _amz_set_counter_part_locations(counter_vals):
         """
-        Prepare domain for search exiting stock moves
-        :param product: product.product()
+        Set the source and destination locations of counter part line as per the dispositions.
         :param counter_vals: {}
-        :return: []
+        :return: {}
         """
         warehouse = counter_vals.get('warehouse')
-        exist_move_domain = [('product_uom_qty', '=', counter_vals.get('p_line_qty', 0.0)),
-                             ('product_id', '=', product.id),
-                             ('adjusted_date', '=', counter_vals.get('adjustment_date', '')),
-                             ('transaction_item_id', '=', counter_vals.get('transaction_item_id', False)),
-                             ('fulfillment_center_id', '=', counter_vals.get('fulfillment_center', False)),
-                             ('code_id', '=', counter_vals.get('code', False).id)]
         destination_location_id = warehouse.unsellable_location_id.id if counter_vals.get(
             'p_line_disposition', '') != 'SELLABLE' else warehouse.lot_stock_id.id
         source_location_id = warehouse.unsellable_location_id.id if counter_vals.get(
             'other_line_disposition', '') != 'SELLABLE' else warehouse.lot_stock_id.id
-        exist_move_domain += [('location_id', '=', source_location_id),
-                              ('location_dest_id', '=', destination_location_id)]
         counter_vals.update({'source_location_id': source_location_id,
                              'destination_location_id': destination_location_id})
-        return exist_move_domain
+        return counter_vals
+
+    @staticmethod
+    def _amz_adjustment_move_key(vals):
+        """
+        Prepare the key which identify an adjustment stock move.
+        :param vals: stock move values
+        :return: tuple
+        """
+        return (round(vals.get('product_uom_qty', 0.0), 4), vals.get('product_id') or False,
+                vals.get('adjusted_date') or False, vals.get('transaction_item_id') or False,
+                vals.get('fulfillment_center_id') or False, vals.get('code_id') or False,
+                vals.get('location_id') or False, vals.get('location_dest_id') or False)
+
+    def _amz_filter_existing_adjustment_moves(self, move_vals_list, job):
+        """
+        Remove the stock move values which already exist as adjustment stock move, with one query for
+        all the lines, and log them as already processed.
+        :param move_vals_list: list of tuple (stock move values, already processed message)
+        :param job: common.log.book.ept()
+        :return: list of stock move values to create
+        """
+        transaction_item_ids = list({vals.get('transaction_item_id') for vals, _message in move_vals_list
+                                     if vals.get('transaction_item_id')})
+        existing_moves = self.env[STOCK_MOVE].search_read(
+            [('transaction_item_id', 'in', transaction_item_ids)],
+            ['product_uom_qty', 'product_id', 'adjusted_date', 'transaction_item_id', 'fulfillment_center_id',
+             'code_id', 'location_id', 'location_dest_id']) if transaction_item_ids else []
+        existing_keys = set()
+        for move in existing_moves:
+            for field_name in ['product_id', 'fulfillment_center_id', 'code_id', 'location_id', 'location_dest_id']:
+                move[field_name] = move[field_name] and move[field_name][0]
+            existing_keys.add(self._amz_adjustment_move_key(move))
+        new_move_vals = []
+        log_lines = []
+        for vals, message in move_vals_list:
+            key = self._amz_adjustment_move_key(vals)
+            if key in existing_keys:
+                log_lines.append({'message': message, 'log_book_id': job.id})
+                continue
+            existing_keys.add(key)
+            new_move_vals.append(vals)
+        if log_lines:
+            self.env['common.log.lines.ept'].buffer_log_lines_ept(log_lines)
+        return new_move_vals
 
     @staticmethod
     def get_amazon_source_and_destination_location_id(counter_vals, config, warehouse):
@@ -550,12 +583,13 @@ class StockAdjustmentReportHistory(models.Model):
          """
         amazon_adjustment_reason_code_obj = self.env[AMAZON_ADJUSTMENT_REASON_CODE]
         fulfillment_center_obj = self.env['amazon.fulfillment.center']
-        stock_move_ids = []
+        move_vals_list = []
         fulfillment_center_dict = {}
-        stock_move_obj = self.env[STOCK_MOVE]
+        product_dict = {}
         reason_code = amazon_adjustment_reason_code_obj.search([('group_id', '=', config.group_id.id)])
+        code_dict = {code.name: code for code in reason_code}
         for line in lines:
-            product = self._find_amazon_product_for_process_adjustment_line(line, job)
+            product = self._find_amazon_product_for_process_adjustment_line(line, job, product_dict)
             if not product:
                 continue
             fulfillment_center, warehouse, skip_line = self._amz_find_fulfillment_center_warehouse(
@@ -563,51 +597,30 @@ class StockAdjustmentReportHistory(models.Model):
             if skip_line:
                 partially_processed = True
                 continue
-            counter_vals = self.prepare_amz_non_counter_line_vals(line, reason_code, fulfillment_center, warehouse)
-            exist_move_domain = self.prepare_existing_move_domain(product, counter_vals)
+            counter_vals = self.prepare_amz_non_counter_line_vals(line, code_dict, fulfillment_center, warehouse)
             source_location_id, destination_location_id = self.get_amazon_source_and_destination_location_id(
                 counter_vals, config, warehouse)
-            exist_move_domain += [('location_id', '=', source_location_id),
-                                  ('location_dest_id', '=', destination_location_id)]
-            exist_move = stock_move_obj.search(exist_move_domain)
             counter_vals.update({'source_location_id': source_location_id,
                                  'destination_location_id': destination_location_id})
-            if exist_move:
-                job.write({'log_lines': [Command.create({'message': 'Line already processed for Product %s || Code %s'
-                                                                   % (product.name, line.get('reason', ''))})]})
-            else:
-                vals = self._amz_adjust_prepare_stock_move_vals_ept(product, counter_vals)
-                stock_move = stock_move_obj.create(vals)
-                stock_move_ids.append(stock_move.id)
+            vals = self._amz_adjust_prepare_stock_move_vals_ept(product, counter_vals)
+            message = 'Line already processed for Product %s || Code %s' % (product.name, line.get('reason', ''))
+            move_vals_list.append((vals, message))
+        move_vals_list = self._amz_filter_existing_adjustment_moves(move_vals_list, job)
         # This Method prepare value for stock move,stock move line and create stock move,stock moveline
-        if stock_move_ids:
-            self._prepare_stock_move_create(stock_move_ids)
+        if move_vals_list:
+            self._prepare_stock_move_create(move_vals_list)
         return partially_processed
 
-    def prepare_existing_move_domain(self, product, counter_vals):
-        """
-        Prepare domain for search existing stock move.
-        :param product: product.product()
-        :param counter_vals: dict{}
-        :return: list of domain [(),()]
-        """
-        exist_move_domain = [('product_uom_qty', '=', abs(counter_vals.get('p_line_qty', 0.0))),
-                             ('product_id', '=', product.id),
-                             ('adjusted_date', '=', counter_vals.get('adjustment_date', '')),
-                             ('transaction_item_id', '=', counter_vals.get('transaction_item_id', False)),
-                             ('fulfillment_center_id', '=', counter_vals.get('fulfillment_center', False)),
-                             ('code_id', '=', counter_vals.get('code', False).id)]
-        return exist_move_domain
-
-    def prepare_amz_non_counter_line_vals(self, line, reason_code, fulfillment_center, warehouse):
+    def prepare_amz_non_counter_line_vals(self, line, code_dict, fulfillment_center, warehouse):
         """
         Prepare Values of counter lines
         :param line: dict {}
+        :param code_dict: dict {reason code name: amazon.adjustment.reason.code()}
         :return: dict {}
         """
         adjustment_date = self._amz_get_adjustment_date(line.get('adjusted-date', False))
         reason = line.get('reason', '')
-        code = reason_code.filtered(lambda l, reason=reason: l.name == reason)
+        code = code_dict.get(reason, self.env[AMAZON_ADJUSTMENT_REASON_CODE])
         counter_vals = {
             'p_line_qty': float(line.get('quantity', 0.0)),
             'disposition': line.get('disposition', ''),
@@ -641,8 +654,8 @@ class StockAdjustmentReportHistory(models.Model):
                     line.get('fulfillment-center-id', False), line.get('sku', ''))
             else:
                 message = 'Unsellable location not found for Warehouse %s' % (warehouse.name)
-            job.write({'log_lines': [Command.create({'message': 'Mismatch: ' + message,
-                                                     'mismatch_details': True})]})
+            job.add_log_line_ept({'message': 'Mismatch: ' + message,
+                                  'mismatch_details': True})
             skip_line = True
         return fulfillment_center, warehouse, skip_line
 
@@ -686,70 +699,89 @@ class StockAdjustmentReportHistory(models.Model):
             'amz_stock_adjustment_report_id': self.id
         }
 
-    def _prepare_stock_move_create(self, stock_move_ids):
+    def _prepare_stock_move_create(self, move_vals_list):
         """
-        This Method represents to prepare stock move value and stock move create.
-        :param stock_move_ids: This arguments represents stock move ids list.
+        This Method represents to create the stock moves and validate them in batches.
+        :param move_vals_list: This arguments represents list of stock move values.
         :return: This Method returns boolean(True/False).
         """
         stock_move_obj = self.env[STOCK_MOVE]
-        for stock_move_id in stock_move_ids:
-            stock_move = stock_move_obj.browse(stock_move_id)
-            stock_move._action_confirm()
-            stock_move._action_assign()
-            stock_move._set_quantity_done(stock_move.product_uom_qty)
-            stock_move._action_done()
+        for index in range(0, len(move_vals_list), ADJUSTMENT_MOVE_BATCH_SIZE):
+            stock_moves = stock_move_obj.create(move_vals_list[index:index + ADJUSTMENT_MOVE_BATCH_SIZE])
+            stock_moves._action_confirm(merge=False)
+            stock_moves._action_assign()
+            for stock_move in stock_moves:
+                stock_move._set_quantity_done(stock_move.product_uom_qty)
+            stock_moves._action_done()
         return True
 
+    @staticmethod
+    def _prepare_counter_line_index(lines):
+        """
+        Index the lines on the values which must match with the counter part line.
+        :param lines: list of report lines
+        :return: dict {(reason, abs quantity, adjusted date, fnsku, sku, fulfillment center): [lines]}
+        """
+        counter_line_index = {}
+        for line in lines:
+            key = (line.get('reason', ''), abs(float(line.get('quantity', 0.0))), line.get('adjusted-date', ''),
+                   line.get('fnsku', ''), line.get('sku', ''), line.get('fulfillment-center-id', False))
+            counter_line_index.setdefault(key, []).append(line)
+        return counter_line_index
+
     @staticmethod
     def _prepare_counter_line_list(transaction_item_ids, counter_line_list, args):
         """
         This Method represents to prepare a list of counterpart lines.
-        :param transaction_item_ids: []
+        :param transaction_item_ids: set of already paired transaction item ids
         :param counter_line_list: []
         :param args: {}
         :return: []
         """
         line = args.get('line', False)
         job = args.get('job', False)
-        for temp_line in args.get('temp_lines', False):
-            if temp_line.get('reason', '') == args.get('counter_part_code', '') and \
-                    abs(float(temp_line.get('quantity', 0.0))) == abs(float(line.get('quantity', 0.0))) and \
-                    temp_line.get('transaction-item-id', False) not in transaction_item_ids:
-                if line.get('adjusted-date', '') == temp_line.get('adjusted-date', '') and \
-                        line.get('fnsku', '') == temp_line.get('fnsku', '') and \
-                        line.get('sku', '') == temp_line.get('sku', '') and \
-                        line.get('fulfillment-center-id', False) == temp_line.get('fulfillment-center-id', False):
-                    transaction_item_ids.append(temp_line.get('transaction-item-id', False))
-                    counter_line_list.append((line, temp_line))
-                    message = """Counter Part Combination line || sku : {} || adjustment-date {} || 
-                    fulfillment-center-id {} || quantity {} || Code {} - Disposition {}
-                    & {} - Disposition {}""".format(line.get('sku', ''), line.get('adjusted-date', ''),
-                                                    line.get('fulfillment-center-id', False),
-                                                    line.get('quantity', 0.0), args.get('reason', ''),
-                                                    line.get('disposition', ''), temp_line.get('reason', ''),
-                                                    temp_line.get('disposition', ''))
-                    if args.get('create_log', False):
-                        job.write({'log_lines': [Command.create({'message': message})]})
-                    break
+        key = (args.get('counter_part_code', ''), abs(float(line.get('quantity', 0.0))),
+               line.get('adjusted-date', ''), line.get('fnsku', ''), line.get('sku', ''),
+               line.get('fulfillment-center-id', False))
+        for temp_line in args.get('counter_line_index', {}).get(key, []):
+            if temp_line.get('transaction-item-id', False) not in transaction_item_ids:
+                transaction_item_ids.add(temp_line.get('transaction-item-id', False))
+                counter_line_list.append((line, temp_line))
+                message = """Counter Part Combination line || sku : {} || adjustment-date {} || 
+                fulfillment-center-id {} || quantity {} || Code {} - Disposition {}
+                & {} - Disposition {}""".format(line.get('sku', ''), line.get('adjusted-date', ''),
+                                                line.get('fulfillment-center-id', False),
+                                                line.get('quantity', 0.0), args.get('reason', ''),
+                                                line.get('disposition', ''), temp_line.get('reason', ''),
+                                                temp_line.get('disposition', ''))
+                if args.get('create_log', False):
+                    job.add_log_line_ept({'message': message})
+                break
         return counter_line_list
 
-    def _find_amazon_product_for_process_adjustment_line(self, line, job):
+    def _find_amazon_product_for_process_adjustment_line(self, line, job, product_dict=None):
         """
         This Method represents search amazon product for product adjustment line.
         :param line: These arguments represent the line of amazon.
         :param job: These arguments represent the log job of amazon.
+        :param product_dict: cache of the products found by sku and asin.
         :return: This Method return product.
         """
         amazon_product_obj = self.env['amazon.product.ept']
         sku = line.get('sku', '')
         asin = line.get('fnsku', '')
-        amazon_product = amazon_product_obj.search([('seller_sku', '=', sku), ('fulfillment_by', '=', 'FBA')], limit=1)
-        if not amazon_product:
-            amazon_product = amazon_product_obj.search([('product_asin', '=', asin), ('fulfillment_by', '=', 'FBA')],
+        if product_dict is not None and (sku, asin) in product_dict:
+            amazon_product = product_dict[(sku, asin)]
+        else:
+            amazon_product = amazon_product_obj.search([('seller_sku', '=', sku), ('fulfillment_by', '=', 'FBA')],
                                                        limit=1)
+            if not amazon_product:
+                amazon_product = amazon_product_obj.search([('product_asin', '=', asin),
+                                                            ('fulfillment_by', '=', 'FBA')], limit=1)
+            if product_dict is not None:
+                product_dict[(sku, asin)] = amazon_product
         product = amazon_product.product_id if amazon_product else False
         if not amazon_product and job:
-            job.write({'log_lines': [Command.create({'message': 'Product  not found for SKU %s & ASIN %s'
-                                                                % (sku, asin), 'mismatch_details': True})]})
+            job.add_log_line_ept({'message': 'Product  not found for SKU %s & ASIN %s'
+                                             % (sku, asin), 'mismatch_details': True})
         return product
@@ -39,7 +39,7 @@ class StockMove(models.Model):
     fulfillment_center_id = fields.Many2one('amazon.fulfillment.center',
                                             string='Fulfillment Center', copy=False,
                                             default=False)
-    transaction_item_id = fields.Char("Transaction Item", copy=False)
+    transaction_item_id = fields.Char("Transaction Item", copy=False, index=True)
     seller_id = fields.Many2one("amazon.seller.ept", "Seller")
     code_id = fields.Many2one('amazon.adjustment.reason.code', string='FBA Stock Adjustment Code',
                               copy=False)
@@ -24,6 +24,112 @@ DATE_YMDHMS = "%Y-%m-%d %H:%M:%S"
 ORDER_ID = 'Order ID'
 
 
+class VcsResolverCache:
+    """
+    Cache of the countries, instances, sale orders and amazon products needed to process VCS tax
+    reports. Records are loaded in bulk for all the rows of a report and the cache is kept for
+    the whole job, so the same record is never searched twice.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.country_dict = {}
+        self.instance_dict = {}
+        self.ship_from_country_dict = {}
+        self.warehouse_country_dict = {}
+        self.sale_order_dict = {}
+        self.amazon_prod_dict = {}
+
+    def load_vcs_rows(self, amazon_seller, rows):
+        """
+        Resolve the records of all the rows which are not cached yet with set based searches.
+        """
+        res_country_obj = self.env['res.country']
+        marketplace_ids = {row.get('Marketplace ID', '') for row in rows} - set(self.country_dict)
+        if marketplace_ids:
+            countries = res_country_obj.search(['|', ('amazon_marketplace_code', 'in', list(marketplace_ids)),
+                                                ('code', 'in', list(marketplace_ids))])
+            for country in countries:
+                if country.code in marketplace_ids:
+                    self.country_dict.setdefault(country.code, country)
+            # The amazon marketplace code has priority over the country code.
+            for country in countries:
+                if country.amazon_marketplace_code in marketplace_ids:
+                    self.country_dict[country.amazon_marketplace_code] = country
+
+        for instance in amazon_seller.instance_ids:
+            self.instance_dict.setdefault((instance.country_id.id, amazon_seller.id), instance)
+
+        instance_wise_orders = {}
+        for row in rows:
+            country = self.country_dict.get(row.get('Marketplace ID', ''))
+            instance = country and self.instance_dict.get((country.id, amazon_seller.id))
+            if instance and (instance.id, row.get(ORDER_ID, '')) not in self.sale_order_dict:
+                instance_wise_orders.setdefault(instance.id, set()).add(row.get(ORDER_ID, ''))
+        instance_ids = list(instance_wise_orders)
+        if instance_ids:
+            sale_orders = self.env['sale.order'].search([
+                ('amz_instance_id', 'in', instance_ids),
+                ('amz_order_reference', 'in', list(set().union(*instance_wise_orders.values())))])
+            for instance_id, order_refs in instance_wise_orders.items():
+                for order_ref in order_refs:
+                    self.sale_order_dict[(instance_id, order_ref)] = self.env['sale.order']
+            for sale_order in sale_orders:
+                key = (sale_order.amz_instance_id.id, sale_order.amz_order_reference)
+                if key in self.sale_order_dict:
+                    self.sale_order_dict[key] |= sale_order
+
+            skus = list({row.get('SKU', '') for row in rows})
+            amazon_products = self.env['amazon.product.ept'].search([('seller_sku', 'in', skus),
+                                                                     ('instance_id', 'in', instance_ids)],
+                                                                    order='id')
+            for amz_prod in amazon_products:
+                self.amazon_prod_dict.setdefault(
+                    (amz_prod.seller_sku, amz_prod.instance_id.id, amz_prod.fulfillment_by), amz_prod)
+
+        ship_from_countries = {row.get('Ship From Country', '') for row in rows} - \
+                              set(self.ship_from_country_dict)
+        if ship_from_countries:
+            for country in res_country_obj.search([('code', 'in', list(ship_from_countries))]):
+                self.ship_from_country_dict[country.code] = country
+                self.warehouse_country_dict[country.id] = self.env['stock.warehouse']
+            warehouses = self.env['stock.warehouse'].search(
+                [('partner_id.country_id', 'in', list(self.warehouse_country_dict))])
+            for warehouse in warehouses:
+                self.warehouse_country_dict[warehouse.partner_id.country_id.id] |= warehouse
+        return True
+
+    def get_country(self, marketplace_id):
+        """
+        Return the country of the amazon marketplace code.
+        """
+        return self.country_dict.get(marketplace_id, self.env['res.country'])
+
+    def get_instance(self, country, amazon_seller):
+        """
+        Return the instance of the seller for the country.
+        """
+        return self.instance_dict.get((country.id, amazon_seller.id), self.env['amazon.instance.ept'])
+
+    def get_sale_order(self, instance, order_ref, ship_from_country):
+        """
+        Return the sale order of the instance. When the order is split in several warehouses, the
+        one of the warehouse located in the ship from country is returned.
+        """
+        sale_order = self.sale_order_dict.get((instance.id, order_ref), self.env['sale.order'])
+        if len(sale_order) > 1:
+            country = self.ship_from_country_dict.get(ship_from_country, self.env['res.country'])
+            warehouses = self.warehouse_country_dict.get(country.id, self.env['stock.warehouse'])
+            sale_order = sale_order.filtered(lambda order: order.warehouse_id in warehouses)[:1]
+        return sale_order
+
+    def get_amazon_product(self, sku, instance, fulfillment_by):
+        """
+        Return the amazon product of the instance for the seller sku and fulfillment by.
+        """
+        return self.amazon_prod_dict.get((sku, instance.id, fulfillment_by), self.env['amazon.product.ept'])
+
+
 class VcsTaxReport(models.Model):
     """
     Added class to import amazon VCS tax report.
@@ -170,27 +276,25 @@ class VcsTaxReport(models.Model):
             seller.write({'vcs_report_last_sync_on': date_end})
         return True
 
-    def check_amazon_vcs_required_records(self, row, amazon_seller, country_dict, instance_dict, ship_from_country_dict,
-                                          warehouse_country_dict, line_no):
+    def check_amazon_vcs_required_records(self, row, amazon_seller, resolver, line_no):
         """
         This method is used to check the required records to process the VCS reports.
+        Records are taken from the resolver cache, which is loaded in bulk for the whole file.
         """
         marketplace_id = row.get('Marketplace ID', '')
         order_id = row.get(ORDER_ID, '')
-        country = self.find_vcs_country_ept(country_dict, marketplace_id)
+        country = resolver.get_country(marketplace_id)
         if not country:
             message = 'Country with code %s not found in line %d' % (marketplace_id, line_no)
             return message, False, False
 
-        instance = self.find_vcs_instance_ept(country, amazon_seller, instance_dict)
+        instance = resolver.get_instance(country, amazon_seller)
         if not instance:
             message = 'Instance with %s Country and %s Seller not found in line %d' \
                       % (country.name, amazon_seller.name, line_no)
             return message, False, False
 
-        sale_order = self.find_amazon_vcs_sale_order_ept(row, instance, \
-                                                         ship_from_country_dict,
-                                                         warehouse_country_dict)
+        sale_order = resolver.get_sale_order(instance, order_id, row.get('Ship From Country', False))
         if not sale_order:
             message = 'Sale Order - %s not found in line %d' % (order_id, line_no)
             return message, False, False
@@ -210,49 +314,50 @@ class VcsTaxReport(models.Model):
             raise UserError(_("There is no any report are attached with this record."))
         return True
 
-    def process_vcs_tax_report_file(self):
+    def process_vcs_tax_report_file(self, resolver=None):
         """
         @change: By Maulik Barad on Date 20-Jan-2019.
         Updated  by Twinkalc on 13-Mar-2021
         Updated code to set an invoice url and VCS invoice number into the invoice and refund
+        The file is processed in two phases, first all rows are parsed and the orders, products,
+        countries and instances are resolved with a few queries, then the invoices are updated
+        order wise.
+        :param resolver: VcsResolverCache shared by all the reports processed in the same job
         """
         self.ensure_one()
-        country_dict = {}
-        instance_dict = {}
-        ship_from_country_dict = {}
-        warehouse_country_dict = {}
-        amazon_prod_dict = {}
         vcs_invoice_ids = []
         line_no = 1
-        commit_flag = 1
 
         log = self.amz_search_or_create_logs_ept('')
         transaction_line_ids = []
         amazon_seller = self.seller_id or False
         self.check_amz_vcs_attachment()
+        if resolver is None:
+            resolver = VcsResolverCache(self.env)
 
         imp_file = self.decode_amazon_encrypted_vcs_attachments_data(self.attachment_id, log)
-        reader = csv.DictReader(imp_file, delimiter=',')
-        for row in reader:
+        rows = []
+        for row in csv.DictReader(imp_file, delimiter=','):
             line_no += 1
-            order_id = row.get(ORDER_ID, '')
-            sku = row.get('SKU', '')
-
             message = self.check_vcs_report_file_data_ept(row, line_no)
             if message:
-                transaction_line_ids.append((0, 0, {'message': message, 'order_ref': order_id,
-                                                    'default_code': sku}))
+                transaction_line_ids.append((0, 0, {'message': message, 'order_ref': row.get(ORDER_ID, ''),
+                                                    'default_code': row.get('SKU', '')}))
                 continue
+            rows.append((line_no, row))
+        resolver.load_vcs_rows(amazon_seller, [row for _line_no, row in rows])
 
-            message, sale_order, instance = self.check_amazon_vcs_required_records(
-                row, amazon_seller, country_dict, instance_dict, ship_from_country_dict, warehouse_country_dict,
-                line_no)
+        order_wise_rows = {}
+        for line_no, row in rows:
+            order_id = row.get(ORDER_ID, '')
+            sku = row.get('SKU', '')
+            message, sale_order, instance = self.check_amazon_vcs_required_records(row, amazon_seller, resolver,
+                                                                                   line_no)
             if message:
                 transaction_line_ids.append((0, 0, {'message': message, 'order_ref': order_id}))
                 continue
 
-            fulfillment_by = sale_order.amz_fulfillment_by
-            amz_prod = self.find_amazon_vcs_product_ept(amazon_prod_dict, sku, instance, fulfillment_by)
+            amz_prod = resolver.get_amazon_product(sku, instance, sale_order.amz_fulfillment_by)
             if not amz_prod:
                 message = 'Amazon Product not found with %s Seller SKU in line %d' % (sku, line_no)
                 transaction_line_ids.append((0, 0, {'message': message, 'order_ref': order_id,
@@ -262,17 +367,18 @@ class VcsTaxReport(models.Model):
             odoo_product_id = amz_prod.product_id.id if amz_prod.product_id else False
             if not odoo_product_id:
                 continue
+            order_wise_rows.setdefault(sale_order, []).append((row, odoo_product_id))
 
-            vcs_invoice_ids, transaction_line_ids = self.process_vcs_report_data_ept(row, sale_order, odoo_product_id,
-                                                                                     vcs_invoice_ids,
-                                                                                     transaction_line_ids)
-            if commit_flag == 10:
+        for order_count, (sale_order, order_rows) in enumerate(order_wise_rows.items(), 1):
+            for row, odoo_product_id in order_rows:
+                vcs_invoice_ids, transaction_line_ids = self.process_vcs_report_data_ept(
+                    row, sale_order, odoo_product_id, vcs_invoice_ids, transaction_line_ids)
+            if order_count % 10 == 0:
                 self.env.cr.commit()
-                commit_flag = 0
-            commit_flag += 1
 
         self.write({'invoice_ids': [(4, vcs_invoice.id) for vcs_invoice in vcs_invoice_ids]})
-        log.write({'log_lines': transaction_line_ids})
+        self.env['common.log.lines.ept'].buffer_log_lines_ept(
+            [dict(line_vals, log_book_id=log.id) for _command, _line_id, line_vals in transaction_line_ids])
         if not log.log_lines:
             self.write({'state': 'processed'})
             log.unlink()
@@ -309,22 +415,6 @@ class VcsTaxReport(models.Model):
             vcs_invoice_ids.append(invoices)
         return vcs_invoice_ids, transaction_line_ids
 
-    def find_vcs_instance_ept(self, country, amazon_seller, instance_dict):
-        """
-        Added by Twinkalc on 30-sep-2020
-        :param country: country record
-        :param amazon_seller : amazon seller record
-        :param instance_dict : instance dict
-        This method will find the instance based on passed country.
-        """
-        instance_obj = self.env['amazon.instance.ept']
-        instance = instance_obj.browse(instance_dict.get((country.id, amazon_seller.id), False))
-        if not instance:
-            instance = amazon_seller.instance_ids.filtered(lambda x: x.country_id.id == country.id)
-            if instance:
-                instance_dict.update({(country.id, amazon_seller.id): instance.id})
-        return instance
-
     def check_vcs_report_file_data_ept(self, row, line_no):
         """
         Added by Twinkalc on 30-sep-2020
@@ -368,98 +458,13 @@ class VcsTaxReport(models.Model):
 
         return message
 
-    def find_vcs_country_ept(self, country_dict, marketplace_id):
-        """
-        Added by Twinkalc on 30-sep-2020
-        :param country_dict : country dict
-        :param marketplace_id: marketplace id
-        :param  log_line_vals : log line data
-        :param line_no : processing line no of file
-        :return: This method wil find the country based on amazon_marketplace_code
-         and also update the country dict.
-        """
-
-        res_country_obj = self.env['res.country']
-        country = res_country_obj.browse(country_dict.get(marketplace_id, False))
-        if not country:
-            country = res_country_obj.search([('amazon_marketplace_code', '=', marketplace_id)], limit=1)
-            if not country:
-                country = res_country_obj.search([('code', '=', marketplace_id)], limit=1)
-            if country:
-                country_dict.update({marketplace_id: country.id})
-        return country
-
-    def find_amazon_vcs_product_ept(self, amazon_prod_dict, sku, instance, fulfillment_by):
-        """
-        Added by Twinkalc on 30-sep-2020
-        :param amazon_prod_dict : product data dict.
-        :param sku: sku
-        :param  instance : instance recorc
-        :param fulfillment_by : fulfillment_by
-        This method will fine tha amazon product based on instance, sku
-        and fulfillment_by and update the amazon product dict
-        """
-
-        amz_prod_obj = self.env['amazon.product.ept']
-        amz_prod = amz_prod_obj.browse( \
-            amazon_prod_dict.get((sku, instance.id, fulfillment_by), False))
-        if not amz_prod:
-            amz_prod = amz_prod_obj.search([('seller_sku', '=', sku), ('instance_id', '=', instance.id),
-                                            ('fulfillment_by', '=', fulfillment_by)], limit=1)
-            if amz_prod:
-                amazon_prod_dict.update( \
-                    {(sku, instance.id, fulfillment_by): amz_prod.id})
-        return amz_prod
-
-    def find_amazon_vcs_sale_order_ept(self, row, instance, ship_from_country_dict,
-                                       warehouse_country_dict):
-        """
-        Added by Twinkalc on 30-sep-2020
-        :param row : file line data
-        :param ship_from_country_dict: ship from country dict
-        :param  warehouse_country_dict : warehouse data dict based
-        on ship from country
-        This method will find the sale order.
-        return : sale order record.
-        """
-
-        res_country_obj = self.env['res.country']
-        order_id = row.get(ORDER_ID, False)
-        sale_order_obj = self.env['sale.order']
-        stock_warehouse_obj = self.env['stock.warehouse']
-
-        ship_from_country = row.get('Ship From Country', False)
-
-        sale_order = sale_order_obj.search(
-            [('amz_instance_id', '=', instance.id),
-             ('amz_order_reference', '=', order_id)])
-        if len(sale_order) > 1:
-            country = res_country_obj.browse(
-                ship_from_country_dict.get(ship_from_country, False))
-            if not country:
-                country = res_country_obj.search([('code', '=', ship_from_country)], limit=1)
-                if country:
-                    ship_from_country_dict.update({ship_from_country: country.id})
-
-            warehouses = stock_warehouse_obj.browse(warehouse_country_dict.get(country.id, False))
-            if not warehouses:
-                warehouses = stock_warehouse_obj.search([('partner_id.country_id', '=', country.id)])
-                if warehouses:
-                    warehouse_country_dict.update({country.id: warehouses.ids})
-
-            sale_order = sale_order_obj.search([('amz_instance_id', '=', instance.id),
-                                                ('amz_order_reference', '=', order_id),
-                                                ('warehouse_id', 'in', warehouses.ids)],
-                                               limit=1)
-
-        return sale_order
-
     def auto_process_vcs_tax_report(self, args={}):
         """
         This method is used to auto process the vcs tax report.
         """
         seller_id = args.get('seller_id', False)
         if seller_id:
+            resolver = VcsResolverCache(self.env)
             vcs_reports = self.search(
                 [('seller_id', '=', seller_id), ('state', 'in', ['_SUBMITTED_', '_IN_PROGRESS_', '_DONE_'])])
             for report in vcs_reports:
@@ -469,7 +474,7 @@ class VcsTaxReport(models.Model):
                     report.with_context({'is_auto_process': True, 'amz_report_type': 'vcs_tax_report'}).get_report()
                     time.sleep(2)
                 if report.attachment_id:
-                    report.with_context(is_auto_process=True).process_vcs_tax_report_file()
+                    report.with_context(is_auto_process=True).process_vcs_tax_report_file(resolver)
                 self._cr.commit()
                 time.sleep(3)
         return True
@@ -113,6 +113,12 @@ class AmazonConfigSettings(models.TransientModel):
     amz_sales_journal_id = fields.Many2one('account.journal', string='Sales Journal',
                                            domain=[('type', '=', 'sale')])
     amz_fulfillment_latency = fields.Integer('Fulfillment Latency', default=3)
+    amz_feed_max_messages = fields.Integer("Max Messages Per Feed", default=10000)
+    amz_feed_max_size = fields.Integer("Max Feed Size (MB)", default=10)
+    amz_order_item_restore_rate = fields.Float("Order Items Restore Rate", default=0.5, digits=(16, 3))
+    amz_order_item_burst = fields.Integer("Order Items Burst", default=30)
+    amz_concurrent_requests = fields.Integer("Concurrent Requests", default=4)
+    amz_pending_order_batch_size = fields.Integer("Pending Orders Batch Size", default=50)
     amz_outbound_instance_id = fields.Many2one(AMAZON_INSTANCE_EPT,
                                                string='Default Outbound Marketplace',
                                                help="Select Amazon Instance for Outbound Orders.")
@@ -301,6 +307,12 @@ class AmazonConfigSettings(models.TransientModel):
                 seller.sale_journal_id else False
             vals['value'][
                 'amz_fulfillment_latency'] = seller.fulfillment_latency or 0
+            vals['value']['amz_feed_max_messages'] = seller.feed_max_messages
+            vals['value']['amz_feed_max_size'] = seller.feed_max_size
+            vals['value']['amz_order_item_restore_rate'] = seller.amz_order_item_restore_rate
+            vals['value']['amz_order_item_burst'] = seller.amz_order_item_burst
+            vals['value']['amz_concurrent_requests'] = seller.amz_concurrent_requests
+            vals['value']['amz_pending_order_batch_size'] = seller.amz_pending_order_batch_size
             vals['value']['invoice_upload_policy'] = seller.invoice_upload_policy
             vals['value']['amz_upload_refund_invoice'] = seller.amz_upload_refund_invoice
             vals['value']['amz_invoice_report'] = seller.amz_invoice_report.id or False
@@ -529,6 +541,12 @@ class AmazonConfigSettings(models.TransientModel):
                 'sale_journal_id'] = self.amz_sales_journal_id.id if \
                 self.amz_sales_journal_id else False
             vals['fulfillment_latency'] = self.amz_fulfillment_latency or 0
+            vals['feed_max_messages'] = self.amz_feed_max_messages
+            vals['feed_max_size'] = self.amz_feed_max_size
+            vals['amz_order_item_restore_rate'] = self.amz_order_item_restore_rate
+            vals['amz_order_item_burst'] = self.amz_order_item_burst
+            vals['amz_concurrent_requests'] = self.amz_concurrent_requests
+            vals['amz_pending_order_batch_size'] = self.amz_pending_order_batch_size
             vals['invoice_upload_policy'] = self.invoice_upload_policy
             vals['amz_upload_refund_invoice'] = self.amz_upload_refund_invoice
             vals['amz_invoice_report'] = self.amz_invoice_report.id or False
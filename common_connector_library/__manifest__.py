@@ -24,6 +24,7 @@
              'views/sale_workflow_process_view.xml',
              'data/automatic_workflow_data.xml',
              'views/common_log_lines_ept.xml',
+             'views/zip_state_ept.xml',
              ],
     'installable': True,
     'price': 20.00,
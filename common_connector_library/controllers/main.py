@@ -3,32 +3,78 @@
 
 import base64
 import logging
+from werkzeug.http import http_date, parse_date
 from odoo import http
 from odoo.http import request
+from odoo.tools.mimetypes import guess_mimetype
 
 _logger = logging.getLogger(__name__)
 
+IMAGE_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+IMAGE_SIZES = (128, 256, 512, 1024, 1920)
+
 
 class ImageUrl(http.Controller):
 
     @http.route('/lf/i/<string:encodedimage>', type='http', auth='public')
-    def create_image_url(self, encodedimage=''):
+    def create_image_url(self, encodedimage='', size=None):
         """This method is used to get images based on URL which URL set common product images.URL will be generated
             automatically in ERP.
+            The response has an ETag based on the content hash of the image and cache headers, so the
+            marketplaces get 304 Not Modified when they download an unchanged image again. The size
+            parameter returns the image resized to the nearest size of IMAGE_SIZES.
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 18 September 2021 .
             Task_id: 178058
         """
         if encodedimage:
             try:
                 decode_data = base64.urlsafe_b64decode(encodedimage)
-                res_id = str(decode_data, "utf-8")
-                status, headers, content = request.env['ir.http'].sudo().binary_content(
-                    model='common.product.image.ept', id=res_id,
-                    field='image')
-                content_base64 = base64.b64decode(content) if content else ''
-                _logger.info("Image found with status %s", str(status))
-                headers.append(('Content-Length', len(content_base64)))
-                return request.make_response(content_base64, headers)
+                res_id = int(str(decode_data, "utf-8"))
+                image = request.env['common.product.image.ept'].sudo().browse(res_id).exists()
+                if not image or not image.image:
+                    return request.not_found()
+                size = self.get_image_size_ept(size)
+                etag = '%s-%s' % (image.image_hash, size) if size else image.image_hash
+                headers = [('ETag', '"%s"' % etag),
+                           ('Last-Modified', http_date(image.write_date)),
+                           ('Cache-Control', 'public, max-age=%s' % IMAGE_CACHE_MAX_AGE)]
+                if self.is_image_not_modified_ept(etag, image.write_date):
+                    response = request.make_response('', headers)
+                    response.status_code = 304
+                    return response
+                content = image.get_image_content_ept(size)
+                _logger.info("Image found for common image %s", image.id)
+                headers += [('Content-Type', guess_mimetype(content, default='image/png')),
+                            ('Content-Length', len(content))]
+                return request.make_response(content, headers)
             except Exception:
                 return request.not_found()
         return request.not_found()
+
+    @staticmethod
+    def get_image_size_ept(size):
+        """
+        Return the smallest size of IMAGE_SIZES which is not smaller than the requested size, or 0
+        for the original image.
+        """
+        try:
+            size = int(size or 0)
+        except ValueError:
+            return 0
+        if size <= 0:
+            return 0
+        return next((image_size for image_size in IMAGE_SIZES if image_size >= size), 0)
+
+    @staticmethod
+    def is_image_not_modified_ept(etag, write_date):
+        """
+        Check the conditional request headers, If-None-Match is used when it is given, otherwise
+        If-Modified-Since.
+        """
+        httprequest = request.httprequest
+        if httprequest.if_none_match:
+            return httprequest.if_none_match.contains(etag)
+        modified_since = parse_date(httprequest.headers.get('If-Modified-Since'))
+        if modified_since and write_date:
+            return write_date.replace(microsecond=0) <= modified_since.replace(tzinfo=None)
+        return False
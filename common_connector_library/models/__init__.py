@@ -14,6 +14,8 @@ from . import product_attribute_value
 from . import common_log_book_ept
 from . import common_log_lines_ept
 from . import account_fiscal_position
+from . import res_country_group
+from . import zip_state_ept
 from . import common_product_image_ept
 from . import product_template
 from . import account_move
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 # See LICENSE file for full copyright and licensing details.
-from odoo import fields, models, api
+from odoo import fields, models, api, tools
 
 
 class AccountFiscalPosition(models.Model):
@@ -23,6 +23,31 @@ class AccountFiscalPosition(models.Model):
         return self.search_fiscal_position_based_on_origin_country(origin_country_id, country_id, state_id, zipcode,
                                                                    vat_required)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """
+        Clear the cached fiscal positions searched based on origin country.
+        """
+        records = super(AccountFiscalPosition, self).create(vals_list)
+        self.clear_caches()
+        return records
+
+    def write(self, vals):
+        """
+        Clear the cached fiscal positions searched based on origin country.
+        """
+        res = super(AccountFiscalPosition, self).write(vals)
+        self.clear_caches()
+        return res
+
+    def unlink(self):
+        """
+        Clear the cached fiscal positions searched based on origin country.
+        """
+        res = super(AccountFiscalPosition, self).unlink()
+        self.clear_caches()
+        return res
+
     @api.model
     def search_fiscal_position_based_on_origin_country(self, origin_country_id, country_id, state_id, zipcode,
                                                        vat_required):
@@ -30,6 +55,8 @@ class AccountFiscalPosition(models.Model):
         Search fiscal position based on origin country
         Updated by twinkalc on 11 sep 2020 - [changes related to the pass domain of company and is_amazon_fpos]
         [UPD] Check all base conditions for search fiscal position as per base and with origin country.
+        The result is cached per company and search criteria, the cache is cleared when a fiscal
+        position is created, updated or deleted.
         :param origin_country_id: Warehouse-partner-country_id OR Warehouse-company-partner-country_id or False
         :param country_id: delivery country id
         :param state_id: delivery state id
@@ -40,12 +67,27 @@ class AccountFiscalPosition(models.Model):
         """
         if not country_id:
             return False
-        base_domain = [('vat_required', '=', vat_required), ('company_id', 'in', [self.env.company.id, False]),
+        fpos_id = self._get_fpos_id_based_on_origin_country(origin_country_id, country_id, state_id or False,
+                                                            zipcode or False, bool(vat_required),
+                                                            self.env.company.id,
+                                                            self._context.get('is_amazon_fpos', False))
+        return self.browse(fpos_id)
+
+    @api.model
+    @tools.ormcache('origin_country_id', 'country_id', 'state_id', 'zipcode', 'vat_required', 'company_id',
+                    'is_amazon_fpos')
+    def _get_fpos_id_based_on_origin_country(self, origin_country_id, country_id, state_id, zipcode, vat_required,
+                                             company_id, is_amazon_fpos):
+        """
+        Search the fiscal position based on origin country, from the exact country, state and zip
+        match down to the catchall fiscal position, and return its id.
+        :return: fiscal position id or False
+        """
+        base_domain = [('vat_required', '=', vat_required), ('company_id', 'in', [company_id, False]),
                        ('origin_country_ept', 'in', [origin_country_id, False])]
         null_state_dom = state_domain = [('state_ids', '=', False)]
         null_zip_dom = zip_domain = [('zip_from', '=', False), ('zip_to', '=', False)]
         null_country_dom = [('country_id', '=', False), ('country_group_id', '=', False)]
-        is_amazon_fpos = self._context.get('is_amazon_fpos', False)
         if is_amazon_fpos:
             base_domain.append(('is_amazon_fpos', '=', is_amazon_fpos))
         if zipcode:
@@ -70,4 +112,4 @@ class AccountFiscalPosition(models.Model):
         if not fpos:
             # Fallback on catchall (no country, no group)
             fpos = self.search(base_domain + null_country_dom, limit=1)
-        return fpos
+        return fpos.id
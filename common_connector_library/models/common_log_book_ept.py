@@ -55,3 +55,12 @@ class CommonLogBookEpt(models.Model):
                                    "model_id": model_id,
                                    "active": True})
         return log_book_id
+
+    def add_log_line_ept(self, vals):
+        """ Used to add a log line to the log book through the log line buffer, so the line is
+            inserted with the other lines of the transaction without writing the log book.
+            @param vals: Values of log line.
+            @return: True
+        """
+        self.ensure_one()
+        return self.env['common.log.lines.ept'].buffer_log_lines_ept([dict(vals, log_book_id=self.id)])
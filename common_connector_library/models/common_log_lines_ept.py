@@ -2,6 +2,9 @@
 # See LICENSE file for full copyright and licensing details.
 from odoo import models, fields, api
 
+LOG_LINE_BUFFER_KEY = 'common_log_lines_ept.buffer'
+LOG_LINE_BUFFER_SIZE = 1000
+LOG_LINE_MAGIC_COLUMNS = ('id', 'create_uid', 'create_date', 'write_uid', 'write_date')
 
 class CommonLogLineEpt(models.Model):
     _name = "common.log.lines.ept"
@@ -45,7 +48,18 @@ class CommonLogLineEpt(models.Model):
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 23 September 2021 .
             Task_id: 178058
         """
-        vals = {'message': message,
+        vals = self.prepare_log_line_vals_ept(message, model_id, res_id, log_book_id, default_code, order_ref,
+                                              product_id)
+        log_line = self.create(vals)
+        return log_line
+
+    @staticmethod
+    def prepare_log_line_vals_ept(message, model_id, res_id, log_book_id, default_code='', order_ref='',
+                                  product_id=False):
+        """ Used to prepare the values of a log line, the parameters are the ones of create_log_lines.
+            @return: Values of log line.
+        """
+        return {'message': message,
                 'model_id': model_id,
                 'res_id': res_id.id if res_id else False,
                 'log_book_id': log_book_id.id if log_book_id else False,
@@ -53,7 +67,78 @@ class CommonLogLineEpt(models.Model):
                 'order_ref': order_ref,
                 'product_id': product_id
                 }
-        log_line = self.create(vals)
-        return log_line
 
+    def buffer_log_line_ept(self, message, model_id, res_id, log_book_id, default_code='', order_ref='',
+                            product_id=False, vals=None):
+        """ Used to add a log line through the log line buffer instead of creating it, with the
+            parameters of create_log_lines. It is used by the call sites which do not need the
+            created log line.
+            @param vals: Other values of the log line, like the queue line.
+            @return: True
+        """
+        log_line_vals = self.prepare_log_line_vals_ept(message, model_id, res_id, log_book_id, default_code,
+                                                       order_ref, product_id)
+        log_line_vals.update(vals or {})
+        return self.buffer_log_lines_ept([log_line_vals])
+
+    def buffer_log_lines_ept(self, vals_list):
+        """ Used to collect log lines in memory instead of creating them one by one. The buffer is
+            bound to the current transaction, it is flushed with one multi-row insert when it
+            reaches LOG_LINE_BUFFER_SIZE lines, on commit, or as soon as log lines are searched or
+            read. It is dropped with the transaction on rollback, like the lines created directly.
+            The log book itself is not written, so the mail thread of the book is not touched.
+            @param vals_list: List of log line values.
+            @return: True
+        """
+        precommit = self.env.cr.precommit
+        buffer = precommit.data.get(LOG_LINE_BUFFER_KEY)
+        if buffer is None:
+            buffer = precommit.data[LOG_LINE_BUFFER_KEY] = []
+            precommit.add(self.flush_log_line_buffer_ept)
+        buffer.extend(vals_list)
+        log_book_ids = list({vals['log_book_id'] for vals in vals_list if vals.get('log_book_id')})
+        if log_book_ids:
+            # The one2many of the books is read again from the database, which flushes the buffer.
+            self.env['common.log.book.ept'].invalidate_cache(['log_lines'], log_book_ids)
+        if len(buffer) >= LOG_LINE_BUFFER_SIZE:
+            self.flush_log_line_buffer_ept()
+        return True
 
+    def flush_log_line_buffer_ept(self):
+        """ Used to insert the buffered log lines of the transaction with multi-row inserts.
+            Values which can not be written directly in the table, like x2many commands, are created
+            through the ORM.
+            @return: True
+        """
+        buffer = self.env.cr.precommit.data.get(LOG_LINE_BUFFER_KEY)
+        if not buffer:
+            return True
+        vals_list = buffer[:]
+        del buffer[:]
+        field_names = {name for vals in vals_list for name in vals}
+        if any(name in LOG_LINE_MAGIC_COLUMNS or name not in self._fields or not self._fields[name].store or
+               not self._fields[name].column_type for name in field_names):
+            self.create(vals_list)
+            return True
+        defaults = self.default_get([name for name, field in self._fields.items() if field.store and
+                                     field.column_type and name not in LOG_LINE_MAGIC_COLUMNS])
+        columns = sorted(field_names | set(defaults))
+        now = self.env.cr.now()
+        rows = []
+        for vals in vals_list:
+            vals = {name: value.id if isinstance(value, models.BaseModel) else value
+                    for name, value in dict(defaults, **vals).items()}
+            row = [self._fields[name].convert_to_column(vals.get(name), self, vals) for name in columns]
+            rows.append(tuple(row + [self.env.uid, now, self.env.uid, now]))
+        query = 'INSERT INTO "%s" (%s) VALUES ' % (
+            self._table, ', '.join('"%s"' % name for name in columns + list(LOG_LINE_MAGIC_COLUMNS[1:])))
+        for index in range(0, len(rows), LOG_LINE_BUFFER_SIZE):
+            batch = rows[index:index + LOG_LINE_BUFFER_SIZE]
+            self._cr.execute(query + ', '.join(['%s'] * len(batch)), batch)
+        return True
+
+    def flush(self, fnames=None, records=None):
+        """ Used to insert the buffered log lines before the log lines are searched or read.
+        """
+        self.flush_log_line_buffer_ept()
+        return super(CommonLogLineEpt, self).flush(fnames, records)
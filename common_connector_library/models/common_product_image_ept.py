@@ -1,10 +1,67 @@
 # -*- coding: utf-8 -*-
 # See LICENSE file for full copyright and licensing details.
 import base64
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import requests
+from PIL import Image
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+_logger = logging.getLogger(__name__)
+
+IMAGE_TYPES = ["image/jpeg", "image/png", "image/tiff",
+               "image/vnd.microsoft.icon", "image/x-icon",
+               "image/vnd.djvu", "image/svg+xml", "image/gif"]
+IMAGE_DOWNLOAD_BATCH_SIZE = 200
+IMAGE_DOWNLOAD_WORKERS = 8
+IMAGE_DOWNLOAD_CONNECTIONS_PER_HOST = 2
+IMAGE_DOWNLOAD_MAX_ATTEMPTS = 5
+RESIZED_IMAGE_PREFIX = 'common_image_resized_'
+
+
+def get_image_hash_ept(image):
+    """
+    Return the content hash of a base64 encoded image, the sha1 of its bytes like the checksum of
+    the attachments.
+    """
+    if not image:
+        return False
+    return hashlib.sha1(base64.b64decode(image)).hexdigest()
+
+
+def download_images_ept(url_list, max_workers=IMAGE_DOWNLOAD_WORKERS,
+                        connections_per_host=IMAGE_DOWNLOAD_CONNECTIONS_PER_HOST):
+    """
+    Download the images of url_list concurrently, with at most connections_per_host requests in
+    flight to the same host. It runs the requests only, the Odoo environment must not be used here.
+    :param url_list: list of tuple (url, verify)
+    :return: dict {(url, verify): base64 image or False}
+    """
+    host_locks = {}
+    for url, _verify in url_list:
+        host = urlparse(url).netloc
+        if host not in host_locks:
+            host_locks[host] = threading.BoundedSemaphore(connections_per_host)
+
+    def download(url_verify):
+        url, verify = url_verify
+        with host_locks[urlparse(url).netloc]:
+            try:
+                response = requests.get(url, stream=True, verify=verify, timeout=10)
+                if response.status_code == 200 and response.headers.get("Content-Type") in IMAGE_TYPES:
+                    return base64.b64encode(response.content) or False
+            except Exception as error:
+                _logger.info("Error when downloading the image %s: %s", url, error)
+        return False
+
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        return dict(zip(url_list, executor.map(download, url_list)))
+
 
 class ProductImageEpt(models.Model):
     _name = 'common.product.image.ept'
@@ -17,6 +74,21 @@ class ProductImageEpt(models.Model):
     image = fields.Image()
     url = fields.Char(string="Image URL", help="External URL of image")
     sequence = fields.Integer(help="Sequence of images.", index=True, default=10)
+    image_hash = fields.Char(compute="_compute_image_hash", store=True, index=True, copy=False,
+                             help="Content hash of the image, images having the same hash are not stored again.")
+    download_url = fields.Char(copy=False, help="URL of the image which is not downloaded yet.")
+    download_verify = fields.Boolean(copy=False, help="Verify the SSL certificate when downloading the image.")
+    download_attempts = fields.Integer(copy=False, help="Number of failed downloads of the image URL.")
+    download_failed = fields.Boolean(copy=False, help="The image URL could not be downloaded after "
+                                                      "the maximum number of attempts.")
+
+    @api.depends('image')
+    def _compute_image_hash(self):
+        """
+        Compute the content hash of the image.
+        """
+        for record in self:
+            record.image_hash = get_image_hash_ept(record.image)
 
     @api.model
     def get_image_ept(self, url, verify=False):
@@ -26,11 +98,8 @@ class ProductImageEpt(models.Model):
         @param url: URL added in field.
         Migration done by Haresh Mori on September 2021
         """
-        image_types = ["image/jpeg", "image/png", "image/tiff",
-                       "image/vnd.microsoft.icon", "image/x-icon",
-                       "image/vnd.djvu", "image/svg+xml", "image/gif"]
         response = requests.get(url, stream=True, verify=verify, timeout=10)
-        if response.status_code == 200 and response.headers["Content-Type"] in image_types:
+        if response.status_code == 200 and response.headers["Content-Type"] in IMAGE_TYPES:
             image = base64.b64encode(response.content)
             if image:
                 return image
@@ -51,20 +120,132 @@ class ProductImageEpt(models.Model):
     def create(self, vals):
         """
         Inherited for adding image from URL.
+        The image of the URL is downloaded later by the scheduler, so the record is created without
+        waiting for the image host. Pass sync_image_download in the context to download it now.
         @author: Maulik Barad on date 13-Dec-2019.
         Migration done by Haresh Mori on September 2021
         """
         verify = False
         ir_config_parameter_obj = self.env['ir.config_parameter']
+        download_later = False
         if not vals.get("image", False) and vals.get("url", ""):
             if 'ssl_verify' in list(self.env.context.keys()):
                 verify = True
-            image = self.get_image_ept(vals.get("url"), verify=verify)
-            vals.update({"image": image})
+            if self.env.context.get('sync_image_download'):
+                image = self.get_image_ept(vals.get("url"), verify=verify)
+                vals.update({"image": image})
+            else:
+                vals.update({"download_url": vals.get("url"), "download_verify": verify})
+                download_later = True
         record = super(ProductImageEpt, self).create(vals)
 
         base_url = ir_config_parameter_obj.sudo().get_param('web.base.url')
         rec_id = str(record.id)
         url = base_url + '/lf/i/%s' % (base64.urlsafe_b64encode(rec_id.encode("utf-8")).decode("utf-8"))
         record.write({'url': url})
+        if download_later:
+            cron = self.env.ref('common_connector_library.ir_cron_download_product_images_ept',
+                                raise_if_not_found=False)
+            if cron:
+                cron._trigger()
         return record
+
+    def write(self, vals):
+        """
+        Inherited for not storing the image again when its content is not changed.
+        An image given by the user stops the pending download of the image URL.
+        """
+        if vals.get("image", False) and self and \
+                all(record.image_hash == get_image_hash_ept(vals.get("image")) for record in self):
+            vals = dict(vals)
+            del vals["image"]
+            if not vals:
+                return True
+        if "image" in vals and vals["image"] and not self._context.get('image_download_ept'):
+            vals = dict(vals, download_url=False, download_attempts=0, download_failed=False)
+        if "image" in vals:
+            self.env['ir.attachment'].sudo().search([('res_model', '=', self._name), ('res_id', 'in', self.ids),
+                                                     ('name', '=like', RESIZED_IMAGE_PREFIX + '%')]).unlink()
+        return super(ProductImageEpt, self).write(vals)
+
+    def get_image_content_ept(self, size=0):
+        """
+        Return the bytes of the image resized to fit in size x size pixels. The resized image is
+        generated once and stored as an attachment of the common image.
+        @param size: Maximum width and height, 0 for the original image.
+        @return: Bytes of the image.
+        """
+        content = base64.b64decode(self.image)
+        if not size:
+            return content
+        attachment_obj = self.env['ir.attachment'].sudo()
+        name = '%s%s_%s' % (RESIZED_IMAGE_PREFIX, self.image_hash, size)
+        attachment = attachment_obj.search([('res_model', '=', self._name), ('res_id', '=', self.id),
+                                            ('name', '=', name)], limit=1)
+        if attachment:
+            return attachment.raw
+        try:
+            pil_image = Image.open(io.BytesIO(content))
+            if max(pil_image.size) <= size:
+                return content
+            image_format = pil_image.format
+            pil_image.thumbnail((size, size))
+            output = io.BytesIO()
+            pil_image.save(output, format=image_format)
+        except Exception as error:
+            _logger.info("Unable to resize the common image %s: %s", self.id, error)
+            return content
+        attachment_obj.create({'name': name, 'res_model': self._name, 'res_id': self.id,
+                               'raw': output.getvalue()})
+        return output.getvalue()
+
+    @api.model
+    def find_image_by_content_ept(self, image, template_id=False, product_id=False):
+        """
+        Search the common image of the template or the variant having the same content.
+        @param image: base64 encoded image.
+        @param template_id: Id of the product template.
+        @param product_id: Id of the product variant.
+        @return: common.product.image.ept()
+        """
+        image_hash = get_image_hash_ept(image)
+        if not image_hash:
+            return self.browse()
+        return self.search([('image_hash', '=', image_hash), ('template_id', '=', template_id),
+                            ('product_id', '=', product_id)], limit=1)
+
+    @api.model
+    def download_pending_images_ept(self):
+        """
+        Scheduler to download the images of the URLs given when the common images were created. The
+        images are downloaded concurrently with a limited number of connections per host. The URLs
+        which can not be downloaded are retried with the next runs, after IMAGE_DOWNLOAD_MAX_ATTEMPTS
+        failures the image is marked as failed.
+        The images are written with the image_download_ept context, so the connectors keep the links
+        of their image layers, only the content of the image is changed.
+        """
+        pending_images = self.search([('download_url', '!=', False), ('download_failed', '=', False)],
+                                     order='download_attempts, id', limit=IMAGE_DOWNLOAD_BATCH_SIZE)
+        if not pending_images:
+            return True
+        url_list = list({(record.download_url, record.download_verify) for record in pending_images})
+        images = download_images_ept(url_list)
+        for record in pending_images:
+            image = images.get((record.download_url, record.download_verify), False)
+            if image:
+                record.with_context(image_download_ept=True).write({'download_url': False, 'image': image,
+                                                                    'download_attempts': 0})
+                continue
+            attempts = record.download_attempts + 1
+            vals = {'download_attempts': attempts}
+            if attempts >= IMAGE_DOWNLOAD_MAX_ATTEMPTS:
+                _logger.warning("Can't find image of URL %s for the common image %s after %s attempts, the "
+                                "download is stopped.", record.download_url, record.id, attempts)
+                vals.update({'download_failed': True})
+            else:
+                _logger.info("Can't find image of URL %s for the common image %s.", record.download_url, record.id)
+            record.with_context(image_download_ept=True).write(vals)
+        if len(pending_images) >= IMAGE_DOWNLOAD_BATCH_SIZE and \
+                self.search_count([('download_url', '!=', False), ('download_attempts', '=', 0)]):
+            self.env.ref('common_connector_library.ir_cron_download_product_images_ept')._trigger()
+        return True
@@ -41,6 +41,35 @@ class ProductPricelist(models.Model):
             pricelist_item = pricelist_item_obj.create(new_vals)
         return pricelist_item
 
+    def set_product_prices_ept(self, product_price_dict, min_qty=1):
+        """ Use to Create/Update the price of several products in the pricelist with one search
+            and one create.
+            @param product_price_dict: Dictionary {product id: price}
+            @return: Records of pricelist item.
+        """
+        pricelist_item_obj = self.env['product.pricelist.item']
+        pricelist_items = pricelist_item_obj.search([('pricelist_id', '=', self.id),
+                                                     ('product_id', 'in', list(product_price_dict)),
+                                                     ('min_quantity', '=', min_qty)])
+        price_wise_items = {}
+        for pricelist_item in pricelist_items:
+            price = product_price_dict.get(pricelist_item.product_id.id)
+            if pricelist_item.fixed_price != price:
+                price_wise_items.setdefault(price, pricelist_item_obj)
+                price_wise_items[price] |= pricelist_item
+        for price, items in price_wise_items.items():
+            items.write({'fixed_price': price})
+        vals_list = []
+        for product_id in set(product_price_dict) - set(pricelist_items.product_id.ids):
+            vals = self.prepre_pricelistitem_vals(product_id, min_qty, product_price_dict[product_id])
+            new_record = pricelist_item_obj.new(vals)
+            new_record._onchange_product_id()
+            vals_list.append(pricelist_item_obj._convert_to_write(
+                {name: new_record[name] for name in new_record._cache}))
+        if vals_list:
+            pricelist_items |= pricelist_item_obj.create(vals_list)
+        return pricelist_items
+
     def prepre_pricelistitem_vals(self, product_id, min_qty, price):
         """ Use to preapre a vals of pricelist item.
             @return: Vals of pricelist item.
@@ -51,26 +51,38 @@ class ProductProduct(models.Model):
         """
         res = super(ProductProduct, self).create(vals)
         if vals.get("image_1920", False) and res:
-            image_vals = res.prepare_common_image_vals(vals)
-            self.env["common.product.image.ept"].create(image_vals)
+            res.create_common_image_ept(vals)
         return res
 
     def write(self, vals):
         """
-        Inherited for adding the main image in common images.
+        Inherited for adding the main image in common images, the image is not added again when its
+        content is already in the common images of the variant.
         @author: Maulik Barad on Date 13-Dec-2019.
         Migration done by Haresh Mori September 2021
         """
         res = super(ProductProduct, self).write(vals)
         if vals.get("image_1920", False) and self:
-            common_product_image_obj = self.env["common.product.image.ept"]
             for record in self:
-                if vals.get("image_1920"):
-                    image_vals = record.prepare_common_image_vals(vals)
-                    common_product_image_obj.create(image_vals)
+                record.create_common_image_ept(vals)
 
         return res
 
+    def create_common_image_ept(self, vals):
+        """
+        Creates the common image of the main image of the variant, unless the variant already has a
+        common image with the same content.
+        @param vals: Vals having image data.
+        @return: Record of common product image.
+        """
+        common_product_image_obj = self.env["common.product.image.ept"]
+        common_image = common_product_image_obj.find_image_by_content_ept(vals.get("image_1920"),
+                                                                           self.product_tmpl_id.id, self.id)
+        if not common_image:
+            image_vals = self.prepare_common_image_vals(vals)
+            common_image = common_product_image_obj.create(image_vals)
+        return common_image
+
     def get_products_based_on_movement_date_ept(self, from_datetime, company):
         """ This method is used to get product records which stock movement updates after from date.
             @param from_datetime: Date
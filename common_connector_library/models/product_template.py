@@ -32,21 +32,32 @@ class ProductTemplate(models.Model):
         """
         res = super(ProductTemplate, self).create(vals)
         if vals.get("image_1920", False) and res:
-            image_vals = res.prepare_template_common_image_vals(vals)
-            self.env["common.product.image.ept"].with_context(main_image=True).create(image_vals)
+            res.create_template_common_image_ept(vals)
         return res
 
     def write(self, vals):
         """
-        Inherited for adding the main image in common images.
+        Inherited for adding the main image in common images, the image is not added again when its
+        content is already in the common images of the template.
         @author: Maulik Barad on Date 13-Dec-2019.
         Migration done by Haresh Mori on September 2021
         """
         res = super(ProductTemplate, self).write(vals)
         if vals.get("image_1920", False) and self:
-            common_product_image_obj = self.env["common.product.image.ept"]
             for record in self:
-                if vals.get("image_1920"):
-                    image_vals = record.prepare_template_common_image_vals(vals)
-                    common_product_image_obj.with_context(main_image=True).create(image_vals)
+                record.create_template_common_image_ept(vals)
         return res
+
+    def create_template_common_image_ept(self, vals):
+        """
+        Creates the common image of the main image of the template, unless the template already has
+        a common image with the same content.
+        @param vals: Vals having image data.
+        @return: Record of common product image.
+        """
+        common_product_image_obj = self.env["common.product.image.ept"]
+        common_image = common_product_image_obj.find_image_by_content_ept(vals.get("image_1920"), self.id)
+        if not common_image:
+            image_vals = self.prepare_template_common_image_vals(vals)
+            common_image = common_product_image_obj.with_context(main_image=True).create(image_vals)
+        return common_image
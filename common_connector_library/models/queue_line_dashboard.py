@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 # See LICENSE file for full copyright and licensing details.
-from odoo import models
+from datetime import datetime, time, timedelta
+from odoo import models, fields
+
+DASHBOARD_STATES = ['draft', 'done', 'failed', 'cancel']
+DASHBOARD_DURATIONS = ['all', 'today', 'yesterday']
 
 
 class QueueLineDashboard(models.AbstractModel):
@@ -13,36 +17,72 @@ class QueueLineDashboard(models.AbstractModel):
     def get_data(self, **kwargs):
         """
         This method is use to prepare data for the queue line dashboard.
+        The counts are computed with one grouped query, the queue lines are searched with the domain
+        only when the user opens a counter.
         @param table: Table name of queue line like order_data_queue_line_ept
         @return dashboard_data: It will return the list of data like
-        [{'state': {'duration': [len of record, [queue_line_ids]]}},]
+        [{'state': {'duration': [count of records, domain of queue lines]}},]
         """
-        table = kwargs.get('table', '').replace('.', '_')
+        model = kwargs.get('table', '')
+        table = model.replace('.', '_')
+        today = datetime.combine(fields.Date.today(), time.min)
+        today_str = fields.Datetime.to_string(today)
+        yesterday_str = fields.Datetime.to_string(today - timedelta(days=1))
+        date_domains = {'all': [],
+                        'today': [('create_date', '>=', today_str)],
+                        'yesterday': [('create_date', '>=', yesterday_str), ('create_date', '<', today_str)]}
+        base_domain = self._prepare_domain(table)
+        counts = self._prepare_counts(table, today)
         data = dict()
-        for duration in ['all', 'today', 'yesterday']:
-            count, all_ids = 0, list()
-            for state in ['draft', 'done', 'failed', 'cancel']:
+        for duration in DASHBOARD_DURATIONS:
+            count = 0
+            for state in DASHBOARD_STATES:
                 key = f"{duration}_{state}"
-                line_ids = self._prepare_query(duration, state, table)
-                count += len(line_ids)
-                all_ids += line_ids
-                data.update({key: [len(line_ids), line_ids]})
-            data.update({duration: [count, all_ids]})
-        data.update({'model': kwargs.get('table')})
+                state_count = counts.get(state, {}).get(duration, 0)
+                count += state_count
+                data.update({key: [state_count, base_domain + [('state', '=', state)] + date_domains[duration]]})
+            data.update({duration: [count, base_domain + [('state', 'in', DASHBOARD_STATES)] +
+                                    date_domains[duration]]})
+        data.update({'model': model})
         return data
 
-    def _prepare_query(self, duration, state, table):
+    def _prepare_counts(self, table, today):
+        """
+        Count the queue lines of the table per state for all the durations with one grouped query.
+        @param table: Table name of queue line.
+        @param today: Beginning of today.
+        @return: dict {state: {duration: count}}
+        """
+        join_clause, where_clause, params = self._prepare_query(table)
+        params.update({'states': tuple(DASHBOARD_STATES), 'today': today, 'yesterday': today - timedelta(days=1)})
         qry = f"""
-        SELECT 
-            id 
-            FROM {table} 
-            WHERE 
-                state = '{state}'
-        """
-        if duration == 'today':
-            qry += " AND create_date >= CURRENT_DATE"
-        elif duration == 'yesterday':
-            qry += " AND create_date BETWEEN CURRENT_DATE - INTERVAL '1' DAY AND CURRENT_DATE"
-        self._cr.execute(qry)
-        line_ids = self._cr.dictfetchall()
-        return [line_id.get('id') for line_id in line_ids]
+        SELECT
+            line.state,
+            count(*) AS all_count,
+            count(*) FILTER (WHERE line.create_date >= %(today)s) AS today_count,
+            count(*) FILTER (WHERE line.create_date >= %(yesterday)s AND line.create_date < %(today)s)
+                AS yesterday_count
+            FROM {table} AS line {join_clause}
+            WHERE
+                line.state IN %(states)s {where_clause}
+            GROUP BY line.state
+        """
+        self._cr.execute(qry, params)
+        return {row.get('state'): {duration: row.get(f"{duration}_count", 0) for duration in DASHBOARD_DURATIONS}
+                for row in self._cr.dictfetchall()}
+
+    def _prepare_query(self, table):
+        """
+        Hook to restrict the queue lines of the table which are counted in the dashboard.
+        @param table: Table name of queue line.
+        @return: join clause, where clause starting with AND, and their query parameters
+        """
+        return '', '', {}
+
+    def _prepare_domain(self, table):
+        """
+        Hook giving the domain of the queue lines counted by _prepare_query.
+        @param table: Table name of queue line.
+        @return: domain
+        """
+        return []
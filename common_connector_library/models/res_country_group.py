@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+# See LICENSE file for full copyright and licensing details.
+from odoo import models
+
+
+class ResCountryGroup(models.Model):
+    _inherit = 'res.country.group'
+
+    def write(self, vals):
+        """
+        Clear the cached fiscal positions searched based on origin country, when the countries of
+        a group are changed.
+        """
+        res = super(ResCountryGroup, self).write(vals)
+        if 'country_ids' in vals:
+            self.clear_caches()
+        return res
@@ -76,6 +76,9 @@ class ResPartner(models.Model):
             country = self.get_country(country_code)
         else:
             country = country_obj
+        if country:
+            return self.resolve_states_ept([(country, zip_code, state_name_or_code)]).get(
+                (country, zip_code, state_name_or_code), res_country_obj)
         state = res_country_obj.search(['|', ('name', '=ilike', state_name_or_code),
                                         ('code', '=ilike', state_name_or_code),
                                         ('country_id', '=', country.id)], limit=1)
@@ -84,9 +87,44 @@ class ResPartner(models.Model):
             state = self.get_state_from_api(country_code, zip_code, country)
         return state
 
+    def resolve_states_ept(self, state_triples):
+        """
+        This method finds the states of all the addresses of an import batch in one pass. States are
+        searched by name or code, then by the postal code dataset, and only the postal codes which
+        are still unknown are requested to the zippopotam api.
+        @param state_triples: Iterable of tuple (res.country(), zip code, state name or code).
+        @return: dict {(res.country(), zip code, state name or code): res.country.state()}
+        """
+        zip_state_obj = self.env['zip.state.ept']
+        state_triples = {triple for triple in state_triples if triple[0]}
+        countries = self.env['res.country'].browse({triple[0].id for triple in state_triples})
+        states = zip_state_obj.get_country_states_dict_ept(countries)
+        result = {}
+        pending_triples = []
+        for triple in state_triples:
+            country, zip_code, state_name_or_code = triple
+            state = states.get((country.id, (state_name_or_code or '').lower()), False)
+            if state:
+                result[triple] = state
+            elif zip_state_obj.normalize_zip_code_ept(zip_code):
+                pending_triples.append(triple)
+            else:
+                result[triple] = self.env['res.country.state']
+
+        zip_states = zip_state_obj.get_zip_states_ept(
+            (triple[0].id, zip_state_obj.normalize_zip_code_ept(triple[1])) for triple in pending_triples)
+        for triple in pending_triples:
+            country, zip_code = triple[0], triple[1]
+            key = (country.id, zip_state_obj.normalize_zip_code_ept(zip_code))
+            if key not in zip_states:
+                zip_states[key] = self.get_state_from_api(country.code, zip_code, country)
+            result[triple] = zip_states[key]
+        return result
+
     def get_state_from_api(self, country_code, zip_code, country):
         """
         This method tries to find state from country and zip code from zippopotam api.
+        The found state is stored in the postal code dataset, so it is not requested again.
         @param country_code: Code of country.
         @param zip_code: Zip code.
         @param country: Record of Country.
@@ -96,9 +134,10 @@ class ResPartner(models.Model):
         """
         state_obj = state = self.env['res.country.state']
         country_obj = self.env['res.country']
+        zip_state_obj = self.env['zip.state.ept']
         try:
             url = 'https://api.zippopotam.us/' + country_code + '/' + zip_code.split('-')[0]
-            response = requests.get(url)
+            response = requests.get(url, timeout=10)
             response = ast.literal_eval(response.content.decode('utf-8'))
         except Exception as error:
             logger.info("Error when a request for state: %s", error)
@@ -124,6 +163,8 @@ class ResPartner(models.Model):
             if not state and state_code:
                 state = state_obj.create({'name': state_name, 'code': state_code,
                                           'country_id': country.id})
+            zip_key = (country.id, zip_state_obj.normalize_zip_code_ept(zip_code))
+            zip_state_obj.store_zip_states_ept({zip_key: state.id}, source='api')
         return state
 
     @api.model
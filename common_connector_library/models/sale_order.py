@@ -2,10 +2,13 @@
 # See LICENSE file for full copyright and licensing details.
 import logging
 from odoo import models, api, fields, _
+from odoo.tools import html_keep_url, is_html_empty
 from odoo.tools.misc import format_date
 
 _logger = logging.getLogger(__name__)
 
+PENDING_AUTO_INVOICE_BATCH_SIZE = 200
+
 
 class SaleOrder(models.Model):
     _inherit = "sale.order"
@@ -20,40 +23,75 @@ class SaleOrder(models.Model):
                                                                 ("sale_line_id", "in", self.order_line.ids)])
 
     auto_workflow_process_id = fields.Many2one("sale.workflow.process.ept", string="Workflow Process", copy=False)
+    pending_auto_invoice_ept = fields.Boolean("Pending Auto Invoice", copy=False, index=True,
+                                              help="The order is waiting for the scheduler to create its invoices "
+                                                   "of the delivered products.")
     moves_count = fields.Integer(compute="_compute_stock_move", string="Stock Move", store=False,
                                  help="Stock Move Count for Orders without Picking.")
 
-    def create_sales_order_vals_ept(self, vals):
+    def create_sales_order_vals_ept(self, vals, vals_cache=None):
         """
         @param vals: Vals of sale order.
-        @return: Vals of sales order after call onchange method.
+        @param vals_cache: Dictionary shared by the orders of an import batch, the values which only
+        depend on the partners, the warehouse and the company are computed once per combination.
+        @return: Vals of sales order, the same values as the partner and shipping address onchange methods
+        give, prepared without creating virtual records.
         Migration done by Haresh Mori on September 2021
         """
-        sale_order = self.env['sale.order']
-        order_vals = {
-            'company_id': vals.get('company_id', False),
-            'partner_id': vals.get('partner_id', False),
-            'partner_invoice_id': vals.get('partner_invoice_id', False),
-            'partner_shipping_id': vals.get('partner_shipping_id', False),
-            'warehouse_id': vals.get('warehouse_id', False),
-        }
-
-        new_record = sale_order.new(order_vals)
-        # Return Pricelist- Payment terms- Invoice address- Delivery address
-        new_record.onchange_partner_id()
-        order_vals = sale_order._convert_to_write({name: new_record[name] for name in new_record._cache})
-
-        # Return Fiscal Position
-        order_vals.update({'partner_shipping_id': vals.get('partner_shipping_id', False)})
-        new_record = sale_order.new(order_vals)
-        new_record.onchange_partner_shipping_id()
-        order_vals = sale_order._convert_to_write({name: new_record[name] for name in new_record._cache})
+        key = (vals.get('partner_id', False), vals.get('partner_invoice_id', False),
+               vals.get('partner_shipping_id', False), vals.get('warehouse_id', False), vals.get('company_id', False))
+        order_vals = vals_cache.get(key) if vals_cache is not None else None
+        if order_vals is None:
+            order_vals = self.prepare_order_partner_vals_ept(*key)
+            if vals_cache is not None:
+                vals_cache[key] = order_vals
+        order_vals = dict(order_vals)
 
         fpos = order_vals.get('fiscal_position_id') or vals.get('fiscal_position_id', False)
         new_vals = self.prepare_order_vals_after_onchange_ept(vals, fpos)
         order_vals.update(new_vals)
         return order_vals
 
+    def prepare_order_partner_vals_ept(self, partner_id, partner_invoice_id, partner_shipping_id, warehouse_id,
+                                       company_id):
+        """ This method is used to prepare the order values which the onchange of partner and shipping address
+            give: salesperson, terms and conditions and fiscal position. Pricelist, payment term, addresses and
+            sales team are always taken from the values of the connector.
+            @return: Dictionary of order values.
+        """
+        partner = self.env['res.partner'].browse(partner_id)
+        company = self.env['res.company'].browse(company_id)
+        order_vals = {
+            'company_id': company_id,
+            'partner_id': partner_id,
+            'partner_invoice_id': partner_invoice_id,
+            'partner_shipping_id': partner_shipping_id,
+            'warehouse_id': warehouse_id,
+            'fiscal_position_id': False,
+        }
+        if not partner:
+            return order_vals
+        self = self.with_company(company)
+        partner_user = partner.user_id or partner.commercial_partner_id.user_id
+        user_id = partner_user.id
+        if not self.env.context.get('not_self_saleperson'):
+            user_id = user_id or self.env.context.get('default_user_id', self.env.uid)
+        if user_id:
+            order_vals['user_id'] = user_id
+        if self.env['ir.config_parameter'].sudo().get_param('account.use_invoice_terms'):
+            if self.env.company.terms_type == 'html' and self.env.company.invoice_terms_html:
+                baseurl = html_keep_url(self.get_base_url() + '/terms')
+                order_vals['note'] = _('Terms & Conditions: %s', baseurl)
+            elif not is_html_empty(self.env.company.invoice_terms):
+                order_vals['note'] = self.with_context(lang=partner.lang).env.company.invoice_terms
+
+        shipping_partner = self.env['res.partner'].browse(partner_shipping_id)
+        fiscal_position = self.env['account.fiscal.position'].get_fiscal_position(partner_id, partner_shipping_id)
+        fiscal_position = self.prepare_fiscal_position_by_warehouse_ept(
+            partner, shipping_partner, self.env['stock.warehouse'].browse(warehouse_id), fiscal_position)
+        order_vals['fiscal_position_id'] = fiscal_position.id
+        return order_vals
+
     def prepare_order_vals_after_onchange_ept(self, vals, fpos):
         """ This method is used to prepare order vals after onchange methods call..
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 21 September 2021 .
@@ -97,19 +135,24 @@ class SaleOrder(models.Model):
         """
         This method will give fiscal position from warehouse.
         """
-        fiscal_position = self.fiscal_position_id
-        warehouse = self.warehouse_id
+        return self.prepare_fiscal_position_by_warehouse_ept(self.partner_id, self.partner_shipping_id,
+                                                             self.warehouse_id, self.fiscal_position_id)
 
-        if warehouse and self.partner_id and self.partner_id.allow_search_fiscal_based_on_origin_warehouse:
+    def prepare_fiscal_position_by_warehouse_ept(self, partner, shipping_partner, warehouse, fiscal_position):
+        """
+        This method will give fiscal position from warehouse for given partners, the fiscal position is
+        returned as it is when the partner does not search the fiscal position based on origin warehouse.
+        """
+        if warehouse and partner and partner.allow_search_fiscal_based_on_origin_warehouse:
             origin_country_id = warehouse.partner_id and warehouse.partner_id.country_id and \
                                 warehouse.partner_id.country_id.id or False
             origin_country_id = origin_country_id or (warehouse.company_id.partner_id.country_id
                                                       and warehouse.company_id.partner_id.country_id.id or False)
-            is_amz_customer = getattr(self.partner_id, 'is_amz_customer', False)
+            is_amz_customer = getattr(partner, 'is_amz_customer', False)
 
             fiscal_position = self.env['account.fiscal.position'].with_context(
                 {'origin_country_ept': origin_country_id, 'is_amazon_fpos': is_amz_customer}).with_company(
-                warehouse.company_id.id).get_fiscal_position(self.partner_id.id, self.partner_shipping_id.id)
+                warehouse.company_id.id).get_fiscal_position(partner.id, shipping_partner.id)
 
         return fiscal_position
 
@@ -163,8 +206,10 @@ class SaleOrder(models.Model):
     def process_orders_and_invoices_ept(self):
         """
         This method will confirm sale orders, create and paid related invoices.
+        The invoices of the orders having the same workflow are processed together.
         Migration done by Haresh Mori on September 2021
         """
+        workflow_orders = {}
         for order in self:
             work_flow_process_record = order.auto_workflow_process_id
 
@@ -178,42 +223,98 @@ class SaleOrder(models.Model):
                 order.order_line) != len(order_lines.filtered(lambda l: l.product_id.type in ['service', 'consu'])):
                 continue
 
-            order.validate_and_paid_invoices_ept(work_flow_process_record)
+            workflow_orders[work_flow_process_record] = workflow_orders.get(work_flow_process_record,
+                                                                            self.browse()) | order
+        for work_flow_process_record, orders in workflow_orders.items():
+            orders.validate_and_paid_invoices_ept(work_flow_process_record)
+        return True
+
+    def process_pending_auto_invoices_ept(self):
+        """
+        Scheduler to create, validate and pay the invoices of the orders whose pickings were validated
+        with a workflow invoicing the deliveries in background. The orders already invoiced are
+        skipped, the orders of a workflow are invoiced together and when it fails they are invoiced
+        one by one, so the order which can not be invoiced gets the error in its chatter.
+        @return: True
+        """
+        orders = self.search([('pending_auto_invoice_ept', '=', True)], limit=PENDING_AUTO_INVOICE_BATCH_SIZE)
+        if not orders:
+            return True
+        invoiced_orders = orders.filtered(lambda order: order.invoice_status == 'invoiced')
+        invoiced_orders.write({'pending_auto_invoice_ept': False})
+        workflow_orders = {}
+        for order in orders - invoiced_orders:
+            work_flow_process_record = order.auto_workflow_process_id
+            workflow_orders[work_flow_process_record] = workflow_orders.get(work_flow_process_record,
+                                                                            self.browse()) | order
+        for work_flow_process_record, workflow_order_ids in workflow_orders.items():
+            try:
+                with self._cr.savepoint():
+                    workflow_order_ids.validate_and_paid_invoices_ept(work_flow_process_record)
+            except Exception:
+                for order in workflow_order_ids:
+                    try:
+                        with self._cr.savepoint():
+                            order.validate_and_paid_invoices_ept(work_flow_process_record)
+                    except Exception as error:
+                        _logger.info("Invoice of order %s is not created: %s", order.name, error)
+                        order.message_post(body=_("Invoice is not created by the auto workflow: %s") % error)
+            workflow_order_ids.write({'pending_auto_invoice_ept': False})
+            self._cr.commit()
+        if len(orders) >= PENDING_AUTO_INVOICE_BATCH_SIZE:
+            self.env.ref('common_connector_library.ir_cron_pending_auto_invoice_ept')._trigger()
         return True
 
     def validate_and_paid_invoices_ept(self, work_flow_process_record):
         """
         This method will create invoices, validate it and register payment it, according to the configuration in
         workflow sets in quotation.
+        The invoices of all the orders are created with one call, one invoice per order, and posted together.
         :param work_flow_process_record:
         :return: It will return boolean.
         Migration done by Haresh Mori on September 2021
         """
-        self.ensure_one()
-        if work_flow_process_record.create_invoice:
-            if work_flow_process_record.invoice_date_is_order_date:
-                fiscalyear_lock_date = self.company_id._get_user_fiscal_lock_date()
-                if self.date_order.date() <= fiscalyear_lock_date:
-                    log_book_id = self._context.get('log_book_id')
-                    if log_book_id:
-                        message = "You cannot create invoice for order (%s) " \
-                                  "prior to and inclusive of the lock date %s. " \
-                                  "So, order is created but invoice is not created." % (self.name, format_date(
-                            self.env, fiscalyear_lock_date))
-                        self.env['common.log.lines.ept'].create({
-                            'message': message,
-                            'order_ref': self.name,
-                            'log_book_id': log_book_id
-                        })
-                        _logger.info(message)
-                    return True
-            ctx = self._context.copy()
-            if work_flow_process_record.sale_journal_id:
-                ctx.update({'journal_ept': work_flow_process_record.sale_journal_id})
-            invoices = self._create_invoices()
-            self.validate_invoice_ept(invoices)
-            if work_flow_process_record.register_payment:
-                self.paid_invoice_ept(invoices)
+        if not work_flow_process_record.create_invoice:
+            return True
+        orders = self
+        if work_flow_process_record.invoice_date_is_order_date:
+            orders = self.filter_orders_by_fiscal_lock_date_ept()
+        if not orders:
+            return True
+        invoices = orders._create_invoices(grouped=True)
+        orders.validate_invoice_ept(invoices)
+        if work_flow_process_record.register_payment:
+            orders.paid_invoice_ept(invoices)
+        return True
+
+    def filter_orders_by_fiscal_lock_date_ept(self):
+        """
+        This method will return the orders which can be invoiced on their order date, the orders prior to and
+        inclusive of the fiscal lock date of their company are logged in the log book of the context.
+        :return: sale.order()
+        """
+        lock_dates = {}
+        orders = self.browse()
+        log_book_id = self._context.get('log_book_id')
+        for order in self:
+            if order.company_id not in lock_dates:
+                lock_dates[order.company_id] = order.company_id._get_user_fiscal_lock_date()
+            fiscalyear_lock_date = lock_dates[order.company_id]
+            if order.date_order.date() > fiscalyear_lock_date:
+                orders |= order
+                continue
+            if log_book_id:
+                message = "You cannot create invoice for order (%s) " \
+                          "prior to and inclusive of the lock date %s. " \
+                          "So, order is created but invoice is not created." % (order.name, format_date(
+                    self.env, fiscalyear_lock_date))
+                self.env['common.log.lines.ept'].create({
+                    'message': message,
+                    'order_ref': order.name,
+                    'log_book_id': log_book_id
+                })
+                _logger.info(message)
+        return orders
 
     def validate_invoice_ept(self, invoices):
         """
@@ -221,37 +322,48 @@ class SaleOrder(models.Model):
         @param invoices: Recordset of Invoice.
         Migration done by Haresh Mori on September 2021
         """
-        self.ensure_one()
-        for invoice in invoices:
-            invoice.action_post()
+        if invoices:
+            invoices.action_post()
         return True
 
     def paid_invoice_ept(self, invoices):
         """
         This method auto paid invoice based on auto workflow method.
+        The payments of all the invoices are created and posted together, then reconciled with their invoice.
         @author: Dipesh Tanna
         @param invoices: Recordset of Invoice.
         Migration done by Haresh Mori on September 2021
         """
-        self.ensure_one()
         account_payment_obj = self.env['account.payment']
-        for invoice in invoices:
-            if invoice.amount_residual:
-                vals = invoice.prepare_payment_dict(self.auto_workflow_process_id)
-                payment_id = account_payment_obj.create(vals)
-                payment_id.action_post()
-                self.reconcile_payment_ept(payment_id, invoice)
+        invoices = invoices.filtered(lambda invoice: invoice.amount_residual)
+        if not invoices:
+            return True
+        vals_list = [invoice.prepare_payment_dict(self.get_invoice_order_ept(invoice).auto_workflow_process_id)
+                     for invoice in invoices]
+        payments = account_payment_obj.create(vals_list)
+        payments.action_post()
+        for payment, invoice in zip(payments, invoices):
+            self.reconcile_payment_ept(payment, invoice)
         return True
 
+    def get_invoice_order_ept(self, invoice):
+        """
+        This method will return the order of the invoice among the orders.
+        @param invoice: Record of Invoice.
+        @return: sale.order()
+        """
+        if len(self) == 1:
+            return self
+        return (invoice.invoice_line_ids.sale_line_ids.order_id & self)[:1] or self[:1]
+
     def reconcile_payment_ept(self, payment_id, invoice):
         """ This method is use to reconcile payment.
             @author: twinkalc.
             Migration done by Haresh Mori on September 2021
         """
-        move_line_obj = self.env['account.move.line']
         domain = [('account_internal_type', 'in', ('receivable', 'payable')),
                   ('reconciled', '=', False)]
-        line_ids = move_line_obj.search([('move_id', '=', invoice.id)])
+        line_ids = invoice.line_ids
         to_reconcile = [line_ids.filtered( \
             lambda line: line.account_internal_type == 'receivable')]
 
@@ -1,15 +1,46 @@
 # -*- coding: utf-8 -*-
 # See LICENSE file for full copyright and licensing details.
+import copy
+
 from odoo import models
 
+ORDER_LINE_OWN_VALS = ('order_id', 'product_uom_qty', 'price_unit', 'discount', 'state')
+
 
 class SaleOrderLine(models.Model):
     _inherit = "sale.order.line"
 
-    def create_sale_order_line_ept(self, vals):
+    def create_sale_order_line_ept(self, vals, line_vals_cache=None):
         """
         Required data in dictionary :- order_id, name, product_id.
+        The defaults given by the product onchange are computed once per product, UoM, company,
+        fiscal position and pricelist when line_vals_cache is passed, and reused for the other lines
+        of the import batch.
         Migration done by Haresh Mori on September 2021
+        @param vals: Dictionary of the order line values.
+        @param line_vals_cache: Dictionary shared by the lines of an import batch.
+        """
+        cache_key = line_vals_cache is not None and self.get_order_line_vals_cache_key_ept(vals)
+        if cache_key and cache_key in line_vals_cache:
+            order_line = copy.deepcopy(line_vals_cache[cache_key])
+        else:
+            order_line = self.prepare_order_line_onchange_vals_ept(vals)
+            if cache_key:
+                line_vals_cache[cache_key] = self.get_order_line_cacheable_vals_ept(order_line)
+
+        order_line.update({
+            'order_id': vals.get('order_id', False),
+            'product_uom_qty': vals.get('order_qty', 0.0),
+            'price_unit': vals.get('price_unit', 0.0),
+            'discount': vals.get('discount', 0.0),
+            'state': 'draft',
+        })
+        return order_line
+
+    def prepare_order_line_onchange_vals_ept(self, vals):
+        """
+        Prepare the order line values with the product onchange of the order line.
+        @param vals: Dictionary of the order line values.
         """
         sale_order_line = self.env['sale.order.line']
         order_line = {
@@ -22,13 +53,38 @@ class SaleOrderLine(models.Model):
 
         new_order_line = sale_order_line.new(order_line)
         new_order_line.product_id_change()
-        order_line = sale_order_line._convert_to_write({name: new_order_line[name] for name in new_order_line._cache})
+        return sale_order_line._convert_to_write({name: new_order_line[name] for name in new_order_line._cache})
 
-        order_line.update({
-            'order_id': vals.get('order_id', False),
-            'product_uom_qty': vals.get('order_qty', 0.0),
-            'price_unit': vals.get('price_unit', 0.0),
-            'discount': vals.get('discount', 0.0),
-            'state': 'draft',
-        })
-        return order_line
+    def get_order_line_vals_cache_key_ept(self, vals):
+        """
+        Return the key of the cached order line defaults, or False when the line must go through the
+        product onchange. Without fiscal position on the order, the taxes are mapped with the fiscal
+        position of the customer, so the customer is part of the key.
+        @param vals: Dictionary of the order line values.
+        """
+        order = self.env['sale.order'].browse(vals.get('order_id', False))
+        product = self.env['product.product'].browse(vals.get('product_id', False))
+        if not order or not product or not self.is_order_line_vals_cacheable_ept(product):
+            return False
+        fiscal_position_key = order.fiscal_position_id.id or ('partner', order.partner_id.id)
+        return (product.id, vals.get('product_uom') or False, vals.get('company_id', False), fiscal_position_key,
+                order.pricelist_id.id, order.partner_id.lang)
+
+    def is_order_line_vals_cacheable_ept(self, product):
+        """
+        Products with attributes which are not creating variants get their description from the
+        order line, so those keep the product onchange. Connectors can extend this for the products
+        needing their own logic.
+        @param product: product.product()
+        """
+        return not product.product_tmpl_id.attribute_line_ids.filtered(
+            lambda attribute_line: attribute_line.attribute_id.create_variant == 'no_variant')
+
+    def get_order_line_cacheable_vals_ept(self, order_line):
+        """
+        Keep the product defaults of the onchange values. Computed and related fields are left out,
+        they are computed again for the order of the line when it is created.
+        @param order_line: Dictionary of the order line values given by the onchange.
+        """
+        return {name: copy.deepcopy(value) for name, value in order_line.items()
+                if name not in ORDER_LINE_OWN_VALS and name in self._fields and not self._fields[name].compute}
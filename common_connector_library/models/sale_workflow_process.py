@@ -24,6 +24,10 @@ class SaleWorkflowProcess(models.Model):
     create_invoice = fields.Boolean('Create & Validate Invoice', default=False,
                                     help="If it's checked, Invoice for Order will be Created and Posted.")
     register_payment = fields.Boolean(default=False, help="If it's checked, Payment will be registered for Invoice.")
+    defer_delivery_invoice = fields.Boolean("Invoice Deliveries in Background", default=False,
+                                            help="If it's checked, the invoices of the products invoiced on delivery "
+                                                 "are created by a scheduler after the pickings are validated, instead "
+                                                 "of during the validation.")
     invoice_date_is_order_date = fields.Boolean('Force Accounting Date',
                                                 help="if it is checked then, the account journal entry will be "
                                                      "generated based on Order date and if unchecked then, "
@@ -61,6 +65,7 @@ class SaleWorkflowProcess(models.Model):
         for record in self:
             if not record.create_invoice:
                 record.register_payment = False
+                record.defer_delivery_invoice = False
 
     @api.model
     def auto_workflow_process_ept(self, auto_workflow_process_id=False, order_ids=[]):
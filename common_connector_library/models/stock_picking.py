@@ -10,9 +10,14 @@ class StockPicking(models.Model):
         """
         Create and paid invoice on the basis of auto invoice work flow
         when invoicing policy is 'delivery'.
+        The orders are invoiced together per workflow, or marked for the pending auto invoice
+        scheduler when the workflow invoices the deliveries in background.
         Migration done by Haresh Mori on September 2021
         """
         result = super(StockPicking, self)._action_done()
+        sale_order_obj = self.env['sale.order']
+        workflow_orders = {}
+        pending_orders = sale_order_obj
         for picking in self:
             if picking.sale_id.invoice_status == 'invoiced':
                 continue
@@ -23,6 +28,14 @@ class StockPicking(models.Model):
 
             if work_flow_process_record and delivery_lines and work_flow_process_record.create_invoice and \
                 picking.picking_type_id.code == 'outgoing':
-                order.validate_and_paid_invoices_ept(work_flow_process_record)
+                if work_flow_process_record.defer_delivery_invoice:
+                    pending_orders |= order
+                else:
+                    workflow_orders[work_flow_process_record] = workflow_orders.get(work_flow_process_record,
+                                                                                    sale_order_obj) | order
+        for work_flow_process_record, orders in workflow_orders.items():
+            orders.validate_and_paid_invoices_ept(work_flow_process_record)
+        if pending_orders:
+            pending_orders.write({'pending_auto_invoice_ept': True})
+            self.env.ref('common_connector_library.ir_cron_pending_auto_invoice_ept')._trigger()
         return result
-
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# See LICENSE file for full copyright and licensing details.
+import csv
+import io
+import logging
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+ZIP_STATE_CSV_FIELDS = ('country_code', 'zip_code', 'state_code', 'state_name')
+ZIP_STATE_INSERT_BATCH_SIZE = 1000
+
+
+class ZipStateEpt(models.Model):
+    """
+    Postal code to state dataset, it is checked before requesting the state to the zippopotam api and
+    the states found by the api are stored in it.
+    """
+    _name = 'zip.state.ept'
+    _description = 'Postal Code State'
+    _rec_name = 'zip_code'
+    _order = 'country_id, zip_code'
+
+    country_id = fields.Many2one('res.country', required=True, index=True, ondelete='cascade')
+    zip_code = fields.Char(required=True, index=True, help="Postal code without the extension after '-'")
+    state_id = fields.Many2one('res.country.state', required=True, ondelete='cascade')
+    source = fields.Selection([('import', 'Imported'), ('api', 'Zippopotam API')], default='import',
+                              required=True)
+
+    _sql_constraints = [('zip_state_ept_country_zip_unique', 'UNIQUE(country_id, zip_code)',
+                         'Postal code must be unique per country.')]
+
+    @staticmethod
+    def normalize_zip_code_ept(zip_code):
+        """
+        Normalize the postal code in the way it is stored, only the part before '-' is kept.
+        @param zip_code: Postal code.
+        @return: Normalized postal code or empty string.
+        """
+        return (zip_code or '').split('-')[0].strip().upper()
+
+    @api.model
+    def get_country_states_dict_ept(self, countries):
+        """
+        Prepare the states of the countries to find them by lower case code or name, like they are
+        searched with =ilike.
+        @param countries: res.country()
+        @return: dict {(country id, lower case code or name): res.country.state()}
+        """
+        states = {}
+        if not countries:
+            return states
+        for state in self.env['res.country.state'].search([('country_id', 'in', countries.ids)], order='code'):
+            states.setdefault((state.country_id.id, state.code.lower()), state)
+            states.setdefault((state.country_id.id, state.name.lower()), state)
+        return states
+
+    @api.model
+    def get_zip_states_ept(self, country_zip_codes):
+        """
+        Search the states of the postal codes with one search.
+        @param country_zip_codes: Iterable of tuple (country id, normalized postal code).
+        @return: dict {(country id, postal code): res.country.state()}
+        """
+        country_zip_codes = {(country_id, zip_code) for country_id, zip_code in country_zip_codes if zip_code}
+        if not country_zip_codes:
+            return {}
+        zip_states = self.search([('country_id', 'in', list({key[0] for key in country_zip_codes})),
+                                  ('zip_code', 'in', list({key[1] for key in country_zip_codes}))])
+        return {(zip_state.country_id.id, zip_state.zip_code): zip_state.state_id for zip_state in zip_states
+                if (zip_state.country_id.id, zip_state.zip_code) in country_zip_codes}
+
+    @api.model
+    def store_zip_states_ept(self, zip_state_dict, source='import'):
+        """
+        Store the states of the postal codes, the postal codes already stored are updated when
+        their state is changed and the new ones are inserted.
+        @param zip_state_dict: dict {(country id, normalized postal code): state id}
+        @param source: import or api
+        @return: Number of the created and updated postal codes.
+        """
+        zip_state_dict = {key: state_id for key, state_id in zip_state_dict.items() if key[1] and state_id}
+        if not zip_state_dict:
+            return 0
+        existing = self.search([('country_id', 'in', list({key[0] for key in zip_state_dict})),
+                                ('zip_code', 'in', list({key[1] for key in zip_state_dict}))])
+        count = 0
+        for zip_state in existing:
+            state_id = zip_state_dict.pop((zip_state.country_id.id, zip_state.zip_code), False)
+            if state_id and zip_state.state_id.id != state_id:
+                zip_state.write({'state_id': state_id, 'source': source})
+                count += 1
+        return count + self._insert_zip_states_ept(zip_state_dict, source)
+
+    def _insert_zip_states_ept(self, zip_state_dict, source):
+        """
+        Insert the postal codes with ON CONFLICT DO NOTHING, so a postal code stored at the same
+        time by another transaction, like two order imports finding the same postal code with the
+        api, does not abort the transaction.
+        @param zip_state_dict: dict {(country id, normalized postal code): state id}
+        @param source: import or api
+        @return: Number of the inserted postal codes.
+        """
+        if not zip_state_dict:
+            return 0
+        self.flush()
+        now = fields.Datetime.now()
+        rows = [(country_id, zip_code, state_id, source, self.env.uid, now, self.env.uid, now)
+                for (country_id, zip_code), state_id in zip_state_dict.items()]
+        inserted = 0
+        for index in range(0, len(rows), ZIP_STATE_INSERT_BATCH_SIZE):
+            batch = rows[index:index + ZIP_STATE_INSERT_BATCH_SIZE]
+            self._cr.execute("""INSERT INTO zip_state_ept (country_id, zip_code, state_id, source,
+                                                           create_uid, create_date, write_uid, write_date)
+                                VALUES %s ON CONFLICT (country_id, zip_code) DO NOTHING"""
+                             % ', '.join(['%s'] * len(batch)), batch)
+            inserted += self._cr.rowcount
+        self.invalidate_cache()
+        return inserted
+
+    @api.model
+    def load_zip_states_csv_ept(self, csv_data, delimiter=','):
+        """
+        Load the postal code dataset from a CSV file having the columns country_code, zip_code,
+        state_code and state_name. The states which are not found in the country are created when
+        both the state code and name are given.
+        @param csv_data: Content of the CSV file as bytes or str.
+        @param delimiter: Delimiter of the CSV file.
+        @return: Number of the created and updated postal codes.
+        """
+        if isinstance(csv_data, bytes):
+            csv_data = csv_data.decode('utf-8-sig')
+        state_obj = self.env['res.country.state']
+        countries = {}
+        states = {}
+        zip_state_dict = {}
+        for row in csv.DictReader(io.StringIO(csv_data), delimiter=delimiter):
+            row = {field: (row.get(field) or '').strip() for field in ZIP_STATE_CSV_FIELDS}
+            zip_code = self.normalize_zip_code_ept(row['zip_code'])
+            if not row['country_code'] or not zip_code or not (row['state_code'] or row['state_name']):
+                continue
+            country_code = row['country_code'].upper()
+            if country_code not in countries:
+                countries[country_code] = self.env['res.country'].search([('code', '=ilike', country_code)], limit=1)
+                states.update(self.get_country_states_dict_ept(countries[country_code]))
+            country = countries[country_code]
+            if not country:
+                continue
+            state = states.get((country.id, row['state_code'].lower())) or \
+                states.get((country.id, row['state_name'].lower()))
+            if not state and row['state_code'] and row['state_name']:
+                state = state_obj.create({'name': row['state_name'], 'code': row['state_code'],
+                                          'country_id': country.id})
+                states.update({(country.id, row['state_code'].lower()): state,
+                               (country.id, row['state_name'].lower()): state})
+            if state:
+                zip_state_dict[(country.id, zip_code)] = state.id
+        count = self.store_zip_states_ept(zip_state_dict)
+        _logger.info("Loaded %s postal codes for %s countries.", count, len(countries))
+        return count
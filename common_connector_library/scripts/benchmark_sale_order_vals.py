@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# See LICENSE file for full copyright and licensing details.
+"""
+Benchmark of the sale order values prepared by the connectors before the order is created.
+
+It compares, for the same orders:
+- before: the onchange based values, two virtual orders with onchange_partner_id and
+  onchange_partner_shipping_id per order, like create_sales_order_vals_ept did before,
+- after: create_sales_order_vals_ept without cache,
+- after with cache: create_sales_order_vals_ept with one vals_cache for the whole batch.
+
+The orders use the existing customers of the database, BENCHMARK_PARTNERS different customers
+are spread over BENCHMARK_ORDERS orders. Nothing is written, the transaction is rolled back.
+
+Usage:
+    BENCHMARK_ORDERS=10000 BENCHMARK_PARTNERS=500 \
+    odoo shell -d <database> --no-http < common_connector_library/scripts/benchmark_sale_order_vals.py
+"""
+import os
+import time
+
+BENCHMARK_ORDERS = int(os.environ.get('BENCHMARK_ORDERS', 10000))
+BENCHMARK_PARTNERS = int(os.environ.get('BENCHMARK_PARTNERS', 500))
+
+
+def old_create_sales_order_vals(sale_order, vals):
+    """
+    The onchange based implementation of create_sales_order_vals_ept before it prepared the values
+    without virtual records.
+    """
+    order_vals = {
+        'company_id': vals.get('company_id', False),
+        'partner_id': vals.get('partner_id', False),
+        'partner_invoice_id': vals.get('partner_invoice_id', False),
+        'partner_shipping_id': vals.get('partner_shipping_id', False),
+        'warehouse_id': vals.get('warehouse_id', False),
+    }
+    new_record = sale_order.new(order_vals)
+    new_record.onchange_partner_id()
+    order_vals = sale_order._convert_to_write({name: new_record[name] for name in new_record._cache})
+    order_vals.update({'partner_shipping_id': vals.get('partner_shipping_id', False)})
+    new_record = sale_order.new(order_vals)
+    new_record.onchange_partner_shipping_id()
+    order_vals = sale_order._convert_to_write({name: new_record[name] for name in new_record._cache})
+    fpos = order_vals.get('fiscal_position_id') or vals.get('fiscal_position_id', False)
+    order_vals.update(sale_order.prepare_order_vals_after_onchange_ept(vals, fpos))
+    return order_vals
+
+
+def prepare_benchmark_orders(env):
+    """
+    Prepare the values of the orders given by the connectors to create_sales_order_vals_ept.
+    """
+    company = env.company
+    warehouse = env['stock.warehouse'].search([('company_id', '=', company.id)], limit=1)
+    partners = env['res.partner'].search([('type', '=', 'contact'), ('company_id', 'in', [False, company.id])],
+                                         limit=BENCHMARK_PARTNERS)
+    if not partners:
+        raise ValueError("No customer found in the database.")
+    pricelist = env['product.pricelist'].search([], limit=1)
+    return [{'company_id': company.id,
+             'partner_id': partners[index % len(partners)].id,
+             'partner_invoice_id': partners[index % len(partners)].id,
+             'partner_shipping_id': partners[index % len(partners)].id,
+             'warehouse_id': warehouse.id,
+             'pricelist_id': pricelist.id,
+             'picking_policy': 'direct',
+             'date_order': '2021-01-01 00:00:00',
+             'client_order_ref': 'BENCHMARK-%s' % index} for index in range(BENCHMARK_ORDERS)], len(partners)
+
+
+def run_benchmark(name, env, method):
+    """
+    Run method for every order after clearing the caches, return the elapsed time, the number
+    of queries and the prepared values.
+    """
+    env.cache.invalidate()
+    env.registry.clear_caches()
+    queries = env.cr.sql_log_count
+    start = time.perf_counter()
+    result = method()
+    elapsed = time.perf_counter() - start
+    queries = env.cr.sql_log_count - queries
+    print("%-18s %9.2f s %9.2f ms/order %9d queries" % (name, elapsed, elapsed * 1000 / BENCHMARK_ORDERS,
+                                                         queries))
+    return result
+
+
+def main(env):
+    sale_order = env['sale.order']
+    orders, partner_count = prepare_benchmark_orders(env)
+    print("%s orders, %s customers" % (len(orders), partner_count))
+    before = run_benchmark('before', env, lambda: [old_create_sales_order_vals(sale_order, vals)
+                                                   for vals in orders])
+    run_benchmark('after', env, lambda: [sale_order.create_sales_order_vals_ept(vals) for vals in orders])
+    vals_cache = {}
+    after = run_benchmark('after with cache', env, lambda: [sale_order.create_sales_order_vals_ept(vals, vals_cache)
+                                                            for vals in orders])
+    fields_to_check = ('fiscal_position_id', 'user_id', 'pricelist_id', 'partner_shipping_id')
+    mismatches = sum(1 for old_vals, new_vals in zip(before, after)
+                     if any(old_vals.get(name) != new_vals.get(name) for name in fields_to_check))
+    print("%s orders with different %s" % (mismatches, ', '.join(fields_to_check)))
+    env.cr.rollback()
+
+
+main(env)  # noqa: F821, env is given by odoo shell
@@ -22,7 +22,5 @@ class CommonLogBookEpt(models.Model):
         :param order_ref: order reference
         :param order_data_queue_line_id: order data queue line id
         """
-        self.write({
-            'log_lines': [(0, 0, {
-                'message': message, 'order_ref': order_ref, 'ebay_order_data_queue_line_id': order_data_queue_line_id})]
-        })
+        self.add_log_line_ept({'message': message, 'order_ref': order_ref,
+                               'ebay_order_data_queue_line_id': order_data_queue_line_id})
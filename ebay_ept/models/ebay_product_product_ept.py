@@ -151,7 +151,7 @@ class EbayProductProductEpt(models.Model):
             ebay_products = self.search([('instance_id', '=', instance.id), ('exported_in_ebay', '=', True)])
         if not ebay_products:
             message = "Products not found for update price. Instance(site) name: %s" % instance.name
-            log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
+            log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id)
             return False
         price_list_data = []
         for ebay_product in ebay_products:
@@ -161,7 +161,7 @@ class EbayProductProductEpt(models.Model):
             if not listing:
                 message = "No Active listing found for Update price in Site: %s and product:%s" % (
                     instance.name, ebay_product.ebay_sku)
-                log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id)
                 continue
             sku = ebay_product.ebay_sku or ebay_product.product_id.default_code
             price_list_data = price_list_data + [{'ItemID': listing.name, 'StartPrice': price, 'SKU': sku}]
@@ -191,7 +191,7 @@ class EbayProductProductEpt(models.Model):
             if not listing:
                 message = "No Active listing found for Export Stock in Site: %s and product:%s" % (
                     instance.name, ebay_product.ebay_sku)
-                log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id)
                 continue
             ebay_stock = ebay_product_stock[ebay_product.product_id.id]
             should_cancel_listing = ebay_product.ebay_product_tmpl_id._compute_get_listing_stock()
@@ -247,7 +247,7 @@ class EbayProductProductEpt(models.Model):
                 _logger.info("Data: %s" % str(inv_list))
                 self.call_ebay_revise_inventory_status_api(list(inv_list), instance)
             except Exception as error:
-                log_line_obj.create_log_lines(error, log_book_id.model_id.id, False, log_book_id)
+                log_line_obj.buffer_log_line_ept(error, log_book_id.model_id.id, False, log_book_id)
 
     def export_stock_in_ebay(self, instance):
         """
@@ -263,12 +263,12 @@ class EbayProductProductEpt(models.Model):
         warehouse_ids = instance.ebay_stock_warehouse_ids
         if not warehouse_ids:
             message = "No Warehouse found for Export Stock in Site: %s" % instance.name
-            log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
+            log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id)
             return False
         product_ids = self.get_products_to_export_stock(instance)
         if not product_ids:
             message = "No products found in warehouses: %s for Export Stock" % warehouse_ids.name
-            log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
+            log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id)
             return False
         ebay_product_stock = ebay_product_template_obj.get_ebay_product_stock_ept(instance, product_ids,
                                                                                   warehouse_ids)
@@ -278,7 +278,7 @@ class EbayProductProductEpt(models.Model):
         if not ebay_exported_products:
             message = "No Ebay products found in warehouses: %s for Export Stock and site: %s" % (
                 warehouse_ids.name, instance.name)
-            log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
+            log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id)
             return False
         self.with_context(is_call_from_operations_wizard=True).export_stock_levels_ebay(instance,
                                                                                         ebay_exported_products,
@@ -369,7 +369,7 @@ class EbayProductProductEpt(models.Model):
                 find_common_message = common_log_lines_ept_obj.search(
                     [('message', '=ilike', error)])
                 if not find_common_message:
-                    log_book_id.write({'log_lines': [(0, 0, {'message': error})]})
+                    log_book_id.add_log_line_ept({'message': error})
         return inventory_list
 
     def get_products_to_export_stock(self, instance):
@@ -475,7 +475,7 @@ class EbayProductProductEpt(models.Model):
             find_common_message = common_log_lines_ept_obj.search(
                 [('message', '=ilike', error)])
             if not find_common_message:
-                log_book_id.write({'log_lines': [(0, 0, {'message': error})]})
+                log_book_id.add_log_line_ept({'message': error})
 
     def get_ebay_item_listing(self, instance, item_id):
         """
@@ -588,8 +588,8 @@ class EbayProductTemplateEpt(models.Model):
                 log_line_obj = self.env["common.log.lines.ept"]
                 message = "Uploaded image quality is not good: Image name:%s and variant SKU:%s" % (
                     image.name, variant.ebay_sku)
-                log_line_obj.create_log_lines(message, log_book_id.model_id.id, variant.ebay_product_tmpl_id,
-                                              log_book_id)
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, variant.ebay_product_tmpl_id,
+                                                 log_book_id)
         return list_image_url
 
     def prepare_ebay_product_description_parameter(self, variant, ebay_product_template):
@@ -696,8 +696,8 @@ class EbayProductTemplateEpt(models.Model):
             try:
                 results = self.call_add_or_update_items_api(add_items, instance, 'AddItems')
             except Exception as error:
-                log_line_obj.create_log_lines(str(error.response.dict()), log_book_id.model_id.id,
-                                              ebay_product_template, log_book_id)
+                log_line_obj.buffer_log_line_ept(str(error.response.dict()), log_book_id.model_id.id,
+                                                 ebay_product_template, log_book_id)
                 log_book_id.message_post(body='Prepare dictionary data for export product:  ' + str(product_dict))
                 return False
             if not results:
@@ -779,7 +779,7 @@ class EbayProductTemplateEpt(models.Model):
         except Exception as error:
             result = trading_api.response
             if result.dict().get('Ack') not in ["Success", "Warning"]:
-                log_line_obj.create_log_lines(error, log_book_id.model_id.id, ebay_product_template, log_book_id)
+                log_line_obj.buffer_log_line_ept(error, log_book_id.model_id.id, ebay_product_template, log_book_id)
                 log_book_id.message_post(body='Prepare dictionary data for export product:  ' + str(product_dict))
                 return False
         if result.dict().get('Ack') in ["Success", "Warning"]:
@@ -813,8 +813,8 @@ class EbayProductTemplateEpt(models.Model):
             try:
                 results = self.call_add_or_update_items_api(product_dict, instance, 'ReviseItem')
             except Exception as error:
-                log_line_obj.create_log_lines(str(error.response.dict()), log_book_id.model_id.id,
-                                              ebay_product_template, log_book_id)
+                log_line_obj.buffer_log_line_ept(str(error.response.dict()), log_book_id.model_id.id,
+                                                 ebay_product_template, log_book_id)
                 log_book_id.message_post(body='Prepare dictionary data for update product:  ' + str(product_dict))
                 return False
             if results and results.get('Ack', False) in ["Success", "Warning"]:
@@ -895,7 +895,7 @@ class EbayProductTemplateEpt(models.Model):
         except Exception as error:
             result = trading_api.response.dict()
             if result.get('Ack') not in ["Success", "Warning"]:
-                log_line_obj.create_log_lines(error, log_book_id.model_id.id, ebay_product_template, log_book_id)
+                log_line_obj.buffer_log_line_ept(error, log_book_id.model_id.id, ebay_product_template, log_book_id)
                 log_book_id.message_post(body='Prepare dictionary data for update product:  ' + str(product_dict))
                 return False
         if result.dict().get('Ack') in ["Success", "Warning"]:
@@ -964,7 +964,7 @@ class EbayProductTemplateEpt(models.Model):
             trading_api.execute('RelistFixedPriceItem', product_dict)
             results = trading_api.response.dict()
         except Exception as error:
-            log_line_obj.create_log_lines(error, log_book_id.model_id.id, ebay_product_template, log_book_id)
+            log_line_obj.buffer_log_line_ept(error, log_book_id.model_id.id, ebay_product_template, log_book_id)
             log_book_id.message_post(body='Prepare dictionary data for relist product:  ' + str(product_dict))
             return False
         if results.get('Ack', False) in ["Success", "Warning"]:
@@ -722,8 +722,8 @@ class EbayProductListingEpt(models.Model):
             odoo_product = self.search_odoo_product_by_sku(sku)
             if odoo_product and len(odoo_product) > 1:
                 message = 'More than one Odoo Product found with SKU %s' % sku
-                log_line = log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
-                log_line.write({'import_product_queue_line_id': product_queue_line.id})
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                 vals={'import_product_queue_line_id': product_queue_line.id})
                 self.env.context = dict(self.env.context)
                 self.env.context.update({'is_product_queue_fail': True})
                 continue
@@ -748,15 +748,15 @@ class EbayProductListingEpt(models.Model):
                 except Exception as error:
                     message = "Getting error while creating product, error is: %s" % error
                     _logger.info(message)
-                    log_line = log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
-                    log_line.write({'import_product_queue_line_id': product_queue_line.id})
+                    log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                     vals={'import_product_queue_line_id': product_queue_line.id})
                     self.env.context = dict(self.env.context)
                     self.env.context.update({'is_product_queue_fail': True})
                     continue
             else:
                 message = 'Product Not found for SKU %s' % sku
-                log_line = log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
-                log_line.write({'import_product_queue_line_id': product_queue_line.id})
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                 vals={'import_product_queue_line_id': product_queue_line.id})
                 self.env.context = dict(self.env.context)
                 self.env.context.update({'is_product_queue_fail': True})
         _logger.info("End the variation process of itemid: %s" % item_id)
@@ -818,8 +818,8 @@ class EbayProductListingEpt(models.Model):
             self.create_or_update_product(product_response, instance, log_book_id, queue_line)
         else:
             message = "Product Have no SKU for itemid: %s" % product_response.get('ItemID')
-            log_line = log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
-            log_line.write({'import_product_queue_line_id': queue_line.id})
+            log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                             vals={'import_product_queue_line_id': queue_line.id})
             self.env.context = dict(self.env.context)
             self.env.context.update({'is_product_queue_fail': True})
         return True
@@ -890,8 +890,8 @@ class EbayProductListingEpt(models.Model):
             except Exception as error:
                 message = "Getting Error while create image %s " % error
                 _logger.info(message)
-                log_line = log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
-                log_line.write({'import_product_queue_line_id': product_queue_line.id})
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                 vals={'import_product_queue_line_id': product_queue_line.id})
                 self.env.context = dict(self.env.context)
                 self.env.context.update({'is_product_queue_fail': True})
             self.map_odoo_product_with_ebay_product(ebay_product, item, is_create_auto_odoo_product)
@@ -905,8 +905,8 @@ class EbayProductListingEpt(models.Model):
                 odoo_product = self.create_odoo_product(item.get('Title'), item.get('SKU'))
             if odoo_product and len(odoo_product) > 1:
                 message = 'More than one Odoo Product found with SKU %s' % item.get('SKU')
-                log_line = log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
-                log_line.write({'import_product_queue_line_id': product_queue_line.id})
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                 vals={'import_product_queue_line_id': product_queue_line.id})
                 self.env.context = dict(self.env.context)
                 self.env.context.update({'is_product_queue_fail': True})
                 return False
@@ -919,8 +919,8 @@ class EbayProductListingEpt(models.Model):
                     ebay_product_tmpl_id.id)
             else:
                 message = 'Product Not found for SKU %s' % (item.get('SKU'))
-                log_line = log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
-                log_line.write({'import_product_queue_line_id': product_queue_line.id})
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                 vals={'import_product_queue_line_id': product_queue_line.id})
                 self.env.context = dict(self.env.context)
                 self.env.context.update({'is_product_queue_fail': True})
             return True
@@ -351,9 +351,9 @@ class SaleOrder(models.Model):
         else:
             message = "Instance not found for site: %s" % ebay_site.name if ebay_site else ''
             _logger.info(message)
-            log_line = log_lines_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id,
-                                                      order_ref='order_ref')
-            log_line.write({'ebay_order_data_queue_line_id': order_queue_line.id})
+            log_lines_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                              order_ref='order_ref',
+                                              vals={'ebay_order_data_queue_line_id': order_queue_line.id})
             order_queue_line.write({'state': 'failed', 'processed_at': datetime.now()})
 
         return sale_order
@@ -400,9 +400,9 @@ class SaleOrder(models.Model):
                         payment_method)
         if message:
             skip_order = True
-            log_line = log_lines_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id,
-                                                      order_ref='order_ref')
-            log_line.write({'ebay_order_data_queue_line_id': order_queue_line.id})
+            log_lines_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                              order_ref='order_ref',
+                                              vals={'ebay_order_data_queue_line_id': order_queue_line.id})
             order_queue_line.write({'state': 'failed', 'processed_at': datetime.now()})
         return skip_order
 
@@ -425,9 +425,9 @@ class SaleOrder(models.Model):
                 message = _("Order %s skipped due to SKU or Item id not found in order response %s",
                             order_response.get('OrderID'))
                 _logger.info(message)
-                log_line = log_lines_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id,
-                                                          order_ref='order_ref')
-                log_line.write({'ebay_order_data_queue_line_id': order_queue_line.id})
+                log_lines_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                  order_ref='order_ref',
+                                                  vals={'ebay_order_data_queue_line_id': order_queue_line.id})
                 order_queue_line.write({'state': 'failed', 'processed_at': datetime.now()})
                 return True
             return self.search_create_product_for_order_ept(order_response, item_id, ebay_sku, instance, log_book_id,
@@ -451,18 +451,18 @@ class SaleOrder(models.Model):
             if not ebay_product and not instance.seller_id.create_new_product:
                 message = _("Order %s skipped due to SKU(%s) or Item(%s) id not found in Odoo" % (
                     order_response.get('OrderID'), ebay_sku, item_id))
-                log_line = log_lines_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id,
-                                                          order_ref='order_ref')
-                log_line.write({'ebay_order_data_queue_line_id': order_queue_line.id})
+                log_lines_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                  order_ref='order_ref',
+                                                  vals={'ebay_order_data_queue_line_id': order_queue_line.id})
                 order_queue_line.write({'state': 'failed', 'processed_at': datetime.now()})
                 return True
             if instance.seller_id.create_new_product:
                 try:
                     item_response = ebay_product_product_obj.call_get_items_ebay_api(instance, item_id)
                 except Exception as error:
-                    log_line = log_lines_obj.create_log_lines(error, log_book_id.model_id.id, False, log_book_id,
-                                                              order_ref='order_ref')
-                    log_line.write({'ebay_order_data_queue_line_id': order_queue_line.id})
+                    log_lines_obj.buffer_log_line_ept(error, log_book_id.model_id.id, False, log_book_id,
+                                                      order_ref='order_ref',
+                                                      vals={'ebay_order_data_queue_line_id': order_queue_line.id})
                     order_queue_line.write({'state': 'failed', 'processed_at': datetime.now()})
                     return True
                 item_response = item_response.get('Item')
@@ -592,8 +592,8 @@ class SaleOrder(models.Model):
                           "To create Shipping method automatically, \n" \
                           " please go to configurations > settings > seller > Is Delivery Carrier Create?" % (
                               order_ref, shipping_service_name)
-                log_line = log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
-                log_line.write({'ebay_order_data_queue_line_id': order_queue_line.id})
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                 vals={'ebay_order_data_queue_line_id': order_queue_line.id})
                 order_queue_line.write({'state': 'failed', 'processed_at': datetime.now()})
                 skip_order = True
             else:
@@ -634,9 +634,9 @@ class SaleOrder(models.Model):
         except Exception as error:
             message = "Receive error while process auto invoice workflow, Error is:  (%s)" % (error)
             _logger.info(message)
-            log_line = log_lines_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id,
-                                                      order_ref='order_ref')
-            log_line.write({'ebay_order_data_queue_line_id': order_queue_line.id})
+            log_lines_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                              order_ref='order_ref',
+                                              vals={'ebay_order_data_queue_line_id': order_queue_line.id})
             order_queue_line.write({'state': 'failed', 'processed_at': datetime.now()})
 
         return True
@@ -666,8 +666,8 @@ class SaleOrder(models.Model):
                     "\n- This might have happen because user may have done changes in order "
                     "manually, after the order was imported.", sale_order.name))
                 _logger.info(message)
-                log_lines_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id,
-                                               order_ref=sale_order.name)
+                log_lines_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                  order_ref=sale_order.name)
                 continue
             for order_line in order_lines:
                 tracking_dict = self.ebay_prepare_tracking_info(picking, carrier_name, order_line)
@@ -682,8 +682,8 @@ class SaleOrder(models.Model):
                         picking.write({'updated_in_ebay': True})
                 except Exception as error:
                     _logger.info("Failed to update orders status from odoo to eBay : {}".format(error))
-                    log_lines_obj.create_log_lines(error, log_book_id.model_id.id, False, log_book_id,
-                                                   order_ref=sale_order.name)
+                    log_lines_obj.buffer_log_line_ept(error, log_book_id.model_id.id, False, log_book_id,
+                                                      order_ref=sale_order.name)
         instance.seller_id.write({'last_update_order_export_date': datetime.now()})
 
         if not log_book_id.log_lines:
@@ -71,8 +71,8 @@ class SaleOrderLine(models.Model):
                 message = "Skip order due to not found the active listing for item id: %s and order Id: %s" % (
                     item_id, order_response.get('OrderID'))
                 _logger.info(message)
-                log_line = log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
-                log_line.write({'ebay_order_data_queue_line_id': order_queue.id})
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id,
+                                                 vals={'ebay_order_data_queue_line_id': order_queue.id})
                 sale_order.unlink()
                 return False
             price_unit = self.get_ebay_item_price(order_line_dict)
@@ -357,7 +357,7 @@ class EbayProcessImportExport(models.TransientModel):
                 if not product_dic["product_template_id"] or not product_dic["product_id"]:
                     message = "product_template_id Or product_id As Per Odoo Product in file at row " \
                               "%s " % row_no
-                    log_line_obj.create_log_lines(message, model_id, False, log_book_id)
+                    log_line_obj.buffer_log_line_ept(message, model_id, False, log_book_id)
                     continue
                 ebay_template = self.create_update_ebay_product(instance, product_dic)
                 if ebay_template.id not in ebay_templates:
@@ -63,7 +63,7 @@ class EbayProductWizard(models.TransientModel):
             warehouse_ids = instance.ebay_stock_warehouse_ids
             if not warehouse_ids:
                 message = "No Warehouse found for Export Stock in Site: %s" % instance.name
-                log_line_obj.create_log_lines(message, log_book_id.model_id.id, False, log_book_id)
+                log_line_obj.buffer_log_line_ept(message, log_book_id.model_id.id, False, log_book_id)
                 return False
             odoo_products = ebay_products.mapped('product_id')
             ebay_product_stock = ebay_product_template_obj.get_ebay_product_stock_ept(instance, odoo_products.ids,
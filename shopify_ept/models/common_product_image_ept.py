@@ -44,9 +44,12 @@ class ProductImageEpt(models.Model):
     def write(self, vals):
         """
         Inherited write method for adding images in Shopify products.
+        The Shopify image layers are not changed when the scheduler writes the downloaded image.
         @author: Bhavesh Jadav on Date 17-Dec-2019.
         """
         result = super(ProductImageEpt, self).write(vals)
+        if self._context.get('image_download_ept'):
+            return result
         if self.user_has_groups('shopify_ept.group_shopify_ept'):
             shopify_product_images = self.env["shopify.product.image.ept"]
             for record in self:
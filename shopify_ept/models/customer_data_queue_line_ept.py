@@ -7,6 +7,7 @@ import time
 from datetime import datetime
 
 from odoo import models, fields, api, _
+from odoo.tools.sql import create_index
 
 _logger = logging.getLogger("Shopify Customer Queue Line")
 
@@ -30,6 +31,10 @@ class ShopifyCustomerDataQueueLineEpt(models.Model):
                                            help="Log lines created against which line.")
     name = fields.Char(string="Customer", help="Shopify Customer Name")
 
+    def init(self):
+        # Composite index used by the grouped counts of the queue line dashboard.
+        create_index(self._cr, '%s_state_create_date_index' % self._table, self._table, ['state', 'create_date'])
+
     def shopify_create_multi_queue(self, customer_queue_id, customer_ids):
         """
         This method used to call child method for create a customer queue line.
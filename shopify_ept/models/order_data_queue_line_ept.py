@@ -4,6 +4,7 @@ import json
 import logging
 import time
 from odoo import models, fields
+from odoo.tools.sql import create_index
 
 _logger = logging.getLogger("Shopify Order Queue Line")
 
@@ -34,6 +35,10 @@ class ShopifyOrderDataQueueLineEpt(models.Model):
                                                          help="Log lines created against which line.")
     name = fields.Char(help="Order Name")
 
+    def init(self):
+        # Composite index used by the grouped counts of the queue line dashboard.
+        create_index(self._cr, '%s_state_create_date_index' % self._table, self._table, ['state', 'create_date'])
+
     def create_order_queue_line(self, order_dict, instance, order_data, customer_name, customer_email, order_queue_id):
         """
         Creates order data queue line from order data.
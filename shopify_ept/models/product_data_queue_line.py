@@ -6,6 +6,7 @@ import logging
 import time
 
 from odoo import models, fields
+from odoo.tools.sql import create_index
 from .. import shopify
 
 _logger = logging.getLogger("Shopify Product Queue Line")
@@ -31,6 +32,10 @@ class ShopifyProductDataQueueLineEpt(models.Model):
     shopify_image_import_state = fields.Selection([('pending', 'Pending'), ('done', 'Done')], default='done',
                                                   help="It used to identify that product image imported explicitly")
 
+    def init(self):
+        # Composite index used by the grouped counts of the queue line dashboard.
+        create_index(self._cr, '%s_state_create_date_index' % self._table, self._table, ['state', 'create_date'])
+
     def auto_import_product_queue_line_data(self):
         """
         This method is used to find product queue which queue lines have state in draft and is_action_require is False.
@@ -6,7 +6,7 @@ from odoo import models
 class QueueLineDashboard(models.AbstractModel):
     _inherit = "queue.line.dashboard"
 
-    def _prepare_query(self, duration, state, table):
+    def _prepare_query(self, table):
         """
         Override the common connector method here to filter out the proper data in order data queue line base on
         order data queue.
@@ -15,15 +15,17 @@ class QueueLineDashboard(models.AbstractModel):
         """
         if table == 'shopify_order_data_queue_line_ept':
             queue_type = self._context.get('action_domain')[1][2]
-            qry = """SELECT oql.id FROM shopify_order_data_queue_line_ept as oql
-            INNER JOIN shopify_order_data_queue_ept as oq ON oq.id=oql.shopify_order_data_queue_id and 
-            oq.queue_type='{queue_type}' and oql.state ='{state}'""".format(state=state, queue_type=queue_type)
-            if duration == 'today':
-                qry += " AND oql.create_date >= CURRENT_DATE"
-            elif duration == 'yesterday':
-                qry += " AND oql.create_date BETWEEN CURRENT_DATE - INTERVAL '1' DAY AND CURRENT_DATE"
-            self._cr.execute(qry)
-            line_ids = self._cr.dictfetchall()
-            return [line_id.get('id') for line_id in line_ids]
-        res = super(QueueLineDashboard, self)._prepare_query(duration, state, table)
-        return res
+            join_clause = """INNER JOIN shopify_order_data_queue_ept AS oq ON oq.id = line.shopify_order_data_queue_id
+            AND oq.queue_type = %(queue_type)s"""
+            return join_clause, '', {'queue_type': queue_type}
+        return super(QueueLineDashboard, self)._prepare_query(table)
+
+    def _prepare_domain(self, table):
+        """
+        Override the common connector method here to open the order data queue lines of the order data queue
+        type only.
+        """
+        if table == 'shopify_order_data_queue_line_ept':
+            queue_type = self._context.get('action_domain')[1][2]
+            return [('shopify_order_data_queue_id.queue_type', '=', queue_type)]
+        return super(QueueLineDashboard, self)._prepare_domain(table)
@@ -1678,23 +1678,24 @@ class SaleOrder(models.Model):
         Updated by twinkalc to reconcile the created payment
         Migration done by twinkalc August 2020
         Override the common connector library method here to create separate payment records.
+        The invoices of the orders without multiple payments are paid by the common connector library.
         """
-        self.ensure_one()
         account_payment_obj = self.env['account.payment']
-        for invoice in invoices:
+        multi_payment_orders = self.filtered(lambda order: order.is_shopify_multi_payment)
+        multi_payment_invoices = invoices.filtered(
+            lambda invoice: self.get_invoice_order_ept(invoice) in multi_payment_orders)
+        if self - multi_payment_orders:
+            super(SaleOrder, self - multi_payment_orders).paid_invoice_ept(invoices - multi_payment_invoices)
+        for invoice in multi_payment_invoices:
             if invoice.amount_residual:
-                if self.is_shopify_multi_payment:
-                    for payment in self.shopify_payment_ids:
-                        vals = invoice.prepare_payment_dict(payment.workflow_id)
-                        vals.update({'amount': payment.amount})
-                        payment_id = account_payment_obj.create(vals)
-                        payment_id.action_post()
-                        self.reconcile_payment_ept(payment_id, invoice)
-                else:
-                    vals = invoice.prepare_payment_dict(self.auto_workflow_process_id)
+                order = self.get_invoice_order_ept(invoice)
+                for payment in order.shopify_payment_ids:
+                    vals = invoice.prepare_payment_dict(payment.workflow_id)
+                    vals.update({'amount': payment.amount})
                     payment_id = account_payment_obj.create(vals)
                     payment_id.action_post()
-                    self.reconcile_payment_ept(payment_id, invoice)
+                    order.reconcile_payment_ept(payment_id, invoice)
+        return True
 
     def create_schedule_activity_against_logbook(self, log_book_id, mismatch_record, note):
         """
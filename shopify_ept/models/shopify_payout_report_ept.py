@@ -55,7 +55,6 @@ class ShopifyPaymentReportEpt(models.Model):
         @author: Maulik Barad on Date 27-Nov-2020.
         """
         log_book_obj = self.env['common.log.book.ept']
-        log_line_obj = self.env['common.log.lines.ept']
 
         instance.connect_in_shopify()
         _logger.info("Import Payout Reports....")
@@ -69,8 +68,7 @@ class ShopifyPaymentReportEpt(models.Model):
                                                'model_id': model_id,
                                                'create_date': datetime.now(),
                                                'active': True})
-            log_line_obj.create({'log_book_id': log_book_id.id, 'message': message,
-                                 'model_id': model_id or False})
+            log_book_id.add_log_line_ept({'message': message, 'model_id': model_id or False})
             _logger.info(message)
             return False
 
@@ -290,7 +290,7 @@ class ShopifyProductProductEpt(models.Model):
         vals = {"message": message,
                 "model_id": model_id,
                 "log_book_id": log_book_id.id if log_book_id else False}
-        common_log_line_obj.create(vals)
+        common_log_line_obj.buffer_log_lines_ept([vals])
         return True
 
     def prepare_export_update_product_attribute_vals(self, template, new_product):
@@ -949,8 +949,9 @@ class ShopifyProductProductEpt(models.Model):
         log_book_id = common_log_obj.create({"type": log_type,
                                              "module": "shopify_ept",
                                              "shopify_instance_id": instance.id if instance else False,
-                                             "active": True,
-                                             "log_lines": [(0, 0, log_line) for log_line in log_line_array]})
+                                             "active": True})
+        self.env["common.log.lines.ept"].buffer_log_lines_ept([dict(log_line, log_book_id=log_book_id.id)
+                                                               for log_line in log_line_array])
         return log_book_id
 
 
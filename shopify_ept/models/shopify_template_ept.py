@@ -1166,4 +1166,4 @@ class ShopifyProductTemplateEpt(models.Model):
                         # "res_id": self.shopify_tmpl_id if self.shopify_tmpl_id else False,
                         "log_book_id": log_book_id.id if log_book_id else False,
                         }
-                common_log_line_obj.create(vals)
+                common_log_line_obj.buffer_log_lines_ept([vals])
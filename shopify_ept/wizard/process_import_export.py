@@ -589,7 +589,7 @@ class ShopifyProcessImportExport(models.TransientModel):
                 vals = {"message": message,
                         "model_id": model_id,
                         "log_book_id": log_book_id.id}
-                common_log_line_obj.create(vals)
+                common_log_line_obj.buffer_log_lines_ept([vals])
                 continue
 
             shopify_template, shopify_template_id, sequence = self.create_or_update_shopify_template_from_csv(instance,